@@ -8,9 +8,18 @@ from werkzeug.utils import secure_filename
 import pandas as pd
 
 from config import Config
-from models import db, Abstract, ModelMetrics, ClassificationHistory
+from models import (
+    db, Abstract, ModelMetrics, ClassificationHistory,
+    iter_abstract_chunks, keep_updated_at, upgrade_schema
+)
 from scraper import scrape_and_save
+from pipeline import (
+    STAGES, get_state, mark_processed, model_version, process_new_abstracts, run_train_stage
+)
 from classifier import KNNClassifier
+from model_registry import ModelHandle, ModelRegistry
+from prediction_cache import PredictionCache
+from preprocessing import TextPreprocessor, get_stem_cache, preload_resources
 
 
 app = Flask(__name__)
@@ -19,30 +28,157 @@ app.config.from_object(Config)
 # Initialize database
 db.init_app(app)
 
-# Global classifier instance
-classifier = None
+# Muat resource Sastrawi sebelum fork worker, misalnya:
+#   PRELOAD_NLP_RESOURCES=1 gunicorn --preload app:app
+if app.config['PRELOAD_NLP_RESOURCES']:
+    print(f"Sastrawi resources preloaded in {preload_resources():.3f}s")
+
+# Flag agar cache stemming hanya di-load sekali per proses
+stem_cache_loaded = False
+
+# Flag agar upgrade schema database hanya dijalankan sekali per proses
+schema_upgraded = False
+
+
+def upgrade_database():
+    """Tambahkan kolom baru ke database lama (sekali per proses)"""
+    global schema_upgraded
+    
+    if not schema_upgraded:
+        upgrade_schema()
+        schema_upgraded = True
+
+
+def init_stem_cache():
+    """Load cache stemming dari disk agar preprocessing langsung hangat"""
+    global stem_cache_loaded
+    
+    if stem_cache_loaded:
+        return
+    stem_cache_loaded = True
+    
+    stem_cache = get_stem_cache()
+    stem_cache.max_size = app.config['STEM_CACHE_SIZE']
+    
+    if app.config['STEM_CACHE_PATH']:
+        try:
+            stem_cache.load(app.config['STEM_CACHE_PATH'])
+        except Exception as e:
+            print(f"⚠️ Error loading stem cache: {e}")
+
+
+def save_stem_cache():
+    """Simpan cache stemming ke disk (jika persistensi diaktifkan)"""
+    if app.config['STEM_CACHE_PATH']:
+        try:
+            get_stem_cache().save(app.config['STEM_CACHE_PATH'])
+        except Exception as e:
+            print(f"⚠️ Error saving stem cache: {e}")
+
+
+def create_preprocessor():
+    """Buat TextPreprocessor sesuai pengaturan preprocessing di Config"""
+    preprocessor = TextPreprocessor(
+        n_jobs=app.config['PREPROCESS_N_JOBS'],
+        chunk_size=app.config['PREPROCESS_CHUNK_SIZE'],
+        min_parallel_batch=app.config['PREPROCESS_MIN_PARALLEL_BATCH'],
+        use_token_table=app.config['USE_TOKEN_TABLE'],
+        token_table_size=app.config['TOKEN_TABLE_SIZE']
+    )
+    
+    # Isi tabel token dari kata-kata yang sudah ada di cache stemming
+    if preprocessor.token_table is not None:
+        preprocessor.build_token_table(get_stem_cache().words())
+    
+    return preprocessor
+
+
+def create_classifier(k):
+    """Buat KNNClassifier sesuai pengaturan feature backend dan index di Config"""
+    return KNNClassifier(
+        k=k,
+        preprocessor=create_preprocessor(),
+        feature_backend=app.config['FEATURE_BACKEND'],
+        index_backend=app.config['KNN_INDEX'],
+        index_params={
+            'n_tables': app.config['LSH_N_TABLES'],
+            'n_bits': app.config['LSH_N_BITS']
+        } if app.config['KNN_INDEX'] == 'lsh' else None
+    )
+
+
+# Model ber-versi: /train menulis versi baru lalu mengganti pointer secara
+# atomik; setiap proses serving mengambil versi aktif lewat model_handle
+model_registry = ModelRegistry(app.config['MODEL_DIR'], keep=app.config['MODEL_KEEP_VERSIONS'])
+model_handle = ModelHandle(
+    model_registry,
+    lambda: create_classifier(app.config['KNN_K_VALUE']),
+    check_interval=app.config['MODEL_CHECK_INTERVAL']
+)
+
+# Hasil /classify dan /upload per teks; key ikut versi model, jadi entri lama
+# otomatis dibuang begitu versi berubah
+prediction_cache = PredictionCache(
+    max_size=app.config['PREDICTION_CACHE_SIZE'],
+    ttl=app.config['PREDICTION_CACHE_TTL']
+)
+
+
+def get_classifier():
+    """
+    Classifier versi aktif (None jika belum ada model)
+    
+    Simpan hasilnya di variabel lokal dan pakai sampai request selesai, agar
+    seluruh request dilayani oleh versi model yang sama.
+    """
+    return model_handle.get()
 
 
 def init_classifier():
-    """Initialize atau load classifier"""
-    global classifier
+    """Initialize atau load classifier (versi aktif di registry)"""
+    init_stem_cache()
     
+    classifier = get_classifier()
     if classifier is None:
-        classifier = KNNClassifier(k=app.config['KNN_K_VALUE'])
+        print(f"⚠️ Model not found in {model_registry.root}/")
+        print("   Please train the model first!")
+    return classifier
+
+
+def publish_classifier(classifier) -> str:
+    """Simpan classifier sebagai versi baru dan langsung layani dengan versi itu"""
+    version = model_registry.publish(classifier)
+    model_handle.set(classifier, version)
+    prediction_cache.invalidate()
+    return version
+
+
+def classify_abstracts(classifier, query):
+    """
+    Klasifikasi abstrak hasil query per chunk dan simpan predicted_label/confidence
+    
+    Baris dibaca, di-preprocess (pakai cache di database), diprediksi dan
+    di-commit per chunk (Config.STREAM_CHUNK_SIZE) sehingga memori tetap
+    terbatas berapapun jumlah abstraknya.
+    
+    Returns:
+        Dictionary {label: jumlah} hasil prediksi
+    """
+    counts = {}
+    
+    for chunk in iter_abstract_chunks(query, app.config['STREAM_CHUNK_SIZE']):
+        texts = classifier.preprocessor.ensure_preprocessed(chunk)
+        details = classifier.predict_with_details(texts, preprocessed=True)
         
-        # Coba load model yang sudah ada
-        if os.path.exists('models/knn_classifier.joblib'):
-            try:
-                classifier.load('models')
-                print(f"✅ Model loaded successfully! is_trained={classifier.is_trained}")
-            except Exception as e:
-                print(f"❌ Error loading model: {e}")
-                classifier = None
-        else:
-            print("⚠️ Model file not found: models/knn_classifier.joblib")
-            print("   Please train the model first!")
-    else:
-        print(f"ℹ️ Classifier already initialized. is_trained={classifier.is_trained}")
+        for abstract, label, confidence in zip(chunk, details['labels'], details['confidence']):
+            abstract.predicted_label = label
+            abstract.confidence = float(confidence)
+            counts[label] = counts.get(label, 0) + 1
+        
+        keep_updated_at(chunk)
+        db.session.commit()
+    
+    return counts
 
 
 def allowed_file(filename):
@@ -254,6 +390,8 @@ def clear_all_test_data():
 @app.route('/scrape', methods=['GET', 'POST'])
 def scrape():
     """Halaman untuk scraping data"""
+    classifier = get_classifier()
+    
     if request.method == 'POST':
         start_year = request.form.get('start_year', app.config['START_YEAR'], type=int)
         end_year = request.form.get('end_year', app.config['END_YEAR'], type=int)
@@ -264,7 +402,9 @@ def scrape():
                 app.config['BASE_URL'],
                 start_year,
                 end_year,
-                auto_label=True  # Otomatis label dengan keyword scoring
+                auto_label=True,  # Otomatis label dengan keyword scoring
+                classifier=classifier,  # Prediksi hanya abstrak baru (pipeline incremental)
+                chunk_size=app.config['STREAM_CHUNK_SIZE']
             )
             
             flash(result['message'], 'success')
@@ -335,51 +475,44 @@ def api_label_abstract(abstract_id):
 @app.route('/api/auto-label-unlabeled', methods=['POST'])
 def api_auto_label_unlabeled():
     """API untuk auto-label semua data yang belum berlabel"""
-    global classifier
+    classifier = get_classifier()
     
     if classifier is None or not classifier.is_trained:
         return jsonify({'error': 'Model belum di-train'}), 400
     
     try:
-        # Ambil semua data yang benar-benar belum berlabel (label IS NULL AND predicted_label IS NULL)
-        unlabeled = Abstract.query.filter(
+        # Semua data yang benar-benar belum berlabel (label IS NULL AND predicted_label IS NULL)
+        unlabeled_query = Abstract.query.filter(
             Abstract.label.is_(None),
             Abstract.predicted_label.is_(None)
-        ).all()
+        )
+        total_unlabeled = unlabeled_query.count()
         
-        if not unlabeled:
+        if total_unlabeled == 0:
             return jsonify({
                 'success': True,
                 'labeled': 0,
                 'message': 'Tidak ada data yang perlu dilabel'
             })
         
-        print(f"\n🤖 Auto-labeling {len(unlabeled)} unlabeled data...")
-        
-        # Klasifikasi batch
-        texts = [abstract.abstract_text for abstract in unlabeled]
-        predictions = classifier.predict(texts)
-        probabilities = classifier.predict_proba(texts)
+        print(f"\n🤖 Auto-labeling {total_unlabeled} unlabeled data...")
         
-        # Update database - set predicted_label
-        for i, abstract in enumerate(unlabeled):
-            abstract.predicted_label = predictions[i]
-            abstract.confidence = float(probabilities[i].max())
-        
-        db.session.commit()
+        # Klasifikasi per chunk dan update predicted_label
+        counts = classify_abstracts(classifier, unlabeled_query)
+        labeled = sum(counts.values())
         
         # Hitung distribusi label
-        rpl_count = sum(1 for p in predictions if p == 'RPL')
-        tkj_count = sum(1 for p in predictions if p == 'TKJ')
+        rpl_count = counts.get('RPL', 0)
+        tkj_count = counts.get('TKJ', 0)
         
         print(f"✓ Auto-labeling complete! RPL: {rpl_count}, TKJ: {tkj_count}")
         
         return jsonify({
             'success': True,
-            'labeled': len(unlabeled),
+            'labeled': labeled,
             'rpl_count': rpl_count,
             'tkj_count': tkj_count,
-            'message': f'Successfully labeled {len(unlabeled)} abstracts'
+            'message': f'Successfully labeled {labeled} abstracts'
         })
         
     except Exception as e:
@@ -391,49 +524,85 @@ def api_auto_label_unlabeled():
 @app.route('/train', methods=['GET', 'POST'])
 def train_model():
     """Halaman dan API untuk training model"""
-    global classifier
-    
     if request.method == 'POST':
         try:
             # ✅ HANYA AMBIL DATA LABEL MANUAL (Best Practice)
-            training_data = Abstract.query.filter(
+            training_query = Abstract.query.filter(
                 Abstract.label.isnot(None)
-            ).all()
+            )
+            total_training = training_query.count()
             
-            if len(training_data) < 10:
+            if total_training < 10:
                 flash('Minimal 10 data training dengan label manual diperlukan!', 'error')
                 return redirect(url_for('train_model'))
             
-            # Ekstrak texts dan labels (hanya manual labels)
-            texts = [abstract.abstract_text for abstract in training_data]
-            labels = [abstract.label for abstract in training_data]
-            
             print(f"\n{'='*60}")
             print(f"🎯 TRAINING WITH MANUAL LABELS ONLY")
             print(f"{'='*60}")
-            print(f"Total training data: {len(training_data)}")
+            print(f"Total training data: {total_training}")
             
             # Get K value dari form
             k_value = request.form.get('k_value', 5, type=int)
             
             # Initialize classifier
-            classifier = KNNClassifier(k=k_value)
+            classifier = create_classifier(k_value)
+            
+            def training_chunks():
+                # Pakai hasil preprocessing yang tersimpan, hitung ulang hanya yang baru/berubah
+                for chunk in iter_abstract_chunks(training_query, app.config['STREAM_CHUNK_SIZE']):
+                    labels = [abstract.label for abstract in chunk]
+                    ids = [abstract.id for abstract in chunk]
+                    texts = classifier.preprocessor.ensure_preprocessed(chunk)
+                    if db.session.dirty:
+                        keep_updated_at(chunk)
+                        db.session.commit()
+                    yield texts, labels, ids
             
             # Prepare data with STRATIFIED split (sudah ada di classifier.py)
-            data = classifier.prepare_data(
-                texts, labels,
+            data = classifier.prepare_data_stream(
+                training_chunks,
                 test_size=app.config['TEST_SIZE'],
-                random_state=app.config['RANDOM_STATE']
+                random_state=app.config['RANDOM_STATE'],
+                preprocessed=True
             )
             
-            # Train
-            classifier.train(data['X_train'], data['y_train'])
+            # Opsional: pilih k dari kurva cross-validation pada data training
+            k_search = None
+            if request.form.get('auto_k'):
+                k_search = classifier.find_optimal_k(
+                    data['X_train'], data['y_train'],
+                    k_range=range(1, app.config['K_SEARCH_MAX_K'] + 1),
+                    cv=app.config['K_SEARCH_CV_FOLDS'],
+                    n_jobs=app.config['K_SEARCH_N_JOBS'],
+                    random_state=app.config['RANDOM_STATE']
+                )
+                k_value = k_search['best_k']
+                classifier.set_k(k_value)
+            
+            # Opsional: k-fold CV dari corpus yang sudah di-preprocess (tanpa Sastrawi ulang)
+            cv_results = None
+            if request.form.get('cross_validate'):
+                cv_results = classifier.cross_validate_corpus(
+                    data['corpus'], data['labels'],
+                    cv=app.config['CV_FOLDS'],
+                    n_jobs=app.config['CV_N_JOBS'],
+                    random_state=app.config['RANDOM_STATE']
+                )
+            
+            # Train (raw count + ids disimpan untuk training incremental)
+            classifier.train(data['X_train'], data['y_train'],
+                             counts=data['C_train'], ids=data['ids_train'])
             
             # Evaluate
             evaluation = classifier.evaluate(data['X_test'], data['y_test'])
             
-            # Save model
-            classifier.save('models')
+            # Simpan sebagai versi baru; request yang sedang berjalan tetap
+            # memakai versi lama sampai selesai
+            version = publish_classifier(classifier)
+            save_stem_cache()
+            
+            # Semua data berlabel saat ini sudah masuk model
+            mark_processed('train', training_query, model_version(classifier))
             
             # Save metrics to database
             metrics = ModelMetrics(
@@ -446,12 +615,21 @@ def train_model():
                 f1_rpl=evaluation['f1_score'].get('RPL', 0),
                 f1_tkj=evaluation['f1_score'].get('TKJ', 0),
                 training_samples=len(data['y_train']),
-                test_samples=len(data['y_test'])
+                test_samples=len(data['y_test']),
+                k_curve=json.dumps(k_search['results']) if k_search else None,
+                cv_results=json.dumps(cv_results) if cv_results else None
             )
             db.session.add(metrics)
             db.session.commit()
             
-            flash(f'✅ Model trained successfully! Accuracy: {evaluation["accuracy"]:.2%}', 'success')
+            if k_search:
+                flash(f'K optimal = {k_value} (CV accuracy {k_search["best_accuracy"]:.2%}, '
+                      f'{k_search["n_splits"]} fold, {k_search["seconds"]:.1f} detik)', 'info')
+            if cv_results:
+                flash(f'{cv_results["n_splits"]}-fold CV accuracy {cv_results["accuracy"]:.2%} '
+                      f'(± {cv_results["std"]["accuracy"]:.2%}, {cv_results["seconds"]:.1f} detik)', 'info')
+            flash(f'✅ Model trained successfully! Accuracy: {evaluation["accuracy"]:.2%} '
+                  f'(versi {version})', 'success')
             
             return redirect(url_for('evaluation'))
             
@@ -476,10 +654,47 @@ def train_model():
                          total_data=total_data)
 
 
+@app.route('/api/train-incremental', methods=['POST'])
+def api_train_incremental():
+    """Tambahkan data yang baru dilabel ke model tanpa training ulang"""
+    if get_classifier() is None:
+        return jsonify({'error': 'Model belum di-train'}), 400
+    
+    try:
+        # partial_fit pada salinan versi aktif; model yang sedang melayani
+        # request tidak diubah sampai versi baru dipublikasikan
+        classifier = create_classifier(app.config['KNN_K_VALUE'])
+        model_registry.load(classifier)
+        
+        result = run_train_stage(
+            classifier,
+            chunk_size=app.config['STREAM_CHUNK_SIZE'],
+            drift_threshold=app.config['IDF_DRIFT_THRESHOLD']
+        )
+        
+        if result['added'] or result['replaced']:
+            result['version'] = publish_classifier(classifier)
+            save_stem_cache()
+        
+        return jsonify({
+            'success': True,
+            **result,
+            'message': f"Model updated: {result['added']} data baru, "
+                       f"{result['replaced']} label dikoreksi ({result['seconds']:.2f}s)"
+        })
+        
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/classify', methods=['GET', 'POST'])
 def classify():
     """Halaman untuk klasifikasi abstrak baru (Data Uji)"""
-    global classifier
+    version, classifier = model_handle.get_versioned()
     
     if classifier is None or not classifier.is_trained:
         flash('Model belum di-train! Silakan train model terlebih dahulu.', 'warning')
@@ -492,7 +707,9 @@ def classify():
         
         if text:
             try:
-                predicted_label, confidence = classifier.predict_single(text)
+                predicted_label, confidence = prediction_cache.get_or_compute(
+                    text, version, lambda: classifier.predict_single(text)
+                )
                 
                 # Simpan ke ClassificationHistory sebagai Data Uji
                 history = ClassificationHistory(
@@ -505,7 +722,10 @@ def classify():
                 db.session.commit()
                 
                 # Get important words for highlighting (increased to 20 for better coverage)
-                important_words = classifier.get_important_words(text, top_n=20)
+                important_words = prediction_cache.get_or_compute(
+                    text, version, lambda: classifier.get_important_words(text, top_n=20),
+                    kind='important_words'
+                )
                 
                 # Collect all keyword variations for JavaScript highlighting
                 all_variations = []
@@ -530,7 +750,7 @@ def classify():
 @app.route('/upload', methods=['POST'])
 def upload_file():
     """Upload dan klasifikasi file"""
-    global classifier
+    version, classifier = model_handle.get_versioned()
     
     if classifier is None or not classifier.is_trained:
         return jsonify({'error': 'Model belum di-train'}), 400
@@ -556,8 +776,10 @@ def upload_file():
             if not text:
                 return jsonify({'error': 'Could not extract text from file'}), 400
             
-            # Classify
-            predicted_label, confidence = classifier.predict_single(text)
+            # Classify (file yang sama diupload ulang diambil dari cache)
+            predicted_label, confidence = prediction_cache.get_or_compute(
+                text, version, lambda: classifier.predict_single(text)
+            )
             
             # Simpan ke ClassificationHistory sebagai Data Uji
             history = ClassificationHistory(
@@ -587,34 +809,48 @@ def upload_file():
 @app.route('/classify-all', methods=['POST'])
 def classify_all():
     """Klasifikasi semua abstrak yang belum diklasifikasi"""
-    global classifier
+    classifier = get_classifier()
     
     if classifier is None or not classifier.is_trained:
         return jsonify({'error': 'Model belum di-train'}), 400
     
     try:
-        # Ambil abstrak yang belum diklasifikasi
-        abstracts = Abstract.query.filter(Abstract.predicted_label.is_(None)).all()
+        # Abstrak yang belum diklasifikasi
+        unclassified_query = Abstract.query.filter(Abstract.predicted_label.is_(None))
         
-        if not abstracts:
+        if unclassified_query.count() == 0:
             return jsonify({'message': 'Tidak ada abstrak yang perlu diklasifikasi'})
         
-        # Klasifikasi batch
-        texts = [abstract.abstract_text for abstract in abstracts]
-        predictions = classifier.predict(texts)
-        probabilities = classifier.predict_proba(texts)
+        # Klasifikasi per chunk dan update database
+        classified = sum(classify_abstracts(classifier, unclassified_query).values())
         
-        # Update database
-        for i, abstract in enumerate(abstracts):
-            abstract.predicted_label = predictions[i]
-            abstract.confidence = float(probabilities[i].max())
+        return jsonify({
+            'success': True,
+            'classified': classified,
+            'message': f'Successfully classified {classified} abstracts'
+        })
         
-        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/process-new', methods=['POST'])
+def api_process_new():
+    """Proses hanya abstrak baru/berubah sejak run terakhir (pipeline incremental)"""
+    classifier = get_classifier()
+    
+    try:
+        summary = process_new_abstracts(
+            preprocessor=create_preprocessor() if classifier is None else None,
+            classifier=classifier,
+            chunk_size=app.config['STREAM_CHUNK_SIZE']
+        )
         
         return jsonify({
             'success': True,
-            'classified': len(abstracts),
-            'message': f'Successfully classified {len(abstracts)} abstracts'
+            'processed': summary,
+            'state': {stage: get_state(stage).to_dict() for stage in STAGES}
         })
         
     except Exception as e:
@@ -622,6 +858,34 @@ def classify_all():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/model/versions')
+def api_model_versions():
+    """Daftar versi model yang tersimpan dan versi yang aktif"""
+    return jsonify({
+        'current': model_registry.current_version(),
+        'serving': model_handle.version,
+        'versions': model_registry.versions()
+    })
+
+
+@app.route('/api/model/rollback', methods=['POST'])
+def api_model_rollback():
+    """Aktifkan versi model sebelumnya (atau versi tertentu lewat field 'version')"""
+    try:
+        version = model_registry.rollback(request.form.get('version') or None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Load di proses ini sekarang; proses lain mengikuti lewat pointer CURRENT
+    model_handle.refresh(wait=True)
+    
+    return jsonify({
+        'success': True,
+        'version': version,
+        'message': f'Model rolled back to version {version}'
+    })
+
+
 @app.route('/evaluation')
 def evaluation():
     """Halaman evaluasi model"""
@@ -631,9 +895,17 @@ def evaluation():
     # Ambil semua metrics untuk grafik perbandingan
     all_metrics = ModelMetrics.query.order_by(ModelMetrics.trained_at.desc()).limit(10).all()
     
+    # Kurva accuracy/F1 per k (jika training memakai pencarian k optimal)
+    k_curve = json.loads(latest_metrics.k_curve) if latest_metrics and latest_metrics.k_curve else None
+    
+    # Metrik per fold (jika training menjalankan cross-validation)
+    cv_results = json.loads(latest_metrics.cv_results) if latest_metrics and latest_metrics.cv_results else None
+    
     return render_template('evaluation.html', 
                          latest=latest_metrics,
-                         history=all_metrics)
+                         history=all_metrics,
+                         k_curve=k_curve,
+                         cv_results=cv_results)
 
 
 @app.route('/api/stats')
@@ -659,7 +931,8 @@ def api_stats():
         'year_distribution': [
             {'year': year, 'label': label, 'count': count}
             for year, label, count in year_distribution
-        ]
+        ],
+        'prediction_cache': prediction_cache.stats()
     })
 
 
@@ -674,12 +947,14 @@ def view_abstract(abstract_id):
 def before_first_request():
     """Initialize database dan classifier sebelum request pertama"""
     db.create_all()
+    upgrade_database()
     init_classifier()
 
 
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        upgrade_database()
         init_classifier()
     
     app.run(debug=True, host='0.0.0.0', port=5000)
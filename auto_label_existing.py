@@ -1,10 +1,16 @@
 """
 Script untuk auto-labeling data lama yang belum memiliki label
 Jalankan sekali untuk update semua data existing
+
+    python auto_label_existing.py                # semua data tanpa label
+    python auto_label_existing.py --incremental  # hanya data baru sejak run terakhir
 """
+import sys
+
 from app import app, db
 from models import Abstract
 from auto_labeler import auto_label_text
+from pipeline import run_auto_label_stage
 
 def auto_label_existing_data():
     """
@@ -79,6 +85,26 @@ def auto_label_existing_data():
         return True
 
 
+def auto_label_new_data():
+    """
+    Auto-label hanya data baru/berubah sejak run terakhir (high-water mark)
+    """
+    with app.app_context():
+        counts = run_auto_label_stage(
+            app.config['STREAM_CHUNK_SIZE'],
+            query=Abstract.query.filter(Abstract.label.is_(None))
+        )
+        total = sum(counts.values())
+        
+        if not total:
+            print("✅ Tidak ada data baru yang perlu di-label.")
+            return True
+        
+        print(f"\n✅ {total} data baru di-label: "
+              f"RPL={counts.get('RPL', 0)}, TKJ={counts.get('TKJ', 0)}")
+        return True
+
+
 def show_statistics():
     """
     Tampilkan statistik data setelah auto-labeling
@@ -103,6 +129,11 @@ def show_statistics():
 
 
 if __name__ == '__main__':
+    if '--incremental' in sys.argv[1:]:
+        auto_label_new_data()
+        show_statistics()
+        sys.exit(0)
+    
     print("\n" + "="*70)
     print("AUTO-LABEL EXISTING DATA SCRIPT")
     print("="*70)
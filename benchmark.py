@@ -0,0 +1,1021 @@
+"""
+Script benchmark untuk pipeline preprocessing dan klasifikasi
+
+Jalankan:
+    python benchmark.py                # semua benchmark
+    python benchmark.py stem_cache     # benchmark tertentu
+
+Corpus diambil dari tabel abstracts jika database tersedia, jika tidak
+dibuat corpus sintetis dari kalimat-kalimat abstrak contoh.
+"""
+import json
+import random
+import re
+import string
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+
+SAMPLE_SENTENCES = [
+    "Penelitian ini bertujuan untuk mengembangkan sistem informasi akademik berbasis web menggunakan framework Laravel.",
+    "Pengujian black box dan usability testing menunjukkan aplikasi dapat berfungsi dengan baik.",
+    "Implementasi routing OSPF dan BGP pada jaringan kampus menggunakan router Mikrotik.",
+    "Hasil pengujian QoS menunjukkan throughput 95 Mbps dengan latency 12 ms dan jitter yang rendah.",
+    "Metode pengembangan yang digunakan adalah waterfall dengan tahapan analisis, desain, implementasi dan pengujian.",
+    "Monitoring bandwidth jaringan wireless dilakukan menggunakan Wireshark pada topologi mesh.",
+    "Aplikasi mobile dikembangkan dengan Flutter dan basis data Firebase untuk membantu mahasiswa.",
+    "Keamanan jaringan ditingkatkan dengan konfigurasi firewall dan VPN pada server kantor.",
+    "Media pembelajaran interaktif dirancang untuk meningkatkan hasil belajar siswa SMK.",
+    "Sistem monitoring berbasis IoT menggunakan ESP32 dan protokol MQTT untuk mengirim data sensor.",
+    "Klasifikasi dokumen dilakukan dengan algoritma K-Nearest Neighbor dan pembobotan TF-IDF.",
+    "Kuesioner SUS diberikan kepada 30 responden, lihat https://example.com/survey atau hubungi admin@example.com.",
+]
+
+
+def load_corpus(n_docs: int = 500, seed: int = 42) -> List[str]:
+    """
+    Ambil corpus abstrak untuk benchmark
+
+    Args:
+        n_docs: Jumlah dokumen
+        seed: Random seed untuk corpus sintetis
+    """
+    try:
+        from app import app
+        from models import Abstract
+
+        with app.app_context():
+            texts = [a.abstract_text for a in Abstract.query.limit(n_docs).all()]
+        if texts:
+            return texts
+    except Exception:
+        pass
+
+    rng = random.Random(seed)
+    return [
+        ' '.join(rng.choice(SAMPLE_SENTENCES) for _ in range(rng.randint(6, 12)))
+        for _ in range(n_docs)
+    ]
+
+
+def load_labeled_corpus(n_docs: int = 500, seed: int = 42) -> Tuple[List[str], List[str]]:
+    """
+    Ambil corpus abstrak berlabel (RPL/TKJ) untuk benchmark akurasi
+    
+    Corpus sintetis: kalimat jaringan/IoT/QoS untuk TKJ, sisanya RPL.
+    """
+    try:
+        from app import app
+        from models import Abstract
+        
+        with app.app_context():
+            rows = Abstract.query.filter(Abstract.label.isnot(None)).limit(n_docs).all()
+            texts, labels = [a.abstract_text for a in rows], [a.label for a in rows]
+        if len(set(labels)) > 1:
+            return texts, labels
+    except Exception:
+        pass
+    
+    network_words = ('jaringan', 'routing', 'iot', 'qos')
+    tkj = [s for s in SAMPLE_SENTENCES if any(w in s.lower() for w in network_words)]
+    rpl = [s for s in SAMPLE_SENTENCES if s not in tkj]
+    
+    rng = random.Random(seed)
+    texts, labels = [], []
+    for i in range(n_docs):
+        label = 'TKJ' if i % 2 else 'RPL'
+        own, other = (tkj, rpl) if label == 'TKJ' else (rpl, tkj)
+        # Sebagian besar kalimat dari kelasnya sendiri, sedikit noise dari kelas lain
+        sentences = [rng.choice(own if rng.random() < 0.75 else other)
+                     for _ in range(rng.randint(4, 8))]
+        texts.append(' '.join(sentences))
+        labels.append(label)
+    return texts, labels
+
+
+def timeit(func: Callable, repeat: int = 3) -> float:
+    """
+    Jalankan func beberapa kali dan kembalikan waktu terbaik (detik)
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def legacy_clean_text(text: str) -> str:
+    """
+    Implementasi clean_text lama (rangkaian re.sub) sebagai pembanding
+    """
+    if not text:
+        return ""
+    text = text.lower()
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\S+@\S+', '', text)
+    text = re.sub(r'\d+', '', text)
+    text = text.translate(str.maketrans('', '', string.punctuation))
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def legacy_variations(text: str, top_words, stemmer) -> list:
+    """
+    Pencocokan stem -> kata asli lama di get_important_words (stem setiap
+    kata sekali untuk setiap top feature) sebagai pembanding
+    """
+    words_in_text = re.findall(r'\b\w+\b', text.lower())
+    result = []
+    for stemmed_word, _ in top_words:
+        variations = []
+        for word in words_in_text:
+            if stemmer.stem(word) == stemmed_word and word not in variations:
+                variations.append(word)
+        variations.sort(key=len, reverse=True)
+        result.append(variations)
+    return result
+
+
+def bench_stem_cache(n_docs: int = 300):
+    """
+    Bandingkan preprocessing corpus tanpa cache vs dengan cache stemming
+    """
+    from preprocessing import TextPreprocessor, StemCache
+
+    corpus = load_corpus(n_docs)
+
+    class _NoCache(StemCache):
+        def stem(self, word, stemmer):
+            return stemmer.stem(word)
+
+    cold = TextPreprocessor(stem_cache=_NoCache())
+    warm = TextPreprocessor(stem_cache=StemCache())
+
+    t_cold = timeit(lambda: cold.batch_preprocess(corpus), repeat=1)
+    # Run pertama mengisi cache, run berikutnya mengukur kondisi hangat
+    warm.batch_preprocess(corpus)
+    t_warm = timeit(lambda: warm.batch_preprocess(corpus))
+
+    print(f"Stem cache ({len(corpus)} docs)")
+    print(f"   Tanpa cache : {t_cold:.3f}s")
+    print(f"   Cache hangat: {t_warm:.3f}s ({t_cold / t_warm:.1f}x)")
+    print(f"   Stats       : {warm.stem_cache.stats()}")
+
+
+def bench_clean_text(n_docs: int = 2000):
+    """
+    Bandingkan throughput clean_text lama vs normalizer baru
+    """
+    from preprocessing import TextPreprocessor
+
+    corpus = load_corpus(n_docs)
+    preprocessor = TextPreprocessor()
+    n_chars = sum(len(text) for text in corpus)
+
+    assert all(legacy_clean_text(t) == preprocessor.clean_text(t) for t in corpus)
+
+    t_old = timeit(lambda: [legacy_clean_text(t) for t in corpus])
+    t_new = timeit(lambda: [preprocessor.clean_text(t) for t in corpus])
+
+    print(f"clean_text ({len(corpus)} docs, {n_chars / 1e6:.1f}M chars)")
+    print(f"   Lama: {t_old:.3f}s ({n_chars / t_old / 1e6:.1f}M chars/s)")
+    print(f"   Baru: {t_new:.3f}s ({n_chars / t_new / 1e6:.1f}M chars/s, {t_old / t_new:.1f}x)")
+
+
+def bench_parallel_batch(n_docs: int = 2000):
+    """
+    Bandingkan batch_preprocess_to_text serial vs process pool (cache dingin)
+    """
+    import os
+    from preprocessing import TextPreprocessor, StemCache
+
+    corpus = load_corpus(n_docs)
+    n_jobs = os.cpu_count() or 1
+
+    serial = TextPreprocessor(stem_cache=StemCache(), n_jobs=1)
+    t_serial = timeit(lambda: serial.batch_preprocess_to_text(corpus), repeat=1)
+
+    parallel = TextPreprocessor(stem_cache=StemCache(), n_jobs=n_jobs)
+    t_parallel = timeit(lambda: parallel.batch_preprocess_to_text(corpus), repeat=1)
+
+    print(f"Parallel batch ({len(corpus)} docs, {n_jobs} workers)")
+    print(f"   Serial  : {t_serial:.3f}s")
+    print(f"   Parallel: {t_parallel:.3f}s ({t_serial / t_parallel:.1f}x)")
+
+
+def bench_token_table(n_docs: int = 1000):
+    """
+    Biaya per dokumen: stopwords list (lama) vs frozenset vs tabel token
+    """
+    from preprocessing import TextPreprocessor
+
+    corpus = load_corpus(n_docs)
+    plain = TextPreprocessor()
+    table = TextPreprocessor(use_token_table=True)
+    stopword_list = list(plain.stopwords)
+
+    def legacy_preprocess(text):
+        tokens = [t for t in plain.clean_text(text).split() if len(t) >= 3]
+        tokens = [t for t in tokens if t not in stopword_list]
+        tokens = [plain.stem_cache.stem(t, plain.stemmer) for t in tokens]
+        return [t for t in tokens if t]
+
+    # Isi cache stemming dan tabel token terlebih dahulu
+    for text in corpus:
+        assert table.preprocess(text) == legacy_preprocess(text)
+
+    t_list = timeit(lambda: [legacy_preprocess(t) for t in corpus])
+    t_set = timeit(lambda: [plain.preprocess(t) for t in corpus])
+    t_table = timeit(lambda: [table.preprocess(t) for t in corpus])
+
+    print(f"Stopword/token table ({len(corpus)} docs, {len(stopword_list)} stopwords)")
+    print(f"   List stopwords : {t_list / len(corpus) * 1e6:8.1f} us/doc")
+    print(f"   Frozenset      : {t_set / len(corpus) * 1e6:8.1f} us/doc ({t_list / t_set:.1f}x)")
+    print(f"   Tabel token    : {t_table / len(corpus) * 1e6:8.1f} us/doc ({t_list / t_table:.1f}x)")
+
+
+def bench_fused_preprocess(n_docs: int = 1000):
+    """
+    preprocess empat pass (tokenize/stopwords/stem/filter) vs fast path satu loop
+    """
+    from preprocessing import TextPreprocessor
+
+    corpus = load_corpus(n_docs)
+    preprocessor = TextPreprocessor()
+
+    def four_pass(text):
+        tokens = preprocessor.stem_tokens(
+            preprocessor.remove_stopwords(preprocessor.tokenize(text))
+        )
+        return ' '.join([token for token in tokens if token])
+
+    # Isi cache stemming terlebih dahulu
+    for text in corpus:
+        assert preprocessor.preprocess_to_text(text) == four_pass(text)
+
+    t_old = timeit(lambda: [four_pass(t) for t in corpus])
+    t_new = timeit(lambda: [preprocessor.preprocess_to_text(t) for t in corpus])
+
+    print(f"preprocess_to_text ({len(corpus)} docs, cache hangat)")
+    print(f"   Empat pass : {t_old / len(corpus) * 1e6:8.1f} us/doc")
+    print(f"   Satu loop  : {t_new / len(corpus) * 1e6:8.1f} us/doc ({t_old / t_new:.1f}x)")
+
+
+def bench_token_corpus(n_docs: int = 2000):
+    """
+    TF-IDF dari list of strings vs dari TokenCorpus (token ID dalam array)
+    """
+    from feature_extraction import FeatureExtractor
+    from preprocessing import TextPreprocessor
+
+    corpus = load_corpus(n_docs)
+    preprocessor = TextPreprocessor()
+    texts = preprocessor.batch_preprocess_to_text(corpus)
+    token_corpus = preprocessor.batch_preprocess_to_corpus(texts, preprocessed=True)
+
+    # Ukuran list of strings: objek str + pointer list
+    text_bytes = sum(sys.getsizeof(text) for text in texts) + sys.getsizeof(texts)
+
+    by_string = FeatureExtractor()
+    by_corpus = FeatureExtractor()
+    t_fit_str = timeit(lambda: by_string.fit_transform(texts))
+    t_fit_ids = timeit(lambda: by_corpus.fit_transform_corpus(token_corpus))
+
+    query = preprocessor.batch_preprocess_to_corpus(
+        texts, vocabulary=by_corpus.token_vocabulary, grow=False, preprocessed=True
+    )
+    t_tr_str = timeit(lambda: by_string.transform(texts))
+    t_tr_ids = timeit(lambda: by_corpus.transform_corpus(query))
+
+    print(f"Token corpus ({len(texts)} docs, {len(token_corpus.ids)} tokens)")
+    print(f"   Memori list[str]   : {text_bytes / 1024:8.0f} KB")
+    print(f"   Memori TokenCorpus : {token_corpus.nbytes() / 1024:8.0f} KB "
+          f"({text_bytes / token_corpus.nbytes():.1f}x lebih kecil)")
+    print(f"   fit_transform      : {t_fit_str:.3f}s -> {t_fit_ids:.3f}s ({t_fit_str / t_fit_ids:.1f}x)")
+    print(f"   transform          : {t_tr_str:.3f}s -> {t_tr_ids:.3f}s ({t_tr_str / t_tr_ids:.1f}x)")
+
+
+def bench_hashing(n_docs: int = 2000):
+    """
+    FeatureExtractor (vocabulary TF-IDF) vs HashingFeatureExtractor (IDF online)
+    """
+    import os
+    import tempfile
+    from classifier import KNNClassifier
+    from preprocessing import TextPreprocessor
+    
+    texts, labels = load_labeled_corpus(n_docs)
+    preprocessor = TextPreprocessor()
+    texts = preprocessor.batch_preprocess_to_text(texts)
+    n_new = max(1, len(texts) // 20)
+    
+    print(f"Feature backend ({len(texts)} docs, update {n_new} docs baru)")
+    print(f"   {'backend':<9}{'fit':>9}{'predict':>10}{'update':>10}{'file':>10}{'load':>9}{'acc':>8}")
+    
+    for backend in ['tfidf', 'hashing']:
+        knn = KNNClassifier(k=5, preprocessor=preprocessor, feature_backend=backend)
+        
+        start = time.perf_counter()
+        data = knn.prepare_data(texts, labels, preprocessed=True)
+        knn.train(data['X_train'], data['y_train'])
+        t_fit = time.perf_counter() - start
+        
+        accuracy = knn.evaluate(data['X_test'], data['y_test'])['accuracy']
+        t_predict = timeit(lambda: knn.predict(texts[:200], preprocessed=True))
+        
+        # Menambah dokumen baru: tfidf harus refit, hashing cukup partial_fit
+        extractor = knn.feature_extractor
+        if backend == 'hashing':
+            t_update = timeit(lambda: extractor.partial_fit(texts[:n_new]), repeat=1)
+        else:
+            t_update = timeit(lambda: extractor.fit(texts + texts[:n_new]), repeat=1)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = knn._vectorizer_path(tmp, backend)
+            extractor.save(path)
+            size = os.path.getsize(path)
+            t_load = timeit(lambda: knn._create_feature_extractor(backend).load(path))
+        
+        print(f"   {backend:<9}{t_fit:>8.3f}s{t_predict:>9.3f}s{t_update:>9.3f}s"
+              f"{size / 1024:>8.1f}KB{t_load:>8.3f}s{accuracy:>8.2%}")
+
+
+def bench_partial_fit(n_docs: int = 3000, n_new: int = 50):
+    """
+    Training ulang penuh vs partial_fit untuk beberapa data berlabel baru
+    """
+    from classifier import KNNClassifier
+    from preprocessing import TextPreprocessor, StemCache
+    
+    texts, labels = load_labeled_corpus(n_docs + n_new)
+    
+    def full_retrain():
+        # Kondisi /train lama: preprocessing ulang semua teks lalu fit
+        knn = KNNClassifier(k=5, preprocessor=TextPreprocessor(stem_cache=StemCache()))
+        data = knn.prepare_data(texts, labels)
+        knn.train(data['X_train'], data['y_train'], counts=data['C_train'])
+        return knn
+    
+    t_full = timeit(full_retrain, repeat=1)
+    
+    knn = KNNClassifier(k=5, preprocessor=TextPreprocessor())
+    data = knn.prepare_data(texts[:n_docs], labels[:n_docs])
+    knn.train(data['X_train'], data['y_train'], counts=data['C_train'])
+    
+    start = time.perf_counter()
+    result = knn.partial_fit(texts[n_docs:], labels[n_docs:], drift_threshold=float('inf'))
+    t_append = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    knn.partial_fit(texts[n_docs:], labels[n_docs:], drift_threshold=0.0)
+    t_rebuild = time.perf_counter() - start
+    
+    print(f"Partial fit ({n_docs} docs + {n_new} docs baru)")
+    print(f"   Training ulang penuh   : {t_full:.3f}s")
+    print(f"   partial_fit (append)   : {t_append:.3f}s ({t_full / t_append:.0f}x), "
+          f"drift IDF {result['idf_drift']:.4f}")
+    print(f"   partial_fit (rebuild)  : {t_rebuild:.3f}s ({t_full / t_rebuild:.0f}x)")
+
+
+def bench_knn_engine(sizes=(1000, 5000, 20000), n_queries: int = 500, n_features: int = 1000):
+    """
+    KNeighborsClassifier (predict + predict_proba) vs SparseKNNIndex
+    (satu kali pencarian tetangga) untuk beberapa ukuran corpus
+    """
+    import numpy as np
+    import scipy.sparse as sp
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.preprocessing import normalize
+    from knn_index import SparseKNNIndex
+    
+    rng = np.random.RandomState(42)
+    # Kepadatan mirip TF-IDF abstrak (~30 dari 1000 fitur per dokumen)
+    queries = normalize(sp.random(n_queries, n_features, density=0.03, format='csr',
+                                  random_state=rng))
+    
+    print(f"KNN engine ({n_queries} query, {n_features} fitur, k=5)")
+    print(f"   {'n_train':>8}{'sklearn':>10}{'sparse-dot':>12}{'speedup':>9}{'sama':>6}")
+    
+    for n_train in sizes:
+        X = normalize(sp.random(n_train, n_features, density=0.03, format='csr',
+                                random_state=rng))
+        y = rng.choice(['RPL', 'TKJ'], size=n_train)
+        
+        sklearn_knn = KNeighborsClassifier(n_neighbors=5, metric='cosine',
+                                           weights='distance').fit(X, y)
+        index = SparseKNNIndex(n_neighbors=5).fit(X, y)
+        
+        t_sklearn = timeit(lambda: (sklearn_knn.predict(queries),
+                                    sklearn_knn.predict_proba(queries)))
+        t_index = timeit(lambda: index.predict_with_proba(queries))
+        
+        same = np.array_equal(index.predict_proba(queries), sklearn_knn.predict_proba(queries))
+        print(f"   {n_train:>8}{t_sklearn:>9.3f}s{t_index:>11.3f}s{t_sklearn / t_index:>8.1f}x"
+              f"{'ya' if same else 'TIDAK':>6}")
+
+
+def bench_ann_index(sizes=(20000, 100000), n_queries: int = 500, n_features: int = 1000,
+                    settings=((8, 12), (16, 12), (16, 14), (32, 14))):
+    """
+    Recall@k dan latency RandomProjectionIndex (LSH) vs pencarian eksak
+    
+    Corpus sintetis berkelompok (topik + noise) agar tetangga terdekat
+    bermakna; settings berisi pasangan (n_tables, n_bits).
+    """
+    import numpy as np
+    import scipy.sparse as sp
+    from sklearn.preprocessing import normalize
+    from knn_index import RandomProjectionIndex, SparseKNNIndex, recall_at_k
+    
+    rng = np.random.RandomState(42)
+    n_topics = 200
+    topics = normalize(sp.random(n_topics, n_features, density=0.03, random_state=rng))
+    
+    def documents(n):
+        topic = rng.randint(0, n_topics, n)
+        noise = sp.random(n, n_features, density=0.01, random_state=rng)
+        return normalize(sp.csr_matrix(topics[topic] + noise)), topic % 2
+    
+    for n_train in sizes:
+        X, y = documents(n_train)
+        queries, _ = documents(n_queries)
+        expected = SparseKNNIndex(n_neighbors=5).fit(X, y).predict(queries)
+        
+        print(f"LSH vs eksak ({n_train} docs, {n_queries} query, k=5)")
+        print(f"   {'tabel':>6}{'bit':>5}{'fit':>8}{'recall@5':>10}{'kandidat':>10}"
+              f"{'eksak':>9}{'lsh':>9}{'label sama':>12}")
+        
+        for n_tables, n_bits in settings:
+            start = time.perf_counter()
+            index = RandomProjectionIndex(n_neighbors=5, n_tables=n_tables, n_bits=n_bits).fit(X, y)
+            t_fit = time.perf_counter() - start
+            
+            report = recall_at_k(index, queries)
+            agreement = np.mean(index.predict(queries) == expected)
+            print(f"   {n_tables:>6}{n_bits:>5}{t_fit:>7.2f}s{report['recall']:>10.3f}"
+                  f"{report['mean_candidates']:>10.0f}{report['exact_seconds']:>8.3f}s"
+                  f"{report['index_seconds']:>8.3f}s{agreement:>12.1%}")
+
+
+def bench_optimal_k(n_docs: int = 3000, k_max: int = 20):
+    """
+    find_optimal_k lama (fit + predict per k) vs satu query k terbesar
+    """
+    from sklearn.metrics import accuracy_score
+    from sklearn.neighbors import KNeighborsClassifier
+    from classifier import KNNClassifier
+    from preprocessing import TextPreprocessor
+    
+    texts, labels = load_labeled_corpus(n_docs)
+    knn = KNNClassifier(k=5, preprocessor=TextPreprocessor())
+    data = knn.prepare_data(texts, labels)
+    X_train, y_train, X_test, y_test = (data['X_train'], data['y_train'],
+                                        data['X_test'], data['y_test'])
+    
+    def per_k_loop():
+        # Cara lama: satu KNeighborsClassifier baru per k
+        for k in range(1, k_max + 1):
+            clf = KNeighborsClassifier(n_neighbors=k, metric='cosine', weights='distance')
+            accuracy_score(y_test, clf.fit(X_train, y_train).predict(X_test))
+    
+    t_loop = timeit(per_k_loop, repeat=1)
+    t_single = timeit(lambda: knn.find_optimal_k(X_train, y_train, X_test, y_test,
+                                                 k_range=range(1, k_max + 1)), repeat=1)
+    t_cv = timeit(lambda: knn.find_optimal_k(X_train, y_train, k_range=range(1, k_max + 1),
+                                             cv=5), repeat=1)
+    
+    print(f"Optimal k ({len(y_train)} train, {len(y_test)} test, k=1..{k_max})")
+    print(f"   Fit + predict per k      : {t_loop:.3f}s")
+    print(f"   Satu query k={k_max} (holdout): {t_single:.3f}s ({t_loop / t_single:.1f}x)")
+    print(f"   5-fold CV, fold paralel  : {t_cv:.3f}s")
+
+
+def bench_cross_validation(n_docs: int = 2000, cv: int = 5):
+    """
+    CV tanpa kebocoran IDF: preprocessing ulang per fold vs corpus yang di-cache
+    """
+    import numpy as np
+    from sklearn.model_selection import StratifiedKFold
+    from classifier import KNNClassifier
+    from preprocessing import TextPreprocessor, StemCache, preload_resources
+    
+    texts, labels = load_labeled_corpus(n_docs)
+    y = np.asarray(labels)
+    # Cache internal Sastrawi dipakai bersama; isi dulu agar kedua cara sama-sama hangat
+    preload_resources()
+    TextPreprocessor(stem_cache=StemCache()).batch_preprocess_to_text(texts)
+    
+    def per_fold_preprocessing():
+        # Cara lama yang benar: Sastrawi + TF-IDF dari awal untuk setiap fold
+        folds = StratifiedKFold(n_splits=cv, shuffle=True, random_state=42)
+        for fit, held_out in folds.split(np.zeros(len(y)), y):
+            knn = KNNClassifier(k=5, preprocessor=TextPreprocessor(stem_cache=StemCache()))
+            corpus = knn.preprocessor.batch_preprocess_to_corpus([texts[i] for i in fit])
+            counts = knn.feature_extractor.fit_counts_corpus(corpus)
+            knn.train(knn.feature_extractor.weight_counts(counts), y[fit])
+            knn.predict([texts[i] for i in held_out])
+    
+    t_old = timeit(per_fold_preprocessing, repeat=1)
+    
+    knn = KNNClassifier(k=5, preprocessor=TextPreprocessor(stem_cache=StemCache()))
+    results = knn.cross_validate_texts(texts, labels, cv=cv)
+    
+    print(f"Cross-validation ({len(texts)} docs, {cv} fold)")
+    print(f"   Preprocessing per fold   : {t_old:.3f}s")
+    print(f"   Preprocessing sekali     : {results['seconds']:.3f}s ({t_old / results['seconds']:.1f}x), "
+          f"preprocess {results['preprocess_seconds']:.3f}s")
+    print(f"   Accuracy per fold        : "
+          f"{' '.join(f'{score:.3f}' for score in results['cv_scores'])} "
+          f"(mean {results['accuracy']:.3f} +/- {results['std']['accuracy']:.3f})")
+
+
+def bench_important_words(n_docs: int = 1000, top_n: int = 20):
+    """
+    get_important_words: stem per kata per top feature (lama) vs peta stem sekali
+    """
+    from classifier import KNNClassifier
+    from preprocessing import TextPreprocessor
+    
+    texts, labels = load_labeled_corpus(n_docs)
+    knn = KNNClassifier(k=5, preprocessor=TextPreprocessor())
+    data = knn.prepare_data(texts, labels)
+    knn.train(data['X_train'], data['y_train'])
+    queries = texts[:50]
+    stemmer = knn.preprocessor.stemmer
+    
+    def legacy():
+        for text in queries:
+            preprocessed_text = knn.preprocessor.preprocess_to_text(text)
+            vector = knn.feature_extractor.transform([preprocessed_text]).toarray().flatten()
+            top = [(knn.feature_extractor.feature_names[i], vector[i])
+                   for i in vector.argsort()[-top_n:][::-1] if vector[i] > 0]
+            legacy_variations(text, top, stemmer)
+    
+    for text in queries:
+        important = knn.get_important_words(text, top_n=top_n)
+        expected = legacy_variations(text, important['words'], stemmer)
+        assert [word['variations'] for word in important['original_words']] == expected
+    
+    n_words = sum(len(re.findall(r'\b\w+\b', text)) for text in queries) / len(queries)
+    t_old = timeit(legacy)
+    t_new = timeit(lambda: [knn.get_important_words(text, top_n=top_n) for text in queries])
+    
+    print(f"get_important_words ({len(queries)} teks, ~{n_words:.0f} kata/teks, top_n={top_n})")
+    print(f"   Stem per top feature : {t_old / len(queries) * 1e3:7.2f} ms/teks")
+    print(f"   Peta stem sekali     : {t_new / len(queries) * 1e3:7.2f} ms/teks ({t_old / t_new:.1f}x)")
+
+
+def bench_model_swap(n_docs: int = 3000, n_queries: int = 200):
+    """
+    Latensi request selama model baru di-load: load sinkron vs hot-swap background
+    """
+    import tempfile
+    import threading
+    import numpy as np
+    from classifier import KNNClassifier
+    from model_registry import ModelHandle, ModelRegistry
+    from preprocessing import TextPreprocessor
+    
+    texts, labels = load_labeled_corpus(n_docs)
+    knn = KNNClassifier(k=5, preprocessor=TextPreprocessor())
+    data = knn.prepare_data(texts, labels)
+    knn.train(data['X_train'], data['y_train'], counts=data['C_train'])
+    factory = lambda: KNNClassifier(k=5, preprocessor=knn.preprocessor)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = ModelRegistry(tmp)
+        registry.publish(knn)
+        handle = ModelHandle(registry, factory, check_interval=0.0)
+        handle.get()
+        
+        def request_latencies(swap: Callable) -> np.ndarray:
+            latencies = []
+            swapper = threading.Thread(target=swap)
+            swapper.start()
+            while swapper.is_alive() or len(latencies) < n_queries:
+                start = time.perf_counter()
+                handle.get()
+                latencies.append(time.perf_counter() - start)
+            swapper.join()
+            return np.array(latencies) * 1e3
+        
+        def reload_blocking():
+            # Cara lama: load model di jalur request
+            registry.publish(knn)
+            with handle._lock:
+                handle._load(registry.current_version(), registry.pointer_stamp())
+        
+        t_load = timeit(lambda: registry.load(factory()), repeat=1)
+        blocking = request_latencies(reload_blocking)
+        swapped = request_latencies(lambda: (registry.publish(knn), handle.refresh(wait=True)))
+    
+    print(f"Model swap ({n_docs} dokumen, load model {t_load * 1e3:.0f} ms)")
+    print(f"   Load di jalur request : p50 {np.median(blocking):6.3f} ms, max {blocking.max():7.1f} ms")
+    print(f"   Hot-swap background   : p50 {np.median(swapped):6.3f} ms, max {swapped.max():7.1f} ms")
+
+
+def bench_dtype(n_docs: int = 10000, n_queries: int = 500):
+    """
+    Matrix TF-IDF dan index KNN: float64 vs float32 (memori dan latensi query)
+    """
+    import numpy as np
+    from classifier import KNNClassifier
+    from preprocessing import TextPreprocessor
+    
+    texts, labels = load_labeled_corpus(n_docs)
+    preprocessor = TextPreprocessor()
+    preprocessed = preprocessor.batch_preprocess_to_text(texts)
+    
+    def nbytes(X) -> int:
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    
+    results = {}
+    for dtype in (np.float64, np.float32):
+        for backend in ('tfidf', 'hashing'):
+            knn = KNNClassifier(k=5, preprocessor=preprocessor, feature_backend=backend,
+                                dtype=dtype)
+            data = knn.prepare_data(preprocessed, labels, preprocessed=True)
+            knn.train(data['X_train'], data['y_train'], counts=data['C_train'])
+            queries = knn.transform(preprocessed[:n_queries], preprocessed=True)
+            
+            memory = nbytes(knn.index._fit_X) + nbytes(knn.train_counts)
+            t_query = timeit(lambda: knn.predict_matrix(queries), repeat=7)
+            results[backend, np.dtype(dtype).name] = (memory, t_query, knn.predict_matrix(queries)[0])
+    
+    print(f"dtype TF-IDF/KNN ({n_docs} dokumen, {n_queries} query)")
+    print(f"   {'backend':<9}{'dtype':<9}{'memori':>10}{'query':>12}{'label sama':>12}")
+    for backend in ('tfidf', 'hashing'):
+        baseline = results[backend, 'float64'][2]
+        for name in ('float64', 'float32'):
+            memory, t_query, predictions = results[backend, name]
+            print(f"   {backend:<9}{name:<9}{memory / 2 ** 20:>7.1f} MB{t_query * 1e3:>9.1f} ms"
+                  f"{np.mean(predictions == baseline):>11.2%}")
+
+
+def bench_similarity_graph(sizes=(5000, 20000, 50000), n_features: int = 1000, k: int = 10,
+                           n_jobs: int = -1):
+    """
+    Similarity antar semua dokumen: matrix dense (cosine_similarity_matrix)
+    vs graph top-k per blok (similarity_graph)
+    """
+    import numpy as np
+    import scipy.sparse as sp
+    from sklearn.preprocessing import normalize
+    from feature_extraction import SimilarityCalculator
+    
+    rng = np.random.RandomState(42)
+    
+    print(f"Similarity antar dokumen ({n_features} fitur, top-{k}, float32, n_jobs={n_jobs})")
+    print(f"   {'n_docs':>8}{'dense':>10}{'mem dense':>12}{'graph':>10}{'mem graph':>12}{'sama':>6}")
+    for n_docs in sizes:
+        X = normalize(sp.random(n_docs, n_features, density=0.03, format='csr',
+                                random_state=rng, dtype=np.float32))
+        
+        start = time.perf_counter()
+        graph = SimilarityCalculator.similarity_graph(X, k=k, n_jobs=n_jobs)
+        t_graph = time.perf_counter() - start
+        graph_mb = (graph.data.nbytes + graph.indices.nbytes + graph.indptr.nbytes) / 2 ** 20
+        dense_mb = n_docs * n_docs * X.dtype.itemsize / 2 ** 20
+        
+        # Matrix dense hanya dibuat jika muat di memori
+        if n_docs <= 5000:
+            start = time.perf_counter()
+            dense = SimilarityCalculator.cosine_similarity_matrix(X)
+            t_dense = time.perf_counter() - start
+            np.fill_diagonal(dense, -np.inf)
+            expected = -np.sort(-dense, axis=1)[:, :k]
+            same = np.allclose(np.sort(graph.toarray(), axis=1)[:, ::-1][:, :k],
+                               np.where(expected > 0, expected, 0), atol=1e-6)
+            dense_time, same = f"{t_dense:>9.2f}s", 'ya' if same else 'TIDAK'
+        else:
+            dense_time, same = f"{'-':>10}", '-'
+        print(f"   {n_docs:>8}{dense_time}{dense_mb:>9.0f} MB{t_graph:>9.2f}s{graph_mb:>9.1f} MB{same:>6}")
+
+
+def bench_top_k(n_docs: int = 2000, n_rows: int = 200, top_n: int = 20,
+                n_train: int = 20000, n_queries: int = 100, k: int = 10):
+    """
+    Top-N fitur (get_top_features) dan find_k_nearest: sort penuh vs
+    partial selection, per query vs batch
+    """
+    import numpy as np
+    import scipy.sparse as sp
+    from sklearn.metrics.pairwise import cosine_similarity
+    from sklearn.preprocessing import normalize
+    from feature_extraction import FeatureExtractor, HashingFeatureExtractor, SimilarityCalculator
+    from preprocessing import TextPreprocessor
+    
+    texts, _ = load_labeled_corpus(n_docs)
+    preprocessed = TextPreprocessor().batch_preprocess_to_text(texts)
+    
+    def names(extractor):
+        if isinstance(extractor, HashingFeatureExtractor):
+            return lambda column: f'#{column}'
+        return lambda column: extractor.feature_names[column]
+    
+    def dense_argsort(extractor, row):
+        # Versi awal: densify lalu argsort semua fitur
+        vector = row.toarray().ravel()
+        name = names(extractor)
+        return [(name(i), vector[i]) for i in vector.argsort()[-top_n:][::-1] if vector[i] > 0]
+    
+    def sort_nonzero(extractor, row):
+        # Sort semua entri non-zero
+        order = np.lexsort((row.indices, -row.data))[:top_n]
+        name = names(extractor)
+        return [(name(row.indices[i]), row.data[i]) for i in order if row.data[i] > 0]
+    
+    print(f"get_top_features ({n_rows} baris, top_n={top_n})")
+    print(f"   {'extractor':<10}{'nnz/baris':>10}{'densify':>10}{'sort nnz':>10}"
+          f"{'partial':>10}{'batch':>10}  (us/baris)")
+    for name, extractor in (('tfidf', FeatureExtractor(max_features=20000)),
+                            ('hashing', HashingFeatureExtractor())):
+        X = extractor.fit_transform(preprocessed)[:n_rows].tocsr()
+        rows = [X[i] for i in range(n_rows)]
+        
+        timings = [
+            timeit(lambda: [dense_argsort(extractor, row) for row in rows]),
+            timeit(lambda: [sort_nonzero(extractor, row) for row in rows]),
+            timeit(lambda: [extractor.get_top_features(row, top_n) for row in rows]),
+            timeit(lambda: extractor.get_top_features_batch(X, top_n)),
+        ]
+        print(f"   {name:<10}{X.nnz / n_rows:>10.0f}"
+              + ''.join(f"{t / n_rows * 1e6:>10.1f}" for t in timings))
+    
+    rng = np.random.RandomState(42)
+    documents = normalize(sp.random(n_train, 1000, density=0.03, format='csr', random_state=rng))
+    queries = normalize(sp.random(n_queries, 1000, density=0.03, format='csr', random_state=rng))
+    
+    def argsort_nearest(query):
+        # Versi awal: argsort semua similarity
+        similarities = cosine_similarity(query, documents)[0]
+        return similarities.argsort()[-k:][::-1]
+    
+    query_rows = [queries[i] for i in range(n_queries)]
+    t_argsort = timeit(lambda: [argsort_nearest(q) for q in query_rows])
+    t_partial = timeit(lambda: [SimilarityCalculator.find_k_nearest(q, documents, k) for q in query_rows])
+    t_batch = timeit(lambda: SimilarityCalculator.find_k_nearest_batch(queries, documents, k))
+    
+    print(f"find_k_nearest ({n_train} dokumen, {n_queries} query, k={k}, ms/query)")
+    print(f"   argsort penuh : {t_argsort / n_queries * 1e3:7.2f}")
+    print(f"   argpartition  : {t_partial / n_queries * 1e3:7.2f} ({t_argsort / t_partial:.1f}x)")
+    print(f"   batch         : {t_batch / n_queries * 1e3:7.2f} ({t_argsort / t_batch:.1f}x)")
+
+
+# Diukur di proses baru agar import belum ter-cache
+_STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+t_import = time.perf_counter() - start
+
+from preprocessing import preload_resources
+t_resources = preload_resources()
+
+import app
+start = time.perf_counter()
+app.init_classifier()
+t_model = time.perf_counter() - start
+print(json.dumps({{'import': t_import, 'resources': t_resources, 'model': t_model}}))
+"""
+
+
+def bench_startup():
+    """
+    Laporan waktu startup: import modul, resource Sastrawi, dan load model
+    """
+    print("Startup time (proses baru)")
+    print(f"   {'script':<14}{'import':>10}{'sastrawi':>10}{'model':>10}{'total':>10}")
+
+    for module in ['app', 'train_now', 'scrape_now']:
+        output = subprocess.run(
+            [sys.executable, '-c', _STARTUP_PROBE.format(module=module)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        timing = json.loads(output.strip().splitlines()[-1])
+        total = sum(timing.values())
+        print(f"   {module + '.py':<14}{timing['import']:>9.3f}s{timing['resources']:>9.3f}s"
+              f"{timing['model']:>9.3f}s{total:>9.3f}s")
+
+
+# Load model di proses baru: waktu load dan RSS (anon = privat per worker,
+# file = page cache yang dipakai bersama semua worker)
+_MODEL_LOAD_PROBE = """
+import json, time
+
+def rss():
+    fields = {{}}
+    for line in open('/proc/self/status'):
+        if line.startswith(('RssAnon', 'RssFile')):
+            name, value = line.split(':')
+            fields[name] = int(value.split()[0]) / 1024
+    return fields
+
+from classifier import KNNClassifier
+from preprocessing import TextPreprocessor
+knn = KNNClassifier(preprocessor=TextPreprocessor())
+before = rss()
+start = time.perf_counter()
+knn.load({directory!r})
+t_load = time.perf_counter() - start
+knn.predict_matrix(knn.index._fit_X[:5])
+after = rss()
+print(json.dumps({{'load': t_load, 'anon': after['RssAnon'] - before['RssAnon'],
+                  'file': after['RssFile'] - before['RssFile']}}))
+"""
+
+
+def bench_model_format(n_docs: int = 10000, n_workers: int = 4):
+    """
+    Load model per worker: format joblib (salinan privat) vs array memory-mapped
+    """
+    import os
+    import tempfile
+    from classifier import KNNClassifier
+    from preprocessing import TextPreprocessor
+    
+    texts, labels = load_labeled_corpus(n_docs)
+    knn = KNNClassifier(k=5, preprocessor=TextPreprocessor(), feature_backend='hashing')
+    data = knn.prepare_data(texts, labels)
+    knn.train(data['X_train'], data['y_train'], counts=data['C_train'])
+    nnz = knn.X_train.nnz
+    
+    print(f"Model format ({knn.X_train.shape[0]} dokumen, {nnz} nnz, {n_workers} worker)")
+    print(f"   {'format':<8}{'load':>10}{'anon/worker':>14}{'file':>9}{'total anon':>13}")
+    for mmap in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            knn.save(tmp, mmap=mmap)
+            size = sum(os.path.getsize(os.path.join(root, name))
+                       for root, _, names in os.walk(tmp) for name in names)
+            output = subprocess.run(
+                [sys.executable, '-c', _MODEL_LOAD_PROBE.format(directory=tmp)],
+                capture_output=True, text=True, check=True
+            ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        name = 'mmap' if mmap else 'joblib'
+        print(f"   {name:<8}{result['load'] * 1e3:>8.1f}ms{result['anon']:>11.1f} MB"
+              f"{result['file']:>6.1f} MB{result['anon'] * n_workers:>10.1f} MB"
+              f"   ({size / 2 ** 20:.1f} MB di disk)")
+
+
+_VECTORIZER_LOAD_PROBE = """
+import json, time
+
+def rss():
+    for line in open('/proc/self/status'):
+        if line.startswith('RssAnon'):
+            return int(line.split()[1]) / 1024
+
+from feature_extraction import FeatureExtractor
+extractor = FeatureExtractor()
+before = rss()
+start = time.perf_counter()
+extractor.{method}({path!r})
+t_load = time.perf_counter() - start
+start = time.perf_counter()
+extractor.transform({texts!r})
+t_first = time.perf_counter() - start
+start = time.perf_counter()
+extractor.transform({texts!r})
+t_transform = time.perf_counter() - start
+print(json.dumps({{'load': t_load, 'first': t_first, 'transform': t_transform,
+                  'anon': rss() - before}}))
+"""
+
+
+def bench_vectorizer_format(n_docs: int = 20000, n_words: int = 20000, n_queries: int = 20):
+    """
+    Load FeatureExtractor: pickle joblib (dict vocabulary) vs format biner
+    (vocabulary terurut + IDF float32 memory-mapped)
+    
+    Corpus sintetis dengan kata acak (distribusi Zipf) supaya vocabulary
+    sebesar corpus abstrak sungguhan (unigram + bigram, tanpa max_features).
+    """
+    import os
+    import string
+    import tempfile
+    import numpy as np
+    from feature_extraction import FeatureExtractor
+    
+    rng = np.random.default_rng(0)
+    letters = np.array(list(string.ascii_lowercase))
+    words = np.array([''.join(rng.choice(letters, 7)) for _ in range(n_words)])
+    ranks = np.minimum(rng.zipf(1.2, size=(n_docs, 60)), n_words) - 1
+    texts = [' '.join(words[row]) for row in ranks]
+    
+    extractor = FeatureExtractor(max_features=None, dtype=np.float32)
+    extractor.fit(texts)
+    queries = texts[:n_queries]
+    
+    print(f"Vectorizer format ({len(extractor.feature_names)} fitur, {n_queries} transform)")
+    print(f"   {'format':<8}{'load':>10}{'1st transform':>15}{'transform':>12}{'anon':>10}"
+          f"{'disk':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, method, path in (('joblib', 'load', os.path.join(tmp, 'tfidf.joblib')),
+                                   ('binary', 'load_binary', os.path.join(tmp, 'tfidf'))):
+            if method == 'load':
+                extractor.save(path)
+                size = os.path.getsize(path)
+            else:
+                extractor.save_binary(path)
+                size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            
+            # Median dari beberapa proses baru (load dingin di setiap proses)
+            runs = []
+            for _ in range(3):
+                output = subprocess.run(
+                    [sys.executable, '-c', _VECTORIZER_LOAD_PROBE.format(
+                        method=method, path=path, texts=queries)],
+                    capture_output=True, text=True, check=True
+                ).stdout
+                runs.append(json.loads(output.strip().splitlines()[-1]))
+            result = sorted(runs, key=lambda run: run['load'])[1]
+            print(f"   {name:<8}{result['load'] * 1e3:>8.1f}ms{result['first'] * 1e3:>13.1f}ms"
+                  f"{result['transform'] * 1e3:>10.1f}ms{result['anon']:>7.1f} MB"
+                  f"{size / 2 ** 20:>7.1f} MB")
+
+
+def bench_prediction_cache(n_docs: int = 2000, n_unique: int = 100, n_requests: int = 500):
+    """
+    /classify per request: predict_single + get_important_words, tanpa vs
+    dengan PredictionCache (teks dikirim ulang, kadang beda whitespace)
+    """
+    import numpy as np
+    from classifier import KNNClassifier
+    from prediction_cache import PredictionCache
+    from preprocessing import TextPreprocessor
+    
+    texts, labels = load_labeled_corpus(n_docs)
+    knn = KNNClassifier(k=5, preprocessor=TextPreprocessor())
+    data = knn.prepare_data(texts, labels)
+    knn.train(data['X_train'], data['y_train'], counts=data['C_train'])
+    
+    # Sebagian abstrak jauh lebih sering dikirim ulang (distribusi Zipf)
+    rng = np.random.default_rng(0)
+    unique = texts[:n_unique]
+    picks = np.minimum(rng.zipf(1.5, size=n_requests), n_unique) - 1
+    requests = [unique[i] if rng.random() < 0.5 else unique[i].replace(' ', '  ', 3)
+                for i in picks]
+    
+    def classify(text, cache=None, version='v1'):
+        if cache is None:
+            return knn.predict_single(text), knn.get_important_words(text, top_n=20)
+        return (cache.get_or_compute(text, version, lambda: knn.predict_single(text)),
+                cache.get_or_compute(text, version, lambda: knn.get_important_words(text, top_n=20),
+                                     kind='important_words'))
+    
+    classify(requests[0])  # Warm-up resource Sastrawi
+    start = time.perf_counter()
+    expected = [classify(text) for text in requests]
+    t_plain = time.perf_counter() - start
+    
+    cache = PredictionCache(max_size=n_unique // 2)
+    start = time.perf_counter()
+    cached = [classify(text, cache) for text in requests]
+    t_cached = time.perf_counter() - start
+    assert [result[0] for result in cached] == [result[0] for result in expected]
+    stats = cache.stats()
+    
+    print(f"Prediction cache ({n_requests} request, {len(set(picks))} teks unik, "
+          f"max_size={cache.max_size})")
+    print(f"   Tanpa cache  : {t_plain / n_requests * 1e3:7.2f} ms/request")
+    print(f"   Dengan cache : {t_cached / n_requests * 1e3:7.2f} ms/request "
+          f"({t_plain / t_cached:.1f}x, hit rate {stats['hit_rate']:.0%}, "
+          f"{stats['evictions']} evictions)")
+
+
+BENCHMARKS: Dict[str, Callable] = {
+    'stem_cache': bench_stem_cache,
+    'clean_text': bench_clean_text,
+    'parallel_batch': bench_parallel_batch,
+    'startup': bench_startup,
+    'token_table': bench_token_table,
+    'fused_preprocess': bench_fused_preprocess,
+    'token_corpus': bench_token_corpus,
+    'hashing': bench_hashing,
+    'partial_fit': bench_partial_fit,
+    'knn_engine': bench_knn_engine,
+    'ann_index': bench_ann_index,
+    'optimal_k': bench_optimal_k,
+    'cross_validation': bench_cross_validation,
+    'important_words': bench_important_words,
+    'model_swap': bench_model_swap,
+    'model_format': bench_model_format,
+    'dtype': bench_dtype,
+    'similarity_graph': bench_similarity_graph,
+    'top_k': bench_top_k,
+    'vectorizer_format': bench_vectorizer_format,
+    'prediction_cache': bench_prediction_cache,
+}
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print("=" * 70)
+        BENCHMARKS[name]()
+    print("=" * 70)
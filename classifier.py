@@ -4,32 +4,82 @@ dengan evaluasi model (Precision, Recall, F1-Score)
 """
 import numpy as np
 import pandas as pd
-from typing import List, Dict, Tuple
+import scipy.sparse as sp
+from typing import Callable, Iterable, Iterator, List, Dict, Tuple
+from sklearn.base import clone
 from sklearn.neighbors import KNeighborsClassifier
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import StratifiedKFold, train_test_split, cross_val_score
 from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, 
     f1_score, classification_report, confusion_matrix
 )
 import joblib
+from joblib import Parallel, delayed
 import os
+import re
+import shutil
+import time
+from array import array
 from datetime import datetime
 
-from preprocessing import TextPreprocessor
-from feature_extraction import FeatureExtractor
+from preprocessing import TextPreprocessor, TokenCorpus, get_preprocessor
+from feature_extraction import FeatureExtractor, HashingFeatureExtractor
+from knn_index import RandomProjectionIndex, SparseKNNIndex, distance_vote, recall_at_k
+
+
+# Kata dalam teks asli untuk highlighting (get_important_words)
+_WORD_PATTERN = re.compile(r'\b\w+\b')
+
+
+def _csr_arrays(prefix: str, matrix) -> Dict[str, np.ndarray]:
+    """
+    Array penyusun matrix CSR untuk disimpan sebagai file .npy
+    """
+    matrix = sp.csr_matrix(matrix)
+    return {
+        f'{prefix}_data': matrix.data,
+        f'{prefix}_indices': matrix.indices,
+        f'{prefix}_indptr': matrix.indptr,
+        f'{prefix}_shape': np.array(matrix.shape)
+    }
+
+
+def _csr_from_arrays(arrays: Dict[str, np.ndarray], prefix: str) -> sp.csr_matrix:
+    """
+    Matrix CSR dari array hasil _csr_arrays (tanpa menyalin array memory-mapped)
+    """
+    shape = tuple(int(n) for n in arrays[f'{prefix}_shape'])
+    return sp.csr_matrix((arrays[f'{prefix}_data'], arrays[f'{prefix}_indices'],
+                          arrays[f'{prefix}_indptr']), shape=shape, copy=False)
 
 
 class KNNClassifier:
     """Class untuk klasifikasi dokumen menggunakan KNN"""
     
-    def __init__(self, k: int = 5, metric: str = 'cosine'):
+    def __init__(self, k: int = 5, metric: str = 'cosine',
+                 preprocessor: TextPreprocessor = None, feature_backend: str = 'tfidf',
+                 index_backend: str = 'exact', index_params: Dict = None,
+                 dtype=np.float32):
         """
         Args:
             k: Jumlah tetangga terdekat
             metric: Metrik jarak ('cosine', 'euclidean', 'manhattan')
+            preprocessor: TextPreprocessor yang dipakai (misalnya dengan n_jobs > 1
+                          untuk preprocessing paralel); default get_preprocessor()
+            feature_backend: 'tfidf' (vocabulary, max 1000 fitur) atau 'hashing'
+                             (feature hashing dengan IDF online, lihat
+                             HashingFeatureExtractor)
+            index_backend: 'exact' (SparseKNNIndex) atau 'lsh' (approximate,
+                           RandomProjectionIndex); hanya untuk metric cosine
+            index_params: Parameter tambahan index (misalnya n_tables, n_bits)
+            dtype: Tipe nilai matrix TF-IDF, data training, dan perhitungan
+                   jarak; float32 (default) = setengah memori dan bandwidth
+                   dengan prediksi yang praktis sama, np.float64 = identik
+                   dengan scikit-learn
         """
         self.k = k
         self.metric = metric
+        self.dtype = np.dtype(dtype)
         
         # Inisialisasi KNN classifier
         self.classifier = KNeighborsClassifier(
@@ -37,17 +87,58 @@ class KNNClassifier:
             metric=metric,
             weights='distance'  # Bobot berdasarkan jarak
         )
+        # Engine prediksi: brute-force sparse dot untuk cosine (hasil identik
+        # dengan self.classifier) atau LSH; metric lain memakai sklearn
+        self.index_backend = index_backend
+        self.index_params = index_params or {}
+        self.index = self._create_index(index_backend, k, metric, self.index_params, self.dtype)
         
         # Komponen preprocessing dan feature extraction
-        self.preprocessor = TextPreprocessor()
-        self.feature_extractor = FeatureExtractor()
+        self.preprocessor = preprocessor if preprocessor is not None else get_preprocessor()
+        self.feature_backend = feature_backend
+        self.feature_extractor = self._create_feature_extractor(feature_backend, self.dtype)
         
         self.is_trained = False
         self.classes = None
         self.training_info = {}
+        
+        # Data training untuk partial_fit: raw count (bisa di-weight ulang
+        # dengan IDF baru), TF-IDF aktif, label, dan id Abstract (opsional)
+        self.train_counts = None
+        self.X_train = None
+        self.y_train = None
+        self.train_ids = None
+    
+    @staticmethod
+    def _create_feature_extractor(feature_backend: str, dtype=np.float64) -> FeatureExtractor:
+        """
+        Buat feature extractor sesuai backend
+        """
+        if feature_backend == 'tfidf':
+            return FeatureExtractor(dtype=dtype)
+        if feature_backend == 'hashing':
+            return HashingFeatureExtractor(dtype=dtype)
+        raise ValueError(f"Feature backend tidak dikenal: {feature_backend}")
+    
+    @staticmethod
+    def _create_index(index_backend: str, k: int, metric: str, index_params: Dict,
+                      dtype=np.float64):
+        """
+        Buat index tetangga untuk metric cosine (None = pakai sklearn)
+        """
+        if index_backend not in ('exact', 'lsh'):
+            raise ValueError(f"Index backend tidak dikenal: {index_backend}")
+        if metric != 'cosine':
+            if index_backend == 'lsh':
+                raise ValueError("Index LSH hanya mendukung metric cosine")
+            return None
+        if index_backend == 'lsh':
+            return RandomProjectionIndex(n_neighbors=k, dtype=dtype, **index_params)
+        return SparseKNNIndex(n_neighbors=k, dtype=dtype)
     
     def prepare_data(self, texts: List[str], labels: List[str], 
-                     test_size: float = 0.2, random_state: int = 42) -> Dict:
+                     test_size: float = 0.2, random_state: int = 42,
+                     preprocessed: bool = False, ids: List[int] = None) -> Dict:
         """
         Persiapan data untuk training dan testing
         
@@ -56,26 +147,104 @@ class KNNClassifier:
             labels: List of labels ('RPL' atau 'TKJ')
             test_size: Proporsi data untuk testing
             random_state: Random seed
+            preprocessed: True jika texts sudah hasil preprocess_to_text
+                          (misalnya dari Abstract.preprocessed_text)
+            ids: Id Abstract per teks (opsional, untuk partial_fit)
             
         Returns:
-            Dictionary berisi X_train, X_test, y_train, y_test
+            Dictionary berisi X_train, X_test, y_train, y_test, serta raw count
+            (C_train, C_test) dan ids_train/ids_test untuk train(), dan corpus +
+            labels seluruh data untuk cross_validate_corpus
         """
-        print("Preprocessing texts...")
-        # Preprocessing teks
-        preprocessed_texts = self.preprocessor.batch_preprocess_to_text(texts)
+        if not preprocessed:
+            print("Preprocessing texts...")
+        # Preprocessing teks langsung ke corpus token ID (array ringkas)
+        corpus = self.preprocessor.batch_preprocess_to_corpus(texts, preprocessed=preprocessed)
         
         print("Extracting TF-IDF features...")
-        # Extract TF-IDF features
-        tfidf_matrix = self.feature_extractor.fit_transform(preprocessed_texts)
+        # Extract TF-IDF features (raw count disimpan untuk partial_fit)
+        counts = self.feature_extractor.fit_counts_corpus(corpus)
+        tfidf_matrix = self.feature_extractor.weight_counts(counts)
+        
+        data = self._split_data(tfidf_matrix, labels, test_size, random_state,
+                                counts=counts, ids=ids)
+        data.update(corpus=corpus, labels=list(labels))
+        return data
+    
+    def prepare_data_stream(self, chunk_factory: Callable[[], Iterable[Tuple[List[str], List[str]]]],
+                            test_size: float = 0.2, random_state: int = 42,
+                            preprocessed: bool = False) -> Dict:
+        """
+        Seperti prepare_data, tetapi data dibaca per chunk (misalnya dari database)
         
+        Tidak ada list teks mentah/hasil preprocessing untuk seluruh corpus;
+        setiap chunk langsung ditambahkan ke TokenCorpus (token ID dalam
+        array ringkas), lalu TF-IDF di-fit dan di-transform dari corpus itu.
+        
+        Args:
+            chunk_factory: Fungsi tanpa argumen yang mengembalikan iterator baru
+                           berisi (texts, labels) atau (texts, labels, ids) per
+                           chunk. Dipanggil sekali.
+            test_size: Proporsi data untuk testing
+            random_state: Random seed
+            preprocessed: True jika texts sudah hasil preprocess_to_text
+            
+        Returns:
+            Dictionary seperti prepare_data
+        """
+        print("Building token corpus (streaming)...")
+        corpus = TokenCorpus()
+        labels = []
+        ids = []
+        for chunk in chunk_factory():
+            texts, chunk_labels = chunk[0], chunk[1]
+            for text in self._iter_preprocessed(texts, preprocessed):
+                corpus.append_text(text)
+            labels.extend(chunk_labels)
+            if len(chunk) > 2:
+                ids.extend(chunk[2])
+        
+        print(f"Extracting TF-IDF features ({corpus.nbytes() / 1024:.0f} KB token corpus)...")
+        counts = self.feature_extractor.fit_counts_corpus(corpus)
+        tfidf_matrix = self.feature_extractor.weight_counts(counts)
+        
+        data = self._split_data(tfidf_matrix, labels, test_size, random_state,
+                                counts=counts, ids=ids or None)
+        data.update(corpus=corpus, labels=labels)
+        return data
+    
+    def _iter_preprocessed(self, texts: Iterable[str], preprocessed: bool) -> Iterator[str]:
+        """
+        Generator teks hasil preprocessing
+        """
+        if preprocessed:
+            yield from texts
+        else:
+            for text in texts:
+                yield self.preprocessor.preprocess_to_text(text)
+    
+    def _split_data(self, tfidf_matrix, labels: List[str],
+                    test_size: float, random_state: int,
+                    counts=None, ids: List[int] = None) -> Dict:
+        """
+        Split TF-IDF matrix (serta raw count dan ids jika ada) menjadi data
+        training dan testing
+        """
         print("Splitting data...")
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            tfidf_matrix, labels,
+        # Split data (counts/ids ikut di-split dengan permutasi yang sama)
+        arrays = [tfidf_matrix, labels]
+        arrays += [counts] if counts is not None else []
+        arrays += [np.asarray(ids)] if ids is not None else []
+        
+        splits = train_test_split(
+            *arrays,
             test_size=test_size,
             random_state=random_state,
             stratify=labels  # Pastikan proporsi kelas seimbang
         )
+        X_train, X_test, y_train, y_test = splits[:4]
+        C_train, C_test = splits[4:6] if counts is not None else (None, None)
+        ids_train, ids_test = splits[-2:] if ids is not None else (None, None)
         
         self.classes = np.unique(labels)
         
@@ -87,41 +256,163 @@ class KNNClassifier:
             'X_train': X_train,
             'X_test': X_test,
             'y_train': y_train,
-            'y_test': y_test
+            'y_test': y_test,
+            'C_train': C_train,
+            'C_test': C_test,
+            'ids_train': ids_train,
+            'ids_test': ids_test
         }
     
-    def train(self, X_train: np.ndarray, y_train: np.ndarray) -> 'KNNClassifier':
+    def train(self, X_train: np.ndarray, y_train: np.ndarray,
+              counts=None, ids: List[int] = None) -> 'KNNClassifier':
         """
         Train KNN classifier
         
         Args:
             X_train: Training features (TF-IDF matrix)
             y_train: Training labels
+            counts: Raw count X_train (data['C_train']); tanpa ini partial_fit
+                    tidak bisa dipakai
+            ids: Id Abstract per baris X_train (data['ids_train']), agar
+                 partial_fit bisa mengganti baris yang labelnya dikoreksi
         """
         print(f"Training KNN with k={self.k}...")
         
-        self.classifier.fit(X_train, y_train)
+        self._fit_engine(X_train, y_train)
         self.is_trained = True
         
+        self.X_train = sp.csr_matrix(X_train)
+        self.y_train = np.asarray(y_train)
+        self.train_counts = sp.csr_matrix(counts) if counts is not None else None
+        self.train_ids = np.asarray(ids) if ids is not None else None
+        
         # Simpan info training
         self.training_info = {
             'trained_at': datetime.now(),
             'n_samples': X_train.shape[0],
             'n_features': X_train.shape[1],
             'k_value': self.k,
-            'metric': self.metric
+            'metric': self.metric,
+            'incremental_updates': 0,
+            'idf_drift': 0.0
         }
         
         print("Training completed!")
         
         return self
     
-    def predict(self, texts: List[str]) -> np.ndarray:
+    def partial_fit(self, texts: List[str], labels: List[str], ids: List[int] = None,
+                    preprocessed: bool = False, drift_threshold: float = 0.05) -> Dict:
+        """
+        Tambahkan data berlabel baru ke model tanpa training ulang
+        
+        Raw count dokumen baru ditambahkan ke matrix training dan document
+        frequency di-update. Selama perubahan IDF (drift) masih di bawah
+        threshold, dokumen baru di-weight dengan IDF aktif dan cukup ditambahkan
+        ke index KNN. Jika drift melewati threshold, IDF baru diaktifkan dan
+        seluruh matrix training di-weight ulang dari raw count (tanpa
+        preprocessing ulang). Vocabulary fitur (tfidf) tidak berubah; untuk
+        vocabulary baru tetap perlu training penuh.
+        
+        Args:
+            texts: List of raw texts
+            labels: Label per teks
+            ids: Id Abstract per teks; baris training dengan id yang sama diganti
+            preprocessed: True jika texts sudah hasil preprocess_to_text
+            drift_threshold: Batas ||IDF baru - IDF aktif|| / ||IDF aktif||
+            
+        Returns:
+            Dictionary berisi jumlah data, drift IDF, dan apakah index di-rebuild
+        """
+        if not self.is_trained or self.train_counts is None:
+            raise ValueError("partial_fit butuh model yang di-train dengan raw count "
+                             "(prepare_data + train). Lakukan training penuh.")
+        
+        start = time.perf_counter()
+        extractor = self.feature_extractor
+        labels = np.asarray(labels)
+        
+        vocabulary = extractor.token_vocabulary
+        corpus = self.preprocessor.batch_preprocess_to_corpus(
+            texts, vocabulary=vocabulary, grow=vocabulary is None, preprocessed=preprocessed
+        )
+        counts = extractor.count_corpus(corpus)
+        
+        replaced = 0
+        if ids is not None:
+            ids = np.asarray(ids)
+            # Id yang muncul lebih dari sekali dalam satu panggilan: versi terakhir dipakai
+            _, last = np.unique(ids[::-1], return_index=True)
+            rows = np.sort(len(ids) - 1 - last)
+            if len(rows) < len(ids):
+                counts, labels, ids = counts[rows], labels[rows], ids[rows]
+            
+            # Baris training dengan id yang sama (label dikoreksi atau abstrak
+            # diedit) diganti, termasuk kontribusinya ke document frequency
+            if self.train_ids is not None:
+                existing = np.isin(self.train_ids, ids)
+                replaced = int(existing.sum())
+                
+                if replaced:
+                    extractor.update_document_frequency(self.train_counts[existing], remove=True)
+                    keep = ~existing
+                    self.train_counts = self.train_counts[keep]
+                    self.X_train = self.X_train[keep]
+                    self.y_train = self.y_train[keep]
+                    self.train_ids = self.train_ids[keep]
+        
+        extractor.update_document_frequency(counts)
+        
+        active_idf = extractor.idf_
+        candidate_idf = extractor.compute_idf()
+        drift = float(np.linalg.norm(candidate_idf - active_idf) /
+                      max(np.linalg.norm(active_idf), 1e-12))
+        rebuild = drift > drift_threshold
+        
+        self.train_counts = sp.vstack([self.train_counts, counts], format='csr')
+        self.y_train = np.concatenate([self.y_train, labels])
+        if self.train_ids is not None:
+            self.train_ids = np.concatenate([
+                self.train_ids,
+                ids if ids is not None else np.full(len(labels), -1)
+            ])
+        
+        if rebuild:
+            # IDF bergeser terlalu jauh: aktifkan IDF baru, weight ulang semua baris
+            extractor.set_idf(candidate_idf)
+            self.X_train = extractor.weight_counts(self.train_counts)
+        else:
+            self.X_train = sp.vstack([self.X_train, extractor.weight_counts(counts)], format='csr')
+        
+        self._fit_engine(self.X_train, self.y_train)
+        self.classes = np.unique(self.y_train)
+        
+        self.training_info.update({
+            'updated_at': datetime.now(),
+            'n_samples': self.X_train.shape[0],
+            'incremental_updates': self.training_info.get('incremental_updates', 0) + 1,
+            'idf_drift': 0.0 if rebuild else drift
+        })
+        
+        result = {
+            'added': len(labels) - replaced,
+            'replaced': replaced,
+            'n_samples': self.X_train.shape[0],
+            'idf_drift': drift,
+            'rebuilt': rebuild,
+            'seconds': time.perf_counter() - start
+        }
+        print(f"Partial fit: {result}")
+        
+        return result
+    
+    def predict(self, texts: List[str], preprocessed: bool = False) -> np.ndarray:
         """
         Prediksi label untuk teks baru
         
         Args:
             texts: List of raw texts
+            preprocessed: True jika texts sudah hasil preprocess_to_text
             
         Returns:
             Array of predicted labels
@@ -129,38 +420,152 @@ class KNNClassifier:
         if not self.is_trained:
             raise ValueError("Model belum di-train. Jalankan train() terlebih dahulu.")
         
-        # Preprocessing
-        preprocessed_texts = self.preprocessor.batch_preprocess_to_text(texts)
-        
         # Extract features
-        tfidf_matrix = self.feature_extractor.transform(preprocessed_texts)
+        tfidf_matrix = self.transform(texts, preprocessed)
         
         # Predict
-        predictions = self.classifier.predict(tfidf_matrix)
+        predictions, _ = self.predict_matrix(tfidf_matrix)
         
         return predictions
     
-    def predict_proba(self, texts: List[str]) -> np.ndarray:
+    def predict_proba(self, texts: List[str], preprocessed: bool = False) -> np.ndarray:
         """
         Prediksi probabilitas untuk setiap kelas
         
+        Args:
+            texts: List of raw texts
+            preprocessed: True jika texts sudah hasil preprocess_to_text
+        
         Returns:
             Array of probability scores
         """
         if not self.is_trained:
             raise ValueError("Model belum di-train.")
         
-        # Preprocessing
-        preprocessed_texts = self.preprocessor.batch_preprocess_to_text(texts)
-        
         # Extract features
-        tfidf_matrix = self.feature_extractor.transform(preprocessed_texts)
+        tfidf_matrix = self.transform(texts, preprocessed)
         
         # Predict probability
-        probabilities = self.classifier.predict_proba(tfidf_matrix)
+        _, probabilities = self.predict_matrix(tfidf_matrix)
         
         return probabilities
     
+    def predict_stream(self, text_chunks: Iterable[List[str]],
+                       preprocessed: bool = False) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Prediksi per chunk agar memori tetap terbatas untuk corpus besar
+        
+        Args:
+            text_chunks: Iterable berisi list teks per chunk
+            preprocessed: True jika texts sudah hasil preprocess_to_text
+            
+        Yields:
+            Tuple of (predictions, probabilities) untuk setiap chunk
+        """
+        if not self.is_trained:
+            raise ValueError("Model belum di-train.")
+        
+        for texts in text_chunks:
+            tfidf_matrix = self.transform(texts, preprocessed)
+            yield self.predict_matrix(tfidf_matrix)
+    
+    def _fit_engine(self, X, y):
+        """
+        Fit engine prediksi: index jika ada, selain itu classifier sklearn
+        
+        Classifier sklearn tidak di-fit di samping index karena fit-nya
+        menyimpan referensi/salinan matrix training sendiri.
+        """
+        if self.index is not None:
+            self.index.fit(X, y)
+        else:
+            self.classifier.fit(X, y)
+    
+    def kneighbors_matrix(self, tfidf_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cari k tetangga terdekat (SparseKNNIndex untuk cosine, sklearn untuk
+        metric lain)
+        
+        Returns:
+            Tuple of (distances, indices) baris training, terurut dari yang terdekat
+        """
+        if self.index is not None:
+            return self.index.kneighbors(tfidf_matrix)
+        return self.classifier.kneighbors(tfidf_matrix)
+    
+    def _vote(self, distances: np.ndarray, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Label dan probabilitas dari hasil kneighbors_matrix (weights='distance')
+        """
+        if self.index is not None:
+            return self.index.vote(distances, indices)
+        
+        classes = self.classifier.classes_
+        probabilities = distance_vote(distances, self.classifier._y[indices], len(classes))
+        return classes[np.argmax(probabilities, axis=1)], probabilities
+    
+    def predict_matrix(self, tfidf_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Prediksi label dan probabilitas dari matrix TF-IDF dengan satu kali
+        pencarian tetangga
+        
+        Returns:
+            Tuple of (predictions, probabilities)
+        """
+        return self._vote(*self.kneighbors_matrix(tfidf_matrix))
+    
+    def predict_with_details(self, texts: List[str], preprocessed: bool = False) -> Dict:
+        """
+        Label, confidence, dan tetangga terdekat dari satu kali preprocessing,
+        satu kali transform, dan satu kali pencarian tetangga
+        
+        Args:
+            texts: List of raw texts
+            preprocessed: True jika texts sudah hasil preprocess_to_text
+        
+        Returns:
+            Dictionary berisi array per teks:
+                labels, confidence, probabilities (urutan self.classes),
+                neighbor_ids (id Abstract tetangga; index baris training jika
+                model tidak menyimpan id) dan neighbor_distances
+        """
+        if not self.is_trained:
+            raise ValueError("Model belum di-train.")
+        
+        tfidf_matrix = self.transform(texts, preprocessed)
+        distances, indices = self.kneighbors_matrix(tfidf_matrix)
+        predictions, probabilities = self._vote(distances, indices)
+        
+        return {
+            'labels': predictions,
+            'confidence': probabilities.max(axis=1),
+            'probabilities': probabilities,
+            'neighbor_ids': self.train_ids[indices] if self.train_ids is not None else indices,
+            'neighbor_distances': distances
+        }
+    
+    def transform(self, texts: List[str], preprocessed: bool = False):
+        """
+        Preprocessing (jika perlu) lalu transform ke TF-IDF matrix
+        
+        Args:
+            texts: List of raw texts
+            preprocessed: True jika texts sudah hasil preprocess_to_text
+            
+        Returns:
+            Sparse TF-IDF matrix (n_texts, n_features)
+        """
+        # Vocabulary token milik vectorizer (tfidf) tidak perlu bertambah;
+        # hashing tidak punya vocabulary tetap sehingga corpus dibangun baru
+        vocabulary = self.feature_extractor.token_vocabulary
+        corpus = self.preprocessor.batch_preprocess_to_corpus(
+            texts,
+            vocabulary=vocabulary,
+            grow=vocabulary is None,
+            preprocessed=preprocessed
+        )
+        return self.feature_extractor.transform_corpus(corpus)
+    
     def predict_single(self, text: str) -> Tuple[str, float]:
         """
         Prediksi untuk single text dengan confidence score
@@ -168,11 +573,10 @@ class KNNClassifier:
         Returns:
             Tuple of (predicted_label, confidence)
         """
-        predictions = self.predict([text])
-        probabilities = self.predict_proba([text])
+        details = self.predict_with_details([text])
         
-        predicted_label = predictions[0]
-        confidence = probabilities[0].max()
+        predicted_label = details['labels'][0]
+        confidence = details['confidence'][0]
         
         return predicted_label, confidence
     
@@ -196,39 +600,17 @@ class KNNClassifier:
         # Extract TF-IDF features
         tfidf_vector = self.feature_extractor.transform([preprocessed_text])
         
-        # Get feature names
-        feature_names = self.feature_extractor.vectorizer.get_feature_names_out()
-        
-        # Get TF-IDF scores
-        tfidf_scores = tfidf_vector.toarray()[0]
-        
-        # Get top words
-        top_indices = tfidf_scores.argsort()[-top_n:][::-1]
-        top_words = [(feature_names[i], tfidf_scores[i]) for i in top_indices if tfidf_scores[i] > 0]
+        # Get top words (nama fitur hashing diambil dari teks ini)
+        top_words = self.feature_extractor.get_top_features(tfidf_vector, top_n,
+                                                            text=preprocessed_text)
         
         # Map preprocessed words to ALL variations in text with improved accuracy
         original_words = []
-        
-        # Tokenize text more accurately (preserve punctuation boundaries)
-        import re
-        # Split by whitespace and common punctuation, but keep the words
-        words_in_text = re.findall(r'\b\w+\b', text.lower())
+        variations_by_stem = self._stem_variations(text)
         
         for stemmed_word, score in top_words:
             # Find ALL variations of this stemmed word in text
-            all_variations = []
-            variations_seen = set()
-            
-            for word in words_in_text:
-                # Check if this word stems to our target
-                try:
-                    word_stem = self.preprocessor.stemmer.stem(word)
-                    if word_stem == stemmed_word and word not in variations_seen:
-                        all_variations.append(word)
-                        variations_seen.add(word)
-                except:
-                    # Skip words that cause stemming errors
-                    continue
+            all_variations = list(variations_by_stem.get(stemmed_word, ()))
             
             # Sort variations by length (prefer longer, more complete forms)
             all_variations.sort(key=len, reverse=True)
@@ -248,6 +630,29 @@ class KNNClassifier:
             'preprocessed_text': preprocessed_text
         }
     
+    def _stem_variations(self, text: str) -> Dict[str, List[str]]:
+        """
+        Peta stem -> kata asli di text yang menghasilkan stem tersebut
+        
+        Setiap kata unik di-stem sekali saja (lewat cache stemming), jadi
+        semua top feature bisa dicocokkan tanpa stemming ulang. Variasi
+        terurut sesuai kemunculan pertama di text.
+        """
+        stem_cache = self.preprocessor.stem_cache
+        stemmer = self.preprocessor.stemmer
+        
+        variations_by_stem = {}
+        # Split by whitespace and common punctuation, but keep the words
+        for word in dict.fromkeys(_WORD_PATTERN.findall(text.lower())):
+            try:
+                word_stem = stem_cache.stem(word, stemmer)
+            except Exception:
+                # Skip words that cause stemming errors
+                continue
+            variations_by_stem.setdefault(word_stem, []).append(word)
+        
+        return variations_by_stem
+    
     def evaluate(self, X_test: np.ndarray, y_test: np.ndarray) -> Dict:
         """
         Evaluasi model dengan metrik lengkap
@@ -261,11 +666,16 @@ class KNNClassifier:
         print("Evaluating model...")
         
         # Prediksi
-        y_pred = self.classifier.predict(X_test)
+        y_pred, _ = self.predict_matrix(X_test)
         
         # Hitung metrik
         accuracy = accuracy_score(y_test, y_pred)
         
+        # Index approximate: laporkan recall@k terhadap pencarian eksak
+        index_recall = None
+        if isinstance(self.index, RandomProjectionIndex):
+            index_recall = recall_at_k(self.index, X_test)
+        
         # Metrik per kelas
         precision = precision_score(y_test, y_pred, average=None, labels=self.classes)
         recall = recall_score(y_test, y_pred, average=None, labels=self.classes)
@@ -283,6 +693,10 @@ class KNNClassifier:
         print(f"\nAccuracy: {accuracy:.4f}")
         print(f"\nClassification Report:\n{report}")
         print(f"\nConfusion Matrix:\n{cm}")
+        if index_recall is not None:
+            print(f"\nLSH recall@{index_recall['k']}: {index_recall['recall']:.4f} "
+                  f"({index_recall['mean_candidates']:.0f} kandidat/query, "
+                  f"{index_recall['index_seconds']:.3f}s vs eksak {index_recall['exact_seconds']:.3f}s)")
         
         # Buat dictionary hasil
         results = {
@@ -292,7 +706,8 @@ class KNNClassifier:
             'f1_score': {self.classes[i]: f1[i] for i in range(len(self.classes))},
             'confusion_matrix': cm.tolist(),
             'classification_report': report,
-            'n_test_samples': len(y_test)
+            'n_test_samples': len(y_test),
+            'index_recall': index_recall
         }
         
         return results
@@ -301,11 +716,14 @@ class KNNClassifier:
         """
         Cross-validation untuk evaluasi model
         
+        X sudah di-transform dengan IDF dari seluruh data, jadi IDF bocor ke
+        fold validasi. Untuk CV tanpa kebocoran pakai cross_validate_texts.
+        
         Args:
             X: Features
             y: Labels
             cv: Number of folds
-            
+        
         Returns:
             Dictionary berisi CV scores
         """
@@ -326,100 +744,550 @@ class KNNClassifier:
             'std_accuracy': scores.std()
         }
     
+    def cross_validate_texts(self, texts: List[str], labels: List[str], cv: int = 5,
+                             preprocessed: bool = False, n_jobs: int = -1,
+                             random_state: int = 42) -> Dict:
+        """
+        Cross-validation dari teks: preprocessing sekali, TF-IDF di-fit per fold
+        
+        Setiap teks di-preprocess tepat satu kali menjadi TokenCorpus. Setiap
+        fold hanya mem-fit ulang vocabulary/IDF dari dokumen training fold itu
+        (tanpa Sastrawi), sehingga IDF tidak bocor ke fold validasi.
+        
+        Args:
+            texts: List of raw texts
+            labels: Label per teks
+            cv: Jumlah fold
+            preprocessed: True jika texts sudah hasil preprocess_to_text
+            n_jobs: Jumlah proses untuk fold (-1 = semua core)
+            random_state: Seed pembagian fold
+        
+        Returns:
+            Dictionary hasil cross_validate_corpus ditambah preprocess_seconds
+        """
+        start = time.perf_counter()
+        corpus = self.preprocessor.batch_preprocess_to_corpus(texts, preprocessed=preprocessed)
+        preprocess_seconds = time.perf_counter() - start
+        
+        results = self.cross_validate_corpus(corpus, labels, cv=cv, n_jobs=n_jobs,
+                                             random_state=random_state)
+        results['preprocess_seconds'] = preprocess_seconds
+        results['seconds'] += preprocess_seconds
+        return results
+    
+    def cross_validate_corpus(self, corpus: TokenCorpus, labels: List[str], cv: int = 5,
+                              n_jobs: int = -1, random_state: int = 42) -> Dict:
+        """
+        Stratified k-fold cross-validation dari TokenCorpus yang sudah jadi
+        
+        Per fold: fit feature extractor baru (backend sama dengan model ini)
+        pada dokumen training fold, transform dokumen validasi, lalu KNN dengan
+        k, metric dan index model ini. Fold dijalankan paralel.
+        
+        Args:
+            corpus: Corpus hasil preprocessing (misalnya data['corpus'] dari
+                    prepare_data_stream)
+            labels: Label per dokumen corpus
+            cv: Jumlah fold
+            n_jobs: Jumlah proses untuk fold (-1 = semua core)
+            random_state: Seed pembagian fold
+        
+        Returns:
+            Dictionary berisi metrik per fold (folds), rata-rata dengan format
+            sama seperti evaluate() (accuracy, precision, recall, f1_score),
+            simpangan baku (std), cv_scores/mean_accuracy/std_accuracy seperti
+            cross_validate, jumlah fold dan waktu
+        """
+        print(f"Running {cv}-fold cross-validation (preprocessing cached)...")
+        start = time.perf_counter()
+        
+        labels = np.asarray(labels)
+        classes = np.unique(labels)
+        # Jumlah fold dibatasi kelas terkecil agar stratifikasi tetap valid
+        n_splits = int(max(2, min(cv, np.unique(labels, return_counts=True)[1].min())))
+        folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        
+        # Token id dikirim sebagai numpy array, sehingga joblib (loky) menulisnya
+        # sekali ke memmap yang dibaca semua worker, bukan pickle per fold;
+        # model ini sendiri (matrix training, preprocessor) tidak ikut dikirim
+        ids = np.frombuffer(corpus.ids, dtype=np.uint32)
+        offsets = np.frombuffer(corpus.offsets, dtype=np.uint64)
+        settings = {
+            'feature_backend': self.feature_backend,
+            'index_backend': self.index_backend,
+            'index_params': self.index_params,
+            'k': self.k,
+            'metric': self.metric,
+            'dtype': self.dtype
+        }
+        fold_results = Parallel(n_jobs=n_jobs)(
+            delayed(self._evaluate_fold)(ids, offsets, corpus.vocabulary, corpus.grow,
+                                         labels, fit, held_out, classes, settings)
+            for fit, held_out in folds.split(np.zeros(len(labels)), labels)
+        )
+        for i, fold in enumerate(fold_results):
+            fold['fold'] = i
+            print(f"Fold {i}: Accuracy={fold['accuracy']:.4f} ({fold['seconds']:.3f}s)")
+        
+        summary = {'folds': fold_results, 'n_splits': n_splits}
+        spread = {}
+        for metric in ('precision', 'recall', 'f1_score'):
+            values = np.array([[fold[metric][c] for c in classes] for fold in fold_results])
+            summary[metric] = {c: float(v) for c, v in zip(classes, values.mean(axis=0))}
+            spread[metric] = {c: float(v) for c, v in zip(classes, values.std(axis=0))}
+        
+        scores = np.array([fold['accuracy'] for fold in fold_results])
+        spread['accuracy'] = float(scores.std())
+        summary.update({
+            'accuracy': float(scores.mean()),
+            'std': spread,
+            'cv_scores': scores.tolist(),
+            'mean_accuracy': float(scores.mean()),
+            'std_accuracy': float(scores.std()),
+            'seconds': time.perf_counter() - start
+        })
+        
+        print(f"CV Accuracy: {scores.mean():.4f} (+/- {scores.std() * 2:.4f})")
+        
+        return summary
+    
+    @staticmethod
+    def _corpus_subset(ids: np.ndarray, offsets: np.ndarray, vocabulary, grow: bool,
+                       indices: np.ndarray) -> TokenCorpus:
+        """
+        TokenCorpus berisi dokumen terpilih dari array ids/offsets sebuah corpus
+        """
+        starts = offsets[indices].astype(np.int64)
+        lengths = offsets[indices + 1].astype(np.int64) - starts
+        ends = np.cumsum(lengths)
+        positions = np.repeat(starts - (ends - lengths), lengths) + np.arange(lengths.sum())
+        
+        corpus = TokenCorpus(vocabulary, grow=grow)
+        corpus.ids = array('I', ids[positions].astype(np.uint32).tobytes())
+        corpus.offsets = array('Q', np.concatenate([[0], ends]).astype(np.uint64).tobytes())
+        return corpus
+    
+    @staticmethod
+    def _evaluate_fold(ids: np.ndarray, offsets: np.ndarray, vocabulary, grow: bool,
+                       labels: np.ndarray, fit: np.ndarray, held_out: np.ndarray,
+                       classes: np.ndarray, settings: Dict) -> Dict:
+        """
+        Fit TF-IDF + KNN pada satu fold training dan evaluasi di fold validasi
+        
+        Dijalankan di proses worker; settings berisi konfigurasi model
+        (feature_backend, index_backend, index_params, k, metric, dtype).
+        """
+        start = time.perf_counter()
+        
+        extractor = KNNClassifier._create_feature_extractor(settings['feature_backend'],
+                                                            settings['dtype'])
+        fit_corpus = KNNClassifier._corpus_subset(ids, offsets, vocabulary, grow, fit)
+        eval_corpus = KNNClassifier._corpus_subset(ids, offsets, vocabulary, grow, held_out)
+        X_fit = extractor.weight_counts(extractor.fit_counts_corpus(fit_corpus))
+        X_eval = extractor.transform_corpus(eval_corpus)
+        y_fit, y_eval = labels[fit], labels[held_out]
+        
+        index = KNNClassifier._create_index(settings['index_backend'], settings['k'],
+                                            settings['metric'], settings['index_params'],
+                                            settings['dtype'])
+        if index is None:
+            index = KNeighborsClassifier(n_neighbors=settings['k'], metric=settings['metric'],
+                                         weights='distance')
+        y_pred = index.fit(X_fit, y_fit).predict(X_eval)
+        
+        precision = precision_score(y_eval, y_pred, average=None, labels=classes, zero_division=0)
+        recall = recall_score(y_eval, y_pred, average=None, labels=classes, zero_division=0)
+        f1 = f1_score(y_eval, y_pred, average=None, labels=classes, zero_division=0)
+        
+        return {
+            'accuracy': float(accuracy_score(y_eval, y_pred)),
+            'precision': {c: float(v) for c, v in zip(classes, precision)},
+            'recall': {c: float(v) for c, v in zip(classes, recall)},
+            'f1_score': {c: float(v) for c, v in zip(classes, f1)},
+            'n_fit': len(fit),
+            'n_eval': len(held_out),
+            'n_features': X_fit.shape[1],
+            'seconds': time.perf_counter() - start
+        }
+    
     def find_optimal_k(self, X_train: np.ndarray, y_train: np.ndarray,
-                       X_test: np.ndarray, y_test: np.ndarray,
-                       k_range: range = range(1, 21)) -> Dict:
+                       X_test: np.ndarray = None, y_test: np.ndarray = None,
+                       k_range: range = range(1, 21), cv: int = 5,
+                       n_jobs: int = -1, random_state: int = 42) -> Dict:
         """
         Cari nilai k optimal untuk KNN
         
+        Setiap split cukup satu kali pencarian tetangga dengan k terbesar;
+        k yang lebih kecil dinilai dari k tetangga pertama di daftar yang sudah
+        terurut. Tanpa X_test/y_test dipakai stratified k-fold pada data
+        training, fold dijalankan paralel.
+        
+        Args:
+            X_train, y_train: Data training
+            X_test, y_test: Data validasi (opsional, menggantikan cross-validation)
+            k_range: Nilai k yang dicoba
+            cv: Jumlah fold cross-validation
+            n_jobs: Jumlah proses untuk fold (-1 = semua core)
+            random_state: Seed pembagian fold
+        
         Returns:
-            Dictionary dengan hasil untuk setiap k
+            Dictionary berisi kurva accuracy/F1 (macro) per k, best_k,
+            best_accuracy, best_f1, jumlah fold, dan waktu
         """
         print("Finding optimal k value...")
+        start = time.perf_counter()
+        
+        y_train = np.asarray(y_train)
+        if X_test is not None:
+            splits = []
+            max_k = X_train.shape[0]
+        else:
+            # Jumlah fold dibatasi kelas terkecil agar stratifikasi tetap valid
+            n_splits = max(2, min(cv, np.unique(y_train, return_counts=True)[1].min()))
+            folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+            splits = list(folds.split(np.zeros(len(y_train)), y_train))
+            max_k = min(len(fit) for fit, _ in splits)
+        
+        k_values = [k for k in k_range if k <= max_k]
+        if not k_values:
+            raise ValueError(f"Tidak ada k yang valid untuk {max_k} data training per fold")
+        
+        if X_test is not None:
+            scores = [self._score_k_values(X_train, y_train, X_test, np.asarray(y_test),
+                                           k_values, self.metric)]
+        else:
+            # X_train dikirim utuh (joblib menulisnya sekali ke memmap untuk
+            # semua worker), tiap worker hanya mengambil baris fold-nya
+            scores = Parallel(n_jobs=n_jobs)(
+                delayed(self._score_fold)(X_train, y_train, fit, held_out, k_values, self.metric)
+                for fit, held_out in splits
+            )
+        accuracy = np.array([score['accuracy'] for score in scores])
+        f1 = np.array([score['f1_macro'] for score in scores])
         
         results = []
-        
-        for k in k_range:
-            # Create temporary classifier
-            temp_clf = KNeighborsClassifier(
-                n_neighbors=k,
-                metric=self.metric,
-                weights='distance'
-            )
-            
-            # Train and evaluate
-            temp_clf.fit(X_train, y_train)
-            y_pred = temp_clf.predict(X_test)
-            
-            accuracy = accuracy_score(y_test, y_pred)
-            
+        for i, k in enumerate(k_values):
             results.append({
                 'k': k,
-                'accuracy': accuracy
+                'accuracy': float(accuracy[:, i].mean()),
+                'accuracy_std': float(accuracy[:, i].std()),
+                'f1_macro': float(f1[:, i].mean()),
+                'f1_std': float(f1[:, i].std())
             })
-            
-            print(f"k={k}: Accuracy={accuracy:.4f}")
+            print(f"k={k}: Accuracy={results[-1]['accuracy']:.4f} F1={results[-1]['f1_macro']:.4f}")
         
-        # Find best k
-        best_result = max(results, key=lambda x: x['accuracy'])
+        # Accuracy tertinggi; seri dipecah dengan F1 lalu k terkecil
+        best_result = max(results, key=lambda x: (x['accuracy'], x['f1_macro'], -x['k']))
         print(f"\nBest k={best_result['k']} with accuracy={best_result['accuracy']:.4f}")
         
         return {
             'results': results,
             'best_k': best_result['k'],
-            'best_accuracy': best_result['accuracy']
+            'best_accuracy': best_result['accuracy'],
+            'best_f1': best_result['f1_macro'],
+            'n_splits': len(scores),
+            'seconds': time.perf_counter() - start
         }
     
-    def save(self, directory: str = 'models'):
+    @staticmethod
+    def _score_fold(X, y: np.ndarray, fit: np.ndarray, held_out: np.ndarray,
+                    k_values: List[int], metric: str) -> Dict:
+        """
+        _score_k_values untuk satu fold cross-validation (dijalankan di proses worker)
+        """
+        return KNNClassifier._score_k_values(X[fit], y[fit], X[held_out], y[held_out],
+                                             k_values, metric)
+    
+    @staticmethod
+    def _score_k_values(X_fit, y_fit, X_eval, y_eval, k_values: List[int], metric: str) -> Dict:
+        """
+        Accuracy dan F1 (macro) untuk setiap k dari satu pencarian tetangga k terbesar
+        """
+        max_k = max(k_values)
+        if metric == 'cosine':
+            distances, indices = SparseKNNIndex(n_neighbors=max_k).fit(X_fit, y_fit).kneighbors(X_eval)
+        else:
+            distances, indices = KNeighborsClassifier(
+                n_neighbors=max_k, metric=metric
+            ).fit(X_fit, y_fit).kneighbors(X_eval)
+        
+        # Label sebagai index ke gabungan kelas training dan validasi
+        classes, encoded = np.unique(np.concatenate([y_fit, y_eval]), return_inverse=True)
+        neighbor_labels = encoded[:len(y_fit)][indices]
+        y_true = encoded[len(y_fit):]
+        n_classes = len(classes)
+        
+        accuracy, f1 = [], []
+        for k in k_values:
+            probabilities = distance_vote(distances[:, :k], neighbor_labels[:, :k], n_classes)
+            y_pred = np.argmax(probabilities, axis=1)
+            accuracy.append(float(np.mean(y_pred == y_true)))
+            
+            # F1 macro (sama dengan f1_score(average='macro', zero_division=0))
+            tp = np.bincount(y_true[y_pred == y_true], minlength=n_classes)
+            predicted = np.bincount(y_pred, minlength=n_classes)
+            actual = np.bincount(y_true, minlength=n_classes)
+            present = (predicted + actual) > 0
+            f1.append(float(np.mean(2 * tp[present] / (predicted + actual)[present])))
+        
+        return {'accuracy': accuracy, 'f1_macro': f1}
+    
+    def set_k(self, k: int):
+        """
+        Ganti jumlah tetangga (dipakai sebelum train, misalnya dengan best_k
+        hasil find_optimal_k)
+        """
+        self.k = k
+        self.classifier.set_params(n_neighbors=k)
+        if self.index is not None:
+            self.index.n_neighbors = k
+        if self.training_info:
+            self.training_info['k_value'] = k
+    
+    def save(self, directory: str = 'models', mmap: bool = True):
         """
         Simpan model, preprocessor, dan feature extractor
+        
+        Args:
+            directory: Direktori model
+            mmap: Simpan matrix training, label, dan IDF sebagai file .npy
+                  mentah (arrays/) yang di-load dengan memory-map, sehingga
+                  semua worker memakai satu salinan fisik; vectorizer TF-IDF
+                  dalam format biner (tfidf_vectorizer/); False = format
+                  joblib lama
         """
         if not self.is_trained:
             raise ValueError("Model belum di-train. Tidak ada yang bisa disimpan.")
         
         os.makedirs(directory, exist_ok=True)
         
-        # Simpan classifier
-        classifier_path = os.path.join(directory, 'knn_classifier.joblib')
-        joblib.dump(self.classifier, classifier_path)
-        
-        # Simpan feature extractor (vectorizer)
-        vectorizer_path = os.path.join(directory, 'tfidf_vectorizer.joblib')
-        self.feature_extractor.save(vectorizer_path)
+        # Simpan feature extractor (vectorizer); format mmap memakai format
+        # biner untuk TF-IDF, file format lain dihapus agar load tidak ambigu
+        binary = mmap and self.feature_backend == 'tfidf'
+        vectorizer_path = self._vectorizer_path(directory, self.feature_backend, binary)
+        if binary:
+            stale_path = self._vectorizer_path(directory, self.feature_backend)
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+            shutil.rmtree(vectorizer_path, ignore_errors=True)
+            self.feature_extractor.save_binary(vectorizer_path)
+        else:
+            shutil.rmtree(self._vectorizer_path(directory, self.feature_backend, binary=True),
+                          ignore_errors=True)
+            self.feature_extractor.save(vectorizer_path)
         
-        # Simpan metadata
-        metadata_path = os.path.join(directory, 'model_metadata.joblib')
         metadata = {
             'k': self.k,
             'metric': self.metric,
+            'feature_backend': self.feature_backend,
+            'index_backend': self.index_backend,
+            'index_params': self.index_params,
             'classes': self.classes,
-            'training_info': self.training_info
+            'training_info': self.training_info,
+            'dtype': self.dtype.name,
+            'format': 'mmap' if mmap else 'joblib'
         }
+        if mmap:
+            self._save_arrays(directory)
+            metadata['n_documents'] = self.feature_extractor.n_documents
+        else:
+            self._save_joblib(directory)
+        
+        # Metadata ditulis terakhir: menentukan format yang dibaca load()
+        metadata_path = os.path.join(directory, 'model_metadata.joblib')
         joblib.dump(metadata, metadata_path)
         
         print(f"Model saved to {directory}/")
     
-    def load(self, directory: str = 'models'):
+    def _training_arrays(self) -> Tuple[sp.csr_matrix, np.ndarray]:
         """
-        Load model dari file
+        Matrix dan label yang dipakai pencarian tetangga (untuk cosine: _fit_X
+        index yang sudah dinormalisasi, jadi load tidak perlu menyalinnya)
         """
-        # Load classifier
-        classifier_path = os.path.join(directory, 'knn_classifier.joblib')
-        self.classifier = joblib.load(classifier_path)
+        if self.index is not None:
+            return self.index._fit_X, self.index.classes_[self.index._y]
+        if self.X_train is not None:
+            return self.X_train, self.y_train
+        return self.classifier._fit_X, self.classifier.classes_[self.classifier._y]
+    
+    def _save_joblib(self, directory: str):
+        """
+        Format lama: classifier sklearn dan data training dalam file joblib
+        """
+        shutil.rmtree(os.path.join(directory, 'arrays'), ignore_errors=True)
         
-        # Load feature extractor
-        vectorizer_path = os.path.join(directory, 'tfidf_vectorizer.joblib')
-        self.feature_extractor.load(vectorizer_path)
+        # Classifier sklearn tidak di-fit jika index yang dipakai: fit salinan
+        # sementara hanya untuk file joblib
+        classifier = self.classifier
+        if not hasattr(classifier, '_fit_X'):
+            classifier = clone(classifier).fit(*self._training_arrays())
         
+        # Simpan classifier
+        classifier_path = os.path.join(directory, 'knn_classifier.joblib')
+        joblib.dump(classifier, classifier_path)
+        
+        # Simpan data training + statistik df untuk partial_fit
+        state_path = os.path.join(directory, 'training_state.joblib')
+        if self.train_counts is not None and self.feature_extractor.document_frequency is not None:
+            joblib.dump({
+                'train_counts': self.train_counts,
+                'y_train': self.y_train,
+                'train_ids': self.train_ids,
+                'document_frequency': self.feature_extractor.document_frequency,
+                'n_documents': self.feature_extractor.n_documents,
+                'idf': self.feature_extractor.idf_
+            }, state_path, compress=3)
+        elif os.path.exists(state_path):
+            os.remove(state_path)
+    
+    def _save_arrays(self, directory: str):
+        """
+        Format memory-mapped: satu file .npy (tanpa pickle) per array
+        """
+        for name in ('knn_classifier.joblib', 'training_state.joblib'):
+            if os.path.exists(os.path.join(directory, name)):
+                os.remove(os.path.join(directory, name))
+        
+        # File lama dihapus dulu; proses yang masih me-map-nya tetap aman
+        arrays_dir = os.path.join(directory, 'arrays')
+        shutil.rmtree(arrays_dir, ignore_errors=True)
+        os.makedirs(arrays_dir)
+        
+        X, y = self._training_arrays()
+        arrays = _csr_arrays('X', X)
+        arrays['y_train'] = np.asarray(y).astype(str)
+        if self.train_ids is not None:
+            arrays['train_ids'] = self.train_ids
+        if isinstance(self.index, RandomProjectionIndex):
+            arrays['lsh_order'] = self.index._order
+            arrays['lsh_codes'] = self.index._sorted_codes
+        
+        # Data training + statistik df untuk partial_fit
+        extractor = self.feature_extractor
+        if self.train_counts is not None and extractor.document_frequency is not None:
+            arrays.update(_csr_arrays('counts', self.train_counts))
+            arrays['document_frequency'] = extractor.document_frequency
+            arrays['idf'] = extractor.idf_
+        
+        for name, array in arrays.items():
+            np.save(os.path.join(arrays_dir, f'{name}.npy'), np.asarray(array), allow_pickle=False)
+    
+    @staticmethod
+    def _vectorizer_path(directory: str, feature_backend: str, binary: bool = False) -> str:
+        """
+        Lokasi file feature extractor untuk backend tertentu
+        
+        Args:
+            binary: Lokasi direktori format biner TF-IDF (lihat
+                    FeatureExtractor.save_binary)
+        """
+        if feature_backend == 'hashing':
+            return os.path.join(directory, 'hashing_vectorizer.npz')
+        if binary:
+            return os.path.join(directory, 'tfidf_vectorizer')
+        return os.path.join(directory, 'tfidf_vectorizer.joblib')
+    
+    def load(self, directory: str = 'models'):
+        """
+        Load model dari file (format memory-mapped atau joblib lama)
+        """
         # Load metadata
         metadata_path = os.path.join(directory, 'model_metadata.joblib')
         metadata = joblib.load(metadata_path)
         
+        # Load feature extractor (model lama selalu tfidf float64)
+        self.feature_backend = metadata.get('feature_backend', 'tfidf')
+        self.dtype = np.dtype(metadata.get('dtype', 'float64'))
+        self.feature_extractor = self._create_feature_extractor(self.feature_backend, self.dtype)
+        binary_path = self._vectorizer_path(directory, self.feature_backend, binary=True)
+        if self.feature_backend == 'tfidf' and os.path.isdir(binary_path):
+            self.feature_extractor.load_binary(binary_path)
+        else:
+            self.feature_extractor.load(self._vectorizer_path(directory, self.feature_backend))
+        
         self.k = metadata['k']
         self.metric = metadata['metric']
         self.classes = metadata['classes']
         self.training_info = metadata['training_info']
         
+        self.index_backend = metadata.get('index_backend', 'exact')
+        self.index_params = metadata.get('index_params', {})
+        self.index = self._create_index(self.index_backend, self.k, self.metric, self.index_params,
+                                        self.dtype)
+        
+        if metadata.get('format') == 'mmap':
+            self._load_arrays(directory, metadata)
+        else:
+            self._load_joblib(directory)
+        
         self.is_trained = True
         
         print(f"Model loaded from {directory}/")
+    
+    def _load_joblib(self, directory: str):
+        """
+        Format lama: setiap proses memegang salinan privat semua data
+        """
+        # Load classifier
+        classifier_path = os.path.join(directory, 'knn_classifier.joblib')
+        self.classifier = joblib.load(classifier_path)
+        
+        # Index dibangun dari data yang tersimpan di classifier sklearn, lalu
+        # classifier sklearn dilepas agar data training tidak tersimpan dua kali
+        if self.index is not None:
+            self.index.fit(self.classifier._fit_X,
+                           self.classifier.classes_[self.classifier._y])
+            self.classifier = clone(self.classifier)
+        
+        # Data training untuk partial_fit (model lama tidak punya)
+        self.train_counts = self.X_train = self.y_train = self.train_ids = None
+        state_path = os.path.join(directory, 'training_state.joblib')
+        if os.path.exists(state_path):
+            state = joblib.load(state_path)
+            extractor = self.feature_extractor
+            extractor.document_frequency = state['document_frequency']
+            extractor.n_documents = state['n_documents']
+            extractor.set_idf(state['idf'])
+            
+            self.train_counts = state['train_counts']
+            self.y_train = state['y_train']
+            self.train_ids = state['train_ids']
+            self.X_train = extractor.weight_counts(self.train_counts)
+    
+    def _load_arrays(self, directory: str, metadata: Dict):
+        """
+        Format memory-mapped: array read-only langsung dari page cache, tanpa
+        unpickle dan tanpa salinan per proses (kecuali sklearn untuk metric
+        selain cosine)
+        """
+        arrays_dir = os.path.join(directory, 'arrays')
+        arrays = {
+            name[:-len('.npy')]: np.load(os.path.join(arrays_dir, name), mmap_mode='r')
+            for name in os.listdir(arrays_dir) if name.endswith('.npy')
+        }
+        
+        X = _csr_from_arrays(arrays, 'X')
+        y = arrays['y_train']
+        self.classifier = KNeighborsClassifier(n_neighbors=self.k, metric=self.metric,
+                                               weights='distance')
+        if isinstance(self.index, RandomProjectionIndex) and 'lsh_order' in arrays:
+            self.index.fit(X, y, normalized=True,
+                           tables=(arrays['lsh_order'], arrays['lsh_codes']))
+        elif self.index is not None:
+            self.index.fit(X, y, normalized=True)
+        else:
+            self.classifier.fit(X, y)
+        
+        self.X_train = X
+        self.y_train = y
+        self.train_ids = arrays.get('train_ids')
+        
+        # Data training untuk partial_fit
+        self.train_counts = None
+        if 'counts_data' in arrays:
+            extractor = self.feature_extractor
+            # Di-update in-place oleh partial_fit, jadi perlu salinan yang writable
+            extractor.document_frequency = np.array(arrays['document_frequency'])
+            extractor.n_documents = metadata['n_documents']
+            extractor.set_idf(arrays['idf'])
+            self.train_counts = _csr_from_arrays(arrays, 'counts')
@@ -16,9 +16,40 @@ class Config:
     
     # KNN Model Settings
     KNN_K_VALUE = 5
+    K_SEARCH_MAX_K = 20  # Pencarian k optimal (opsi di halaman /train): k = 1..K_SEARCH_MAX_K
+    K_SEARCH_CV_FOLDS = 5
+    K_SEARCH_N_JOBS = int(os.getenv('K_SEARCH_N_JOBS', -1))  # Proses worker (memori + start-up per proses), -1 = semua core
+    CV_FOLDS = 5  # Cross-validation (opsi di halaman /train), TF-IDF di-fit ulang per fold
+    CV_N_JOBS = int(os.getenv('CV_N_JOBS', -1))  # Proses worker (memori + start-up per proses), -1 = semua core
     TEST_SIZE = 0.2
+    STREAM_CHUNK_SIZE = 500  # Baris Abstract per chunk untuk training/klasifikasi batch
+    FEATURE_BACKEND = os.getenv('FEATURE_BACKEND', 'tfidf')  # 'tfidf' atau 'hashing' (IDF online)
+    IDF_DRIFT_THRESHOLD = 0.05  # Training incremental: weight ulang semua data jika IDF bergeser > 5%
+    KNN_INDEX = os.getenv('KNN_INDEX', 'exact')  # 'exact' atau 'lsh' (approximate, untuk corpus sangat besar)
+    LSH_N_TABLES = int(os.getenv('LSH_N_TABLES', 16))  # Lebih banyak tabel = recall naik, query lebih lambat
+    LSH_N_BITS = int(os.getenv('LSH_N_BITS', 14))  # Lebih banyak bit = bucket lebih kecil, recall turun
     RANDOM_STATE = 42
     
+    # Model Registry Settings
+    MODEL_DIR = os.getenv('MODEL_DIR', 'models')  # versions/<versi>/ + pointer CURRENT
+    MODEL_KEEP_VERSIONS = int(os.getenv('MODEL_KEEP_VERSIONS', 5))  # Versi lama yang disimpan untuk rollback
+    MODEL_CHECK_INTERVAL = 2.0  # Detik antar pengecekan versi baru oleh proses serving
+    
+    # Prediction Cache Settings (/classify dan /upload, per proses)
+    PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', 1024))  # Maksimal teks, 0 = nonaktif
+    PREDICTION_CACHE_TTL = float(os.getenv('PREDICTION_CACHE_TTL', 3600))  # Detik; dibuang juga saat versi model berubah
+    
+    # Preprocessing Settings
+    # Muat resource Sastrawi saat import app (pakai bersama gunicorn --preload)
+    PRELOAD_NLP_RESOURCES = os.getenv('PRELOAD_NLP_RESOURCES', '0') == '1'
+    PREPROCESS_N_JOBS = int(os.getenv('PREPROCESS_N_JOBS', 1))  # -1 = semua core
+    PREPROCESS_CHUNK_SIZE = 32  # Teks per chunk yang dikirim ke worker
+    PREPROCESS_MIN_PARALLEL_BATCH = 200  # Batch lebih kecil selalu serial
+    USE_TOKEN_TABLE = True  # Satu lookup dict per token (filter + stopword + stem)
+    TOKEN_TABLE_SIZE = 100000  # Maksimal entri tabel token
+    STEM_CACHE_SIZE = 50000  # Maksimal kata di cache stemming
+    STEM_CACHE_PATH = os.getenv('STEM_CACHE_PATH', 'models/stem_cache.joblib')  # Kosongkan untuk non-persisten
+    
     # Scraping Settings
     BASE_URL = 'https://ejournal.unesa.ac.id/index.php/it-edu'
     START_YEAR = 2024
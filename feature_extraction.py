@@ -3,12 +3,102 @@ Modul untuk feature extraction menggunakan TF-IDF dan cosine similarity
 """
 import numpy as np
 import pandas as pd
-from typing import List, Tuple, Dict
-from sklearn.feature_extraction.text import TfidfVectorizer
+from typing import Iterable, Iterator, List, Tuple, Dict
+from itertools import islice
+from collections.abc import Mapping
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+from sklearn.utils import murmurhash3_32
+from sklearn.utils.extmath import safe_sparse_dot
+import scipy.sparse as sp
 import joblib
+from joblib import Parallel, delayed
+import json
 import os
 
+from preprocessing import TokenCorpus, Vocabulary
+
+
+def _as_csr(matrix) -> sp.csr_matrix:
+    """
+    Matrix sebagai CSR (tanpa konversi jika sudah CSR)
+    """
+    return matrix if sp.isspmatrix_csr(matrix) else sp.csr_matrix(matrix)
+
+
+def _top_row_entries(matrix: sp.csr_matrix, top_n: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Top-N entri positif per baris CSR, langsung dari array data/indices
+    
+    Ambang score ke-N dicari dengan partial selection O(nnz); hanya kandidat
+    di atas ambang (termasuk yang seri) yang diurutkan: score tertinggi dulu,
+    seri berdasarkan index kolom.
+    
+    Yields:
+        Tuple (columns, scores) per baris
+    """
+    data, indices, indptr = matrix.data, matrix.indices, matrix.indptr
+    for row in range(matrix.shape[0]):
+        scores = data[indptr[row]:indptr[row + 1]]
+        columns = indices[indptr[row]:indptr[row + 1]]
+        
+        if len(scores) > top_n > 0:
+            kth = len(scores) - top_n
+            candidates = scores >= np.partition(scores, kth)[kth]
+            scores, columns = scores[candidates], columns[candidates]
+        
+        order = np.lexsort((columns, -scores))[:top_n]
+        order = order[scores[order] > 0]
+        yield columns[order], scores[order]
+
+
+class SortedVocabulary(Mapping):
+    """
+    Vocabulary vectorizer (term -> kolom) di atas array term yang terurut
+    
+    Pengganti dict vocabulary_ TfidfVectorizer untuk format biner: lookup
+    dengan binary search pada array (boleh memory-mapped), jadi load tidak
+    perlu membangun dict berisi semua term.
+    """
+    
+    def __init__(self, terms: np.ndarray):
+        """
+        Args:
+            terms: Array string terurut; posisi term = index kolom fitur
+        """
+        self.terms = terms
+    
+    def __getitem__(self, term: str) -> int:
+        i = int(np.searchsorted(self.terms, term))
+        if i < len(self.terms) and self.terms[i] == term:
+            return i
+        raise KeyError(term)
+    
+    def __contains__(self, term) -> bool:
+        try:
+            self[term]
+        except (KeyError, TypeError):
+            return False
+        return True
+    
+    def __len__(self) -> int:
+        return len(self.terms)
+    
+    def __iter__(self) -> Iterator[str]:
+        return (str(term) for term in self.terms)
+    
+    def lookup(self, terms: List[str]) -> np.ndarray:
+        """
+        Kolom untuk banyak term sekaligus (satu searchsorted), -1 jika tidak ada
+        """
+        terms = np.asarray(terms, dtype=str)
+        if len(self.terms) == 0:
+            return np.full(len(terms), -1, dtype=np.int64)
+        
+        columns = np.minimum(np.searchsorted(self.terms, terms), len(self.terms) - 1)
+        return np.where(self.terms[columns] == terms, columns, -1)
+
 
 class FeatureExtractor:
     """
@@ -21,14 +111,18 @@ class FeatureExtractor:
     - Cosine similarity untuk perhitungan jarak antar dokumen
     """
     
-    def __init__(self, max_features: int = 1000, ngram_range: Tuple[int, int] = (1, 2)):
+    def __init__(self, max_features: int = 1000, ngram_range: Tuple[int, int] = (1, 2),
+                 dtype=np.float64):
         """
         Args:
             max_features: Jumlah maksimal fitur (kata) yang akan digunakan
             ngram_range: Range untuk n-gram (unigram dan bigram)
+            dtype: Tipe nilai matrix count dan TF-IDF (np.float32 = setengah
+                   memori, dipakai KNNClassifier untuk serving)
         """
         self.max_features = max_features
         self.ngram_range = ngram_range
+        self.dtype = np.dtype(dtype)
         
         # Inisialisasi TF-IDF Vectorizer
         # Sesuai rumus: TF(d,t) = f(d,t) dan IDF(t) = log(N/df(t))
@@ -40,26 +134,48 @@ class FeatureExtractor:
             sublinear_tf=False,  # TF(d,t) = f(d,t) - raw count, bukan logaritmik
             use_idf=True,  # Gunakan IDF: log(N/df(t))
             smooth_idf=True,  # IDF = log((N+1)/(df(t)+1)) + 1 untuk hindari divide-by-zero
-            norm='l2'  # Normalisasi L2 untuk cosine similarity
+            norm='l2',  # Normalisasi L2 untuk cosine similarity
+            dtype=self.dtype
         )
         
         self.is_fitted = False
         self.feature_names = None
+        
+        # Vocabulary berisi token penyusun fitur, untuk transform_corpus
+        self.token_vocabulary = None
+        
+        # Key n-gram fitur dalam token_vocabulary: (vocabulary, len, keys)
+        self._feature_keys_cache = None
+        
+        # Statistik document frequency per fitur untuk update IDF incremental
+        # (None jika tidak diketahui, misalnya setelah fit() dari generator)
+        self.document_frequency = None
+        self.n_documents = 0
     
-    def fit(self, texts: List[str]) -> 'FeatureExtractor':
+    def fit(self, texts: Iterable[str]) -> 'FeatureExtractor':
         """
         Fit vectorizer pada corpus teks
         
         Args:
-            texts: List of preprocessed texts (as strings)
+            texts: List (atau generator) of preprocessed texts (as strings);
+                   generator hanya dibaca sekali
         """
         self.vectorizer.fit(texts)
+        self.document_frequency = None
+        self.n_documents = 0
+        self._set_fitted()
+        
+        return self
+    
+    def _set_fitted(self):
+        """
+        Tandai sudah di-fit dan siapkan atribut turunan dari vocabulary vectorizer
+        """
         self.is_fitted = True
         self.feature_names = self.vectorizer.get_feature_names_out()
+        self.token_vocabulary = self._build_token_vocabulary()
         
         print(f"TF-IDF Vectorizer fitted with {len(self.feature_names)} features")
-        
-        return self
     
     def transform(self, texts: List[str]) -> np.ndarray:
         """
@@ -74,21 +190,346 @@ class FeatureExtractor:
         if not self.is_fitted:
             raise ValueError("Vectorizer belum di-fit. Jalankan fit() terlebih dahulu.")
         
+        vocabulary = self.vectorizer.vocabulary_
+        if isinstance(vocabulary, SortedVocabulary):
+            return self.weight_counts(self._count_terms(texts, vocabulary))
+        
         tfidf_matrix = self.vectorizer.transform(texts)
         return tfidf_matrix
     
+    def _count_terms(self, texts: List[str], vocabulary: SortedVocabulary) -> sp.csr_matrix:
+        """
+        Matrix raw count via analyzer vectorizer dan lookup vocabulary per batch
+        
+        Untuk vocabulary format biner: lookup satu per satu lewat Mapping
+        jauh lebih lambat daripada dict, jadi semua term di-lookup sekaligus.
+        """
+        analyze = self.vectorizer.build_analyzer()
+        terms, lengths = [], []
+        for text in texts:
+            features = analyze(text)
+            terms.extend(features)
+            lengths.append(len(features))
+        
+        columns = vocabulary.lookup(terms)
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        known = columns >= 0
+        counts = sp.csr_matrix(
+            (np.ones(known.sum(), dtype=self.dtype), (rows[known], columns[known])),
+            shape=(len(lengths), len(vocabulary))
+        )
+        counts.sum_duplicates()
+        return counts
+    
+    def transform_stream(self, text_chunks: Iterable[List[str]]) -> Iterator:
+        """
+        Transform per chunk, menghasilkan satu sparse matrix per chunk
+        
+        Args:
+            text_chunks: Iterable berisi list of preprocessed texts per chunk
+        """
+        for texts in text_chunks:
+            yield self.transform(texts)
+    
     def fit_transform(self, texts: List[str]) -> np.ndarray:
         """
         Fit dan transform sekaligus
         """
         tfidf_matrix = self.vectorizer.fit_transform(texts)
-        self.is_fitted = True
-        self.feature_names = self.vectorizer.get_feature_names_out()
+        self._set_fitted()
         
-        print(f"TF-IDF Vectorizer fitted with {len(self.feature_names)} features")
+        # Pola non-zero TF-IDF sama dengan raw count (IDF selalu >= 1)
+        self.document_frequency = np.bincount(tfidf_matrix.indices, minlength=tfidf_matrix.shape[1])
+        self.n_documents = tfidf_matrix.shape[0]
         
         return tfidf_matrix
     
+    def _build_token_vocabulary(self) -> Vocabulary:
+        """
+        Vocabulary dari token penyusun fitur (token lain tidak berpengaruh ke TF-IDF)
+        """
+        return Vocabulary(sorted({
+            token for feature in self.feature_names for token in feature.split(' ')
+        }))
+    
+    def _corpus_ngrams(self, corpus: TokenCorpus, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Semua n-gram dalam corpus sebagai (row, key)
+        
+        Key n-gram = id token dalam basis len(vocabulary), jadi setiap n-gram
+        punya satu integer unik tanpa membentuk string.
+        """
+        ids = np.frombuffer(corpus.ids, dtype=np.uint32).astype(np.int64)
+        offsets = np.frombuffer(corpus.offsets, dtype=np.uint64).astype(np.int64)
+        lengths = np.diff(offsets)
+        base = len(corpus.vocabulary)
+        
+        if base ** n >= 2 ** 63:
+            raise ValueError(f"Vocabulary terlalu besar untuk {n}-gram key")
+        
+        # Posisi awal n-gram yang tidak melewati batas dokumen
+        n_grams_per_doc = np.maximum(lengths - n + 1, 0)
+        rows = np.repeat(np.arange(len(corpus)), n_grams_per_doc)
+        starts = np.repeat(offsets[:-1], n_grams_per_doc) + (
+            np.arange(len(rows)) - np.repeat(np.cumsum(n_grams_per_doc) - n_grams_per_doc, n_grams_per_doc)
+        )
+        
+        keys = np.zeros(len(rows), dtype=np.int64)
+        for i in range(n):
+            keys = keys * base + ids[starts + i]
+        
+        return rows, keys
+    
+    @staticmethod
+    def _decode_keys(keys: np.ndarray, n: int, vocabulary: Vocabulary) -> List[str]:
+        """
+        Key n-gram (lihat _corpus_ngrams) -> string n-gram, token dipisah spasi
+        """
+        tokens = np.array(vocabulary.tokens, dtype=object)
+        base = len(vocabulary)
+        
+        parts = []
+        remaining = keys.copy()
+        for _ in range(n):
+            parts.append(tokens[remaining % base])
+            remaining //= base
+        return [' '.join(words[::-1]) for words in zip(*parts)]
+    
+    def _corpus_counts(self, corpus: TokenCorpus, terms_by_n: Dict[int, Tuple[np.ndarray, np.ndarray]]):
+        """
+        Matrix jumlah kemunculan fitur (raw count) untuk setiap dokumen corpus
+        
+        Args:
+            terms_by_n: {n: (sorted_keys, columns)} fitur yang dihitung
+        """
+        n_features = len(self.feature_names)
+        all_rows, all_cols = [], []
+        
+        for n, (sorted_keys, columns) in terms_by_n.items():
+            rows, keys = self._corpus_ngrams(corpus, n)
+            if len(sorted_keys) == 0 or len(keys) == 0:
+                continue
+            
+            positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+            found = sorted_keys[positions] == keys
+            all_rows.append(rows[found])
+            all_cols.append(columns[positions[found]])
+        
+        rows = np.concatenate(all_rows) if all_rows else np.zeros(0, dtype=np.int64)
+        cols = np.concatenate(all_cols) if all_cols else np.zeros(0, dtype=np.int64)
+        
+        counts = sp.csr_matrix(
+            (np.ones(len(rows), dtype=self.vectorizer.dtype), (rows, cols)),
+            shape=(len(corpus), n_features)
+        )
+        counts.sum_duplicates()
+        return counts
+    
+    def _feature_keys(self, vocabulary: Vocabulary) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Key n-gram (dalam vocabulary corpus) untuk setiap fitur yang sudah di-fit
+        """
+        base = len(vocabulary)
+        keys_by_n = {}
+        
+        # tolist(): str biasa, jauh lebih cepat daripada iterasi np.str_ (format biner)
+        for column, feature in enumerate(self.feature_names.tolist()):
+            ids = [vocabulary.get(token) for token in feature.split(' ')]
+            if Vocabulary.UNKNOWN_ID in ids:
+                continue  # Token fitur tidak pernah muncul di corpus ini
+            
+            key = 0
+            for token_id in ids:
+                key = key * base + token_id
+            keys_by_n.setdefault(len(ids), []).append((key, column))
+        
+        terms_by_n = {}
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            pairs = sorted(keys_by_n.get(n, []))
+            terms_by_n[n] = (
+                np.array([key for key, _ in pairs], dtype=np.int64),
+                np.array([column for _, column in pairs], dtype=np.int64)
+            )
+        return terms_by_n
+    
+    def weight_counts(self, counts, idf: np.ndarray = None):
+        """
+        Raw count -> TF-IDF ter-normalisasi L2 (sama dengan vectorizer.transform)
+        
+        Args:
+            counts: Matrix raw count (lihat count_corpus)
+            idf: Bobot IDF (default IDF aktif vectorizer)
+        """
+        if idf is None:
+            idf = self.vectorizer.idf_
+        counts = sp.csr_matrix(counts, dtype=self.dtype)
+        tfidf = counts @ sp.diags(idf.astype(self.dtype, copy=False))
+        return normalize(tfidf, norm=self.vectorizer.norm, copy=False)
+    
+    def count_corpus(self, corpus: TokenCorpus):
+        """
+        Matrix raw count fitur yang sudah di-fit untuk setiap dokumen corpus
+        """
+        if not self.is_fitted:
+            raise ValueError("Vectorizer belum di-fit. Jalankan fit() terlebih dahulu.")
+        
+        return self._corpus_counts(corpus, self._cached_feature_keys(corpus.vocabulary))
+    
+    def _cached_feature_keys(self, vocabulary: Vocabulary) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """
+        _feature_keys, di-cache untuk token_vocabulary milik extractor ini
+        
+        Corpus query (mis. satu dokumen per request /classify) dibuat dengan
+        token_vocabulary, jadi key semua fitur cukup dihitung sekali setelah
+        fit/load. Token baru (grow=True) mengubah basis key sehingga cache
+        dihitung ulang; fit/load membuat token_vocabulary baru.
+        """
+        if vocabulary is not self.token_vocabulary:
+            return self._feature_keys(vocabulary)
+        
+        cache = self._feature_keys_cache
+        if cache is None or cache[0] is not vocabulary or cache[1] != len(vocabulary):
+            cache = (vocabulary, len(vocabulary), self._feature_keys(vocabulary))
+            self._feature_keys_cache = cache
+        return cache[2]
+    
+    def transform_corpus(self, corpus: TokenCorpus):
+        """
+        Transform TokenCorpus menjadi TF-IDF vectors tanpa tokenisasi string
+        
+        Hasilnya sama dengan transform() pada preprocess_to_text dari dokumen
+        yang sama. Paling cepat jika corpus dibuat dengan token_vocabulary
+        milik extractor ini (grow=False).
+        """
+        return self.weight_counts(self.count_corpus(corpus))
+    
+    @property
+    def idf_(self) -> np.ndarray:
+        """
+        Bobot IDF aktif
+        """
+        return self.vectorizer.idf_
+    
+    def update_document_frequency(self, counts, remove: bool = False):
+        """
+        Tambahkan dokumen baru ke statistik document frequency
+        
+        IDF aktif tidak berubah sampai set_idf(compute_idf()) dipanggil, jadi
+        vektor lama dan baru tetap memakai bobot yang sama.
+        
+        Args:
+            counts: Matrix raw count dokumen
+            remove: Kurangi statistik dengan dokumen ini (baris training yang diganti)
+        """
+        if self.document_frequency is None:
+            raise ValueError("Statistik document frequency tidak tersedia. Lakukan training penuh.")
+        
+        counts = sp.csr_matrix(counts)
+        counts.sum_duplicates()
+        sign = -1 if remove else 1
+        self.document_frequency = self.document_frequency + sign * np.bincount(
+            counts.indices, minlength=counts.shape[1]
+        )
+        self.n_documents += sign * counts.shape[0]
+    
+    def compute_idf(self) -> np.ndarray:
+        """
+        IDF dari statistik document frequency saat ini (belum diaktifkan)
+        """
+        if self.document_frequency is None:
+            raise ValueError("Statistik document frequency tidak tersedia. Lakukan training penuh.")
+        
+        smooth = int(self.vectorizer.smooth_idf)
+        return np.log((self.n_documents + smooth) / (self.document_frequency + smooth)) + 1
+    
+    def set_idf(self, idf: np.ndarray):
+        """
+        Aktifkan bobot IDF baru untuk transform berikutnya
+        """
+        self.vectorizer.idf_ = idf
+    
+    def fit_corpus(self, corpus: TokenCorpus) -> 'FeatureExtractor':
+        """
+        Fit vectorizer langsung dari TokenCorpus
+        
+        Pemilihan fitur (min_df, max_df, max_features) dan IDF dihitung sama
+        persis dengan TfidfVectorizer.fit, sehingga save/load dan transform()
+        berbasis string tetap bekerja.
+        """
+        self.fit_transform_corpus(corpus)
+        return self
+    
+    def fit_transform_corpus(self, corpus: TokenCorpus):
+        """
+        Fit dan transform sekaligus dari TokenCorpus
+        """
+        return self.weight_counts(self.fit_counts_corpus(corpus))
+    
+    def fit_counts_corpus(self, corpus: TokenCorpus):
+        """
+        Fit vectorizer dari TokenCorpus dan kembalikan matrix raw count-nya
+        """
+        vectorizer = self.vectorizer
+        n_doc = len(corpus)
+        
+        # Hitung semua n-gram kandidat per dokumen
+        blocks, terms = [], []
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            rows, keys = self._corpus_ngrams(corpus, n)
+            unique_keys, columns = np.unique(keys, return_inverse=True)
+            blocks.append(sp.csr_matrix(
+                (np.ones(len(rows), dtype=np.int64), (rows, columns)),
+                shape=(n_doc, len(unique_keys))
+            ))
+            
+            # Decode key -> string n-gram (hanya untuk n-gram unik)
+            terms.extend(self._decode_keys(unique_keys, n, corpus.vocabulary))
+        
+        counts = sp.hstack(blocks, format='csr')
+        counts.sum_duplicates()
+        terms = np.array(terms, dtype=object)
+        
+        # Urutkan fitur secara alfabetis seperti TfidfVectorizer._sort_features
+        order = np.argsort(terms.astype(str), kind='stable')
+        counts = counts[:, order]
+        terms = terms[order]
+        
+        # Batasi fitur seperti TfidfVectorizer._limit_features
+        max_df, min_df = vectorizer.max_df, vectorizer.min_df
+        max_doc_count = max_df if isinstance(max_df, (int, np.integer)) else max_df * n_doc
+        min_doc_count = min_df if isinstance(min_df, (int, np.integer)) else min_df * n_doc
+        if max_doc_count < min_doc_count:
+            raise ValueError("max_df corresponds to < documents than min_df")
+        
+        dfs = np.bincount(counts.indices, minlength=counts.shape[1])
+        mask = (dfs <= max_doc_count) & (dfs >= min_doc_count)
+        if vectorizer.max_features is not None and mask.sum() > vectorizer.max_features:
+            tfs = np.asarray(counts.sum(axis=0)).ravel()
+            mask_inds = (-tfs[mask]).argsort()[:vectorizer.max_features]
+            new_mask = np.zeros(len(dfs), dtype=bool)
+            new_mask[np.where(mask)[0][mask_inds]] = True
+            mask = new_mask
+        
+        kept = np.where(mask)[0]
+        if len(kept) == 0:
+            raise ValueError(
+                "After pruning, no terms remain. Try a lower min_df or a higher max_df."
+            )
+        counts = counts[:, kept].astype(vectorizer.dtype)
+        
+        # IDF(t) = log((N+1)/(df(t)+1)) + 1, sama dengan TfidfTransformer (smooth_idf)
+        df = dfs[kept].astype(np.float64) + int(vectorizer.smooth_idf)
+        n_samples = n_doc + int(vectorizer.smooth_idf)
+        
+        vectorizer.vocabulary_ = {term: i for i, term in enumerate(terms[kept])}
+        vectorizer.idf_ = np.log(n_samples / df) + 1
+        self._set_fitted()
+        
+        self.document_frequency = dfs[kept]
+        self.n_documents = n_doc
+        
+        return counts
+    
     def get_feature_names(self) -> List[str]:
         """
         Dapatkan nama-nama fitur (kata-kata)
@@ -97,13 +538,16 @@ class FeatureExtractor:
             return []
         return list(self.feature_names)
     
-    def get_top_features(self, tfidf_vector: np.ndarray, top_n: int = 10) -> List[Tuple[str, float]]:
+    def get_top_features(self, tfidf_vector: np.ndarray, top_n: int = 10,
+                         text: str = None) -> List[Tuple[str, float]]:
         """
         Dapatkan top-N fitur dengan bobot TF-IDF tertinggi dari sebuah dokumen
         
         Args:
             tfidf_vector: TF-IDF vector untuk satu dokumen
             top_n: Jumlah top features yang ingin ditampilkan
+            text: Preprocessed text dokumen tersebut (hanya dipakai
+                  HashingFeatureExtractor untuk menamai kolom hash)
             
         Returns:
             List of (feature_name, tfidf_score) tuples
@@ -111,23 +555,31 @@ class FeatureExtractor:
         if not self.is_fitted:
             return []
         
-        # Jika input sparse matrix, convert ke array
-        if hasattr(tfidf_vector, 'toarray'):
-            tfidf_vector = tfidf_vector.toarray().flatten()
-        else:
-            tfidf_vector = tfidf_vector.flatten()
+        # Vektor dense dijadikan satu baris sparse (hanya fitur non-zero yang dipilih)
+        if not sp.issparse(tfidf_vector):
+            tfidf_vector = np.asarray(tfidf_vector).reshape(1, -1)
+        return self.get_top_features_batch(tfidf_vector, top_n, texts=[text])[0]
+    
+    def get_top_features_batch(self, tfidf_matrix, top_n: int = 10,
+                               texts: List[str] = None) -> List[List[Tuple[str, float]]]:
+        """
+        get_top_features untuk setiap baris matrix sekaligus
+        
+        Args:
+            tfidf_matrix: TF-IDF matrix (sparse), satu baris per dokumen
+            top_n: Jumlah top features per dokumen
+            texts: Preprocessed text per baris (hanya dipakai HashingFeatureExtractor)
         
-        # Dapatkan indices dengan score tertinggi
-        top_indices = tfidf_vector.argsort()[-top_n:][::-1]
+        Returns:
+            List (per baris) of list of (feature_name, tfidf_score) tuples
+        """
+        if not self.is_fitted:
+            return [[] for _ in range(tfidf_matrix.shape[0])]
         
-        # Dapatkan feature names dan scores
-        top_features = [
-            (self.feature_names[i], tfidf_vector[i])
-            for i in top_indices
-            if tfidf_vector[i] > 0
+        return [
+            [(self.feature_names[column], score) for column, score in zip(columns, scores)]
+            for columns, scores in _top_row_entries(_as_csr(tfidf_matrix), top_n)
         ]
-        
-        return top_features
     
     def save(self, filepath: str):
         """
@@ -148,10 +600,435 @@ class FeatureExtractor:
             raise FileNotFoundError(f"File {filepath} tidak ditemukan")
         
         self.vectorizer = joblib.load(filepath)
+        self.dtype = np.dtype(self.vectorizer.dtype)
         self.is_fitted = True
         self.feature_names = self.vectorizer.get_feature_names_out()
+        self.token_vocabulary = self._build_token_vocabulary()
+        
+        # Statistik df tidak ikut tersimpan (lihat KNNClassifier.save)
+        self.document_frequency = None
+        self.n_documents = 0
         
         print(f"Vectorizer loaded from {filepath}")
+    
+    # Parameter TfidfVectorizer yang ikut disimpan format biner (harus JSON-able)
+    BINARY_PARAMS = ('lowercase', 'token_pattern', 'ngram_range', 'analyzer', 'strip_accents',
+                     'stop_words', 'max_df', 'min_df', 'max_features', 'norm', 'use_idf',
+                     'smooth_idf', 'sublinear_tf')
+    
+    def save_binary(self, directory: str):
+        """
+        Simpan vectorizer dalam format biner yang bisa di-load via mmap
+        
+        Isi direktori:
+        - vocabulary.npy: term fitur (array unicode terurut = urutan kolom)
+        - tokens.npy: token penyusun fitur (untuk token_vocabulary)
+        - idf.npy: bobot IDF aktif dalam dtype extractor
+        - config.json: parameter vectorizer dan dtype
+        """
+        if not self.is_fitted:
+            raise ValueError("Vectorizer belum di-fit. Tidak ada yang bisa disimpan.")
+        
+        terms = np.asarray(self.feature_names, dtype=str)
+        if len(terms) > 1 and not np.all(terms[:-1] < terms[1:]):
+            raise ValueError("Fitur vectorizer tidak terurut; format biner butuh vocabulary terurut")
+        
+        os.makedirs(directory, exist_ok=True)
+        tokens = self.token_vocabulary.tokens[1:]
+        np.save(os.path.join(directory, 'vocabulary.npy'), terms)
+        np.save(os.path.join(directory, 'tokens.npy'), np.array(tokens, dtype=str))
+        np.save(os.path.join(directory, 'idf.npy'),
+                np.asarray(self.vectorizer.idf_).astype(self.dtype, copy=False))
+        
+        params = self.vectorizer.get_params()
+        config = {name: params[name] for name in self.BINARY_PARAMS}
+        config['dtype'] = self.dtype.str
+        with open(os.path.join(directory, 'config.json'), 'w') as f:
+            json.dump(config, f, indent=2)
+        
+        print(f"Vectorizer saved to {directory} (binary)")
+    
+    def load_binary(self, directory: str, mmap: bool = True):
+        """
+        Load vectorizer dari format biner (lihat save_binary)
+        
+        Vocabulary dan IDF dipakai langsung dari file (read-only, dibagi
+        antar proses lewat page cache); hanya token_vocabulary yang dibangun
+        di memori.
+        
+        Args:
+            directory: Direktori hasil save_binary
+            mmap: False untuk membaca array ke memori
+        """
+        config_path = os.path.join(directory, 'config.json')
+        if not os.path.exists(config_path):
+            raise FileNotFoundError(f"File {config_path} tidak ditemukan")
+        
+        with open(config_path) as f:
+            config = json.load(f)
+        self.dtype = np.dtype(config.pop('dtype'))
+        config['ngram_range'] = tuple(config['ngram_range'])
+        
+        mmap_mode = 'r' if mmap else None
+        terms = np.load(os.path.join(directory, 'vocabulary.npy'), mmap_mode=mmap_mode)
+        tokens = np.load(os.path.join(directory, 'tokens.npy'))
+        
+        self.max_features = config['max_features']
+        self.ngram_range = config['ngram_range']
+        self.vectorizer = TfidfVectorizer(**config, dtype=self.dtype)
+        self.vectorizer.vocabulary_ = SortedVocabulary(terms)
+        self.vectorizer.idf_ = np.load(os.path.join(directory, 'idf.npy'), mmap_mode=mmap_mode)
+        
+        self.is_fitted = True
+        self.feature_names = terms
+        self.token_vocabulary = Vocabulary(tokens.tolist())
+        
+        # Statistik df tidak ikut tersimpan (lihat KNNClassifier.save)
+        self.document_frequency = None
+        self.n_documents = 0
+        
+        print(f"Vectorizer loaded from {directory} (binary)")
+
+
+class HashingFeatureExtractor(FeatureExtractor):
+    """
+    Ekstraksi fitur TF-IDF dengan feature hashing dan IDF online
+    
+    Setiap kata/n-gram dipetakan ke salah satu dari n_features kolom lewat
+    hash (sama dengan HashingVectorizer), jadi tidak ada vocabulary yang harus
+    dibangun. Statistik IDF (jumlah dokumen N dan df per kolom) di-update
+    dengan partial_fit, sehingga abstrak baru bisa ditambahkan tanpa refit.
+    update_document_frequency hanya meng-update statistik; IDF aktif baru
+    berubah lewat set_idf (dipakai KNNClassifier.partial_fit).
+    
+    Rumus sama dengan FeatureExtractor:
+    - TF(d,t) = f(d,t)  -- raw count
+    - IDF(t) = log((N+1)/(df(t)+1)) + 1
+    - Kolom dengan df di luar [min_df, max_df] diberi bobot 0
+    
+    State yang disimpan hanya kolom dengan df > 0 (npz terkompresi).
+    """
+    
+    def __init__(self, n_features: int = 2 ** 18, ngram_range: Tuple[int, int] = (1, 2),
+                 min_df: int = 2, max_df: float = 0.8, dtype=np.float64):
+        """
+        Args:
+            n_features: Jumlah kolom hash
+            ngram_range: Range untuk n-gram (unigram dan bigram)
+            min_df: Minimal jumlah dokumen (int) atau proporsi (float)
+            max_df: Maksimal proporsi (float) atau jumlah dokumen (int)
+            dtype: Tipe nilai matrix count dan TF-IDF
+        """
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.max_features = None
+        self.min_df = min_df
+        self.max_df = max_df
+        self.dtype = np.dtype(dtype)
+        
+        self.vectorizer = self._build_vectorizer()
+        
+        # Statistik IDF online
+        self.reset()
+        
+        self.feature_names = None
+        
+        # Tidak ada vocabulary tetap; corpus query boleh menambah token baru
+        self.token_vocabulary = None
+        
+        # Cache string n-gram -> kolom hash untuk transform_corpus
+        self._bucket_cache = {}
+    
+    def _build_vectorizer(self) -> HashingVectorizer:
+        """
+        HashingVectorizer tanpa sign dan normalisasi: raw count, IDF dan L2 dihitung sendiri
+        """
+        return HashingVectorizer(
+            n_features=self.n_features,
+            ngram_range=self.ngram_range,
+            alternate_sign=False,
+            norm=None,
+            dtype=self.dtype
+        )
+    
+    def reset(self):
+        """
+        Hapus statistik IDF (dipakai sebelum fit ulang)
+        """
+        self.n_documents = 0
+        self.document_frequency = np.zeros(self.n_features, dtype=np.int64)
+        self._idf = None
+        self.is_fitted = False
+    
+    @property
+    def idf_(self) -> np.ndarray:
+        """
+        Bobot IDF aktif per kolom hash
+        """
+        if self._idf is None:
+            self._idf = self.compute_idf()
+        return self._idf
+    
+    def compute_idf(self) -> np.ndarray:
+        """
+        IDF dari statistik document frequency saat ini (belum diaktifkan)
+        """
+        max_doc_count = self.max_df if isinstance(self.max_df, (int, np.integer)) \
+            else self.max_df * self.n_documents
+        min_doc_count = self.min_df if isinstance(self.min_df, (int, np.integer)) \
+            else self.min_df * self.n_documents
+        
+        df = self.document_frequency
+        idf = np.log((self.n_documents + 1) / (df + 1)) + 1
+        idf[(df < min_doc_count) | (df > max_doc_count)] = 0
+        return idf
+    
+    def set_idf(self, idf: np.ndarray):
+        """
+        Aktifkan bobot IDF baru untuk transform berikutnya
+        """
+        self._idf = idf
+    
+    def update_document_frequency(self, counts, remove: bool = False):
+        """
+        Tambahkan document frequency dari matrix raw count (IDF aktif tetap)
+        
+        remove=True mengurangi statistik dengan dokumen tersebut.
+        """
+        counts.sum_duplicates()
+        sign = -1 if remove else 1
+        self.document_frequency += sign * np.bincount(counts.indices, minlength=self.n_features)
+        self.n_documents += sign * counts.shape[0]
+    
+    def partial_fit(self, texts: Iterable[str], chunk_size: int = 1000) -> 'HashingFeatureExtractor':
+        """
+        Update statistik IDF dengan dokumen baru (tanpa refit)
+        
+        Args:
+            texts: List (atau generator) of preprocessed texts
+            chunk_size: Jumlah teks yang di-hash sekaligus
+        """
+        iterator = iter(texts)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            self.update_document_frequency(self.vectorizer.transform(chunk))
+        
+        self._idf = None
+        self._set_fitted()
+        return self
+    
+    def partial_fit_corpus(self, corpus: TokenCorpus) -> 'HashingFeatureExtractor':
+        """
+        Update statistik IDF dari TokenCorpus
+        """
+        self.update_document_frequency(self.count_corpus(corpus))
+        self._idf = None
+        self._set_fitted()
+        return self
+    
+    def fit(self, texts: Iterable[str]) -> 'HashingFeatureExtractor':
+        """
+        Hitung statistik IDF dari awal
+        """
+        self.reset()
+        return self.partial_fit(texts)
+    
+    def _set_fitted(self):
+        """
+        Tandai sudah di-fit
+        """
+        self.is_fitted = True
+        
+        print(f"Hashing vectorizer: {self.n_documents} documents, "
+              f"{np.count_nonzero(self.document_frequency)} active features")
+    
+    def transform(self, texts: List[str]):
+        """
+        Transform teks menjadi TF-IDF vectors (n_texts, n_features)
+        """
+        if not self.is_fitted:
+            raise ValueError("Vectorizer belum di-fit. Jalankan fit() terlebih dahulu.")
+        
+        return self.weight_counts(self.vectorizer.transform(texts))
+    
+    def fit_transform(self, texts: List[str]):
+        """
+        Fit dan transform sekaligus (teks hanya di-hash sekali)
+        """
+        self.reset()
+        counts = self.vectorizer.transform(texts)
+        self.update_document_frequency(counts)
+        self._set_fitted()
+        
+        return self.weight_counts(counts)
+    
+    def weight_counts(self, counts, idf: np.ndarray = None):
+        """
+        Raw count -> TF-IDF ter-normalisasi L2, kolom ber-IDF 0 dibuang
+        
+        Args:
+            counts: Matrix raw count (lihat count_corpus)
+            idf: Bobot IDF (default IDF aktif)
+        """
+        if idf is None:
+            idf = self.idf_
+        counts = sp.csr_matrix(counts, dtype=self.dtype)
+        tfidf = sp.csr_matrix(counts @ sp.diags(idf.astype(self.dtype)))
+        tfidf.eliminate_zeros()
+        return normalize(tfidf, norm='l2', copy=False)
+    
+    def _bucket(self, term: str) -> int:
+        """
+        Kolom hash untuk satu n-gram (sama dengan FeatureHasher)
+        """
+        bucket = self._bucket_cache.get(term)
+        if bucket is None:
+            h = murmurhash3_32(term, seed=0)
+            if h == -2147483648:
+                bucket = (2147483647 - (self.n_features - 1)) % self.n_features
+            else:
+                bucket = abs(h) % self.n_features
+            
+            if len(self._bucket_cache) >= 1000000:
+                self._bucket_cache.clear()
+            self._bucket_cache[term] = bucket
+        return bucket
+    
+    def count_corpus(self, corpus: TokenCorpus):
+        """
+        Matrix raw count berbasis hash untuk setiap dokumen corpus
+        
+        Setiap n-gram unik di-decode dan di-hash sekali saja.
+        """
+        if len(corpus.ids) and min(corpus.ids) == Vocabulary.UNKNOWN_ID:
+            raise ValueError("TokenCorpus untuk hashing harus dibuat dengan grow=True")
+        
+        all_rows, all_cols = [], []
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            rows, keys = self._corpus_ngrams(corpus, n)
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            buckets = np.array(
+                [self._bucket(term) for term in self._decode_keys(unique_keys, n, corpus.vocabulary)],
+                dtype=np.int64
+            )
+            all_rows.append(rows)
+            all_cols.append(buckets[inverse])
+        
+        rows = np.concatenate(all_rows)
+        counts = sp.csr_matrix(
+            (np.ones(len(rows), dtype=self.dtype), (rows, np.concatenate(all_cols))),
+            shape=(len(corpus), self.n_features)
+        )
+        counts.sum_duplicates()
+        return counts
+    
+    def transform_corpus(self, corpus: TokenCorpus):
+        """
+        Transform TokenCorpus (dibuat dengan grow=True) menjadi TF-IDF vectors
+        """
+        if not self.is_fitted:
+            raise ValueError("Vectorizer belum di-fit. Jalankan fit() terlebih dahulu.")
+        
+        return self.weight_counts(self.count_corpus(corpus))
+    
+    def fit_counts_corpus(self, corpus: TokenCorpus):
+        """
+        Hitung statistik IDF dari awal dan kembalikan matrix raw count corpus
+        """
+        self.reset()
+        counts = self.count_corpus(corpus)
+        self.update_document_frequency(counts)
+        self._set_fitted()
+        
+        return counts
+    
+    def term_names(self, texts: Iterable[str]) -> Dict[int, str]:
+        """
+        Nama n-gram untuk kolom hash yang muncul di texts
+        
+        Hashing tidak menyimpan vocabulary, jadi nama kolom hanya bisa
+        diketahui dari teks yang mengandungnya.
+        """
+        analyzer = self.vectorizer.build_analyzer()
+        names = {}
+        for text in texts:
+            for term in analyzer(text):
+                names.setdefault(self._bucket(term), term)
+        return names
+    
+    def get_feature_names(self) -> List[str]:
+        """
+        Hashing tidak memiliki daftar nama fitur global
+        """
+        return []
+    
+    def get_top_features_batch(self, tfidf_matrix, top_n: int = 10,
+                               texts: List[str] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Top-N kolom dengan bobot tertinggi per baris, dinamai dari text
+        (preprocessed) baris tersebut
+        """
+        if not self.is_fitted:
+            return [[] for _ in range(tfidf_matrix.shape[0])]
+        
+        if texts is None:
+            texts = [None] * tfidf_matrix.shape[0]
+        
+        results = []
+        for (columns, scores), text in zip(_top_row_entries(_as_csr(tfidf_matrix), top_n), texts):
+            names = self.term_names([text]) if text else {}
+            results.append([(names.get(int(column), f'#{column}'), score)
+                            for column, score in zip(columns, scores)])
+        return results
+    
+    def save(self, filepath: str):
+        """
+        Simpan statistik IDF (hanya kolom dengan df > 0) ke file .npz
+        """
+        if not self.is_fitted:
+            raise ValueError("Vectorizer belum di-fit. Tidak ada yang bisa disimpan.")
+        
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        buckets = np.flatnonzero(self.document_frequency)
+        with open(filepath, 'wb') as f:
+            np.savez_compressed(
+                f,
+                buckets=buckets.astype(np.int32),
+                df=self.document_frequency[buckets].astype(np.int32),
+                n_docs=self.n_documents,
+                n_features=self.n_features,
+                ngram_range=np.array(self.ngram_range),
+                min_df=self.min_df,
+                max_df=self.max_df,
+                dtype=self.dtype.str
+            )
+        print(f"Hashing vectorizer saved to {filepath}")
+    
+    def load(self, filepath: str):
+        """
+        Load statistik IDF dari file .npz
+        """
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"File {filepath} tidak ditemukan")
+        
+        with np.load(filepath) as data:
+            self.n_features = int(data['n_features'])
+            self.ngram_range = tuple(int(n) for n in data['ngram_range'])
+            self.min_df = data['min_df'].item()
+            self.max_df = data['max_df'].item()
+            # File lama tanpa dtype selalu float64
+            self.dtype = np.dtype(str(data['dtype'])) if 'dtype' in data.files else np.dtype(np.float64)
+            self.vectorizer = self._build_vectorizer()
+            self._bucket_cache = {}
+            
+            self.reset()
+            self.document_frequency[data['buckets']] = data['df']
+            self.n_documents = int(data['n_docs'])
+        
+        self.is_fitted = True
+        print(f"Hashing vectorizer loaded from {filepath}")
 
 
 class SimilarityCalculator:
@@ -177,9 +1054,179 @@ class SimilarityCalculator:
             
         Returns:
             Similarity matrix (n_documents x n_documents)
+        
+        Matrix dense n x n hanya cocok untuk corpus kecil (50.000 dokumen =
+        20 GB); untuk corpus nyata pakai similarity_graph.
         """
         return cosine_similarity(tfidf_matrix)
     
+    @staticmethod
+    def iter_top_k_blocks(tfidf_matrix, k: int = 10, block_size: int = None,
+                          exclude_self: bool = True,
+                          n_jobs: int = 1) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Top-k tetangga per dokumen, dihitung per blok baris X @ X.T
+        
+        Hanya n_jobs blok similarity dense (block_size x n_documents) yang ada
+        di memori pada satu waktu.
+        
+        Args:
+            tfidf_matrix: TF-IDF matrix dari semua dokumen
+            k: Jumlah tetangga per dokumen
+            block_size: Baris per blok (default: blok ~16 juta elemen)
+            exclude_self: Jangan masukkan dokumen itu sendiri
+            n_jobs: Jumlah blok yang dihitung paralel (thread)
+        
+        Yields:
+            Tuple (start, indices, similarities): baris start..start+len(indices),
+            masing-masing (n_block, k) terurut dari similarity tertinggi,
+            urut berdasarkan start
+        """
+        X = normalize(sp.csr_matrix(tfidf_matrix), copy=True)
+        n_documents = X.shape[0]
+        k = min(k, n_documents - 1 if exclude_self else n_documents)
+        if k <= 0:
+            return
+        if block_size is None:
+            block_size = max(1, (1 << 24) // n_documents)
+        
+        # Transpose CSR sekali saja (kernel sklearn butuh CSR di kedua sisi)
+        X_T = X.T.tocsr()
+        starts = range(0, n_documents, block_size)
+        yield from Parallel(n_jobs=n_jobs, prefer='threads', return_as='generator')(
+            delayed(SimilarityCalculator._top_k_block)(
+                X, X_T, start, min(start + block_size, n_documents), k, exclude_self
+            )
+            for start in starts
+        )
+    
+    @staticmethod
+    def _top_k_block(X, X_T, start: int, stop: int, k: int,
+                     exclude_self: bool) -> Tuple[int, np.ndarray, np.ndarray]:
+        """
+        Top-k untuk baris start..stop (lihat iter_top_k_blocks)
+        """
+        # Kernel sparse x sparse -> dense milik sklearn (sama dengan SparseKNNIndex)
+        S = safe_sparse_dot(X[start:stop], X_T, dense_output=True)
+        if exclude_self:
+            S[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        
+        return (start, *SimilarityCalculator._top_k_rows(S, k))
+    
+    @staticmethod
+    def _top_k_rows(S: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k kolom dengan nilai tertinggi per baris matrix dense
+        
+        Kandidat dipilih dengan argpartition (O(n) per baris), lalu hanya k
+        kandidat yang diurutkan dari nilai tertinggi.
+        
+        Returns:
+            Tuple (indices, values), masing-masing (n_rows, k)
+        """
+        if k <= 0:
+            return np.empty((S.shape[0], 0), dtype=np.intp), np.empty((S.shape[0], 0), dtype=S.dtype)
+        
+        rows = np.arange(S.shape[0])[:, None]
+        top = np.argpartition(S, -k, axis=1)[:, -k:]
+        top = top[rows, np.argsort(-S[rows, top], axis=1, kind='stable')]
+        return top, S[rows, top]
+    
+    @staticmethod
+    def similarity_graph(tfidf_matrix, k: int = 10, min_similarity: float = 0.0,
+                         block_size: int = None, output_dir: str = None,
+                         n_jobs: int = 1) -> sp.csr_matrix:
+        """
+        Graph top-k cosine similarity antar dokumen (sparse, n x n)
+        
+        Baris i berisi maksimal k dokumen paling mirip dengan dokumen i
+        (tanpa dirinya sendiri) dengan similarity > min_similarity.
+        
+        Args:
+            tfidf_matrix: TF-IDF matrix dari semua dokumen
+            k: Jumlah tetangga per dokumen
+            min_similarity: Similarity minimal yang disimpan
+            block_size: Baris per blok X @ X.T (lihat iter_top_k_blocks)
+            output_dir: Jika diisi, neighbors.npy (int32, -1 = kosong) dan
+                        similarities.npy (n x k) ditulis per blok selama
+                        perhitungan; lihat load_similarity_graph
+            n_jobs: Jumlah blok yang dihitung paralel (thread)
+        
+        Returns:
+            Similarity graph (CSR n_documents x n_documents)
+        """
+        n_documents = tfidf_matrix.shape[0]
+        k = min(k, max(n_documents - 1, 0))
+        dtype = tfidf_matrix.dtype if tfidf_matrix.dtype == np.float32 else np.float64
+        
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            neighbors = np.lib.format.open_memmap(
+                os.path.join(output_dir, 'neighbors.npy'), mode='w+',
+                dtype=np.int32, shape=(n_documents, k))
+            similarities = np.lib.format.open_memmap(
+                os.path.join(output_dir, 'similarities.npy'), mode='w+',
+                dtype=dtype, shape=(n_documents, k))
+        else:
+            neighbors = np.empty((n_documents, k), dtype=np.int32)
+            similarities = np.empty((n_documents, k), dtype=dtype)
+        
+        for start, indices, block_similarities in SimilarityCalculator.iter_top_k_blocks(
+                tfidf_matrix, k=k, block_size=block_size, n_jobs=n_jobs):
+            stop = start + len(indices)
+            keep = block_similarities > min_similarity
+            neighbors[start:stop] = np.where(keep, indices, -1)
+            similarities[start:stop] = np.where(keep, block_similarities, 0)
+        
+        if output_dir is not None:
+            neighbors.flush()
+            similarities.flush()
+        
+        return SimilarityCalculator._graph_from_arrays(neighbors, similarities)
+    
+    @staticmethod
+    def _graph_from_arrays(neighbors: np.ndarray, similarities: np.ndarray) -> sp.csr_matrix:
+        """
+        CSR graph dari array tetangga n x k (-1 = kosong)
+        """
+        n_documents = neighbors.shape[0]
+        valid = neighbors >= 0
+        indptr = np.concatenate([[0], np.cumsum(valid.sum(axis=1))])
+        return sp.csr_matrix((similarities[valid], neighbors[valid], indptr),
+                             shape=(n_documents, n_documents))
+    
+    @staticmethod
+    def load_similarity_graph(output_dir: str) -> sp.csr_matrix:
+        """
+        Load graph yang ditulis similarity_graph(output_dir=...)
+        """
+        neighbors = np.load(os.path.join(output_dir, 'neighbors.npy'), mmap_mode='r')
+        similarities = np.load(os.path.join(output_dir, 'similarities.npy'), mmap_mode='r')
+        return SimilarityCalculator._graph_from_arrays(neighbors, similarities)
+    
+    @staticmethod
+    def find_duplicates(graph: sp.csr_matrix, threshold: float = 0.95) -> List[Tuple[int, int, float]]:
+        """
+        Pasangan dokumen (hampir) duplikat dari similarity graph
+        
+        Args:
+            graph: Hasil similarity_graph
+            threshold: Similarity minimal untuk dianggap duplikat
+        
+        Returns:
+            List of (i, j, similarity) dengan i < j, dari similarity tertinggi
+        """
+        coo = graph.tocoo()
+        mask = coo.data >= threshold
+        rows, cols, data = coo.row[mask], coo.col[mask], coo.data[mask]
+        
+        # Setiap pasangan cukup sekali (graph top-k belum tentu simetris)
+        pairs = {}
+        for i, j, similarity in zip(np.minimum(rows, cols), np.maximum(rows, cols), data):
+            pairs[int(i), int(j)] = float(similarity)
+        return sorted(((i, j, sim) for (i, j), sim in pairs.items()),
+                      key=lambda pair: (-pair[2], pair[0], pair[1]))
+    
     @staticmethod
     def cosine_similarity_pair(vector1: np.ndarray, vector2: np.ndarray) -> float:
         """
@@ -203,7 +1250,7 @@ class SimilarityCalculator:
     @staticmethod
     def find_k_nearest(query_vector: np.ndarray, 
                        document_vectors: np.ndarray, 
-                       k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+                       k: int = 5, index=None) -> Tuple[np.ndarray, np.ndarray]:
         """
         Temukan k dokumen terdekat dari query
         
@@ -211,18 +1258,40 @@ class SimilarityCalculator:
             query_vector: TF-IDF vector dari query
             document_vectors: TF-IDF matrix dari semua dokumen
             k: Jumlah nearest neighbors
+            index: Index yang sudah di-fit pada document_vectors (misalnya
+                   knn_index.RandomProjectionIndex untuk corpus besar)
             
         Returns:
             Tuple of (indices, similarities)
         """
-        # Hitung similarity dengan semua dokumen
-        similarities = cosine_similarity(query_vector, document_vectors)[0]
+        indices, similarities = SimilarityCalculator.find_k_nearest_batch(
+            query_vector, document_vectors, k=k, index=index
+        )
+        return indices[0], similarities[0]
+    
+    @staticmethod
+    def find_k_nearest_batch(query_vectors, document_vectors, k: int = 5,
+                             index=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        find_k_nearest untuk banyak query sekaligus (satu perkalian matrix)
+        
+        Args:
+            query_vectors: TF-IDF matrix query (satu baris per query)
+            document_vectors: TF-IDF matrix dari semua dokumen
+            k: Jumlah nearest neighbors
+            index: Index yang sudah di-fit pada document_vectors
         
-        # Dapatkan k indices dengan similarity tertinggi
-        k_nearest_indices = similarities.argsort()[-k:][::-1]
-        k_nearest_similarities = similarities[k_nearest_indices]
+        Returns:
+            Tuple of (indices, similarities), masing-masing (n_queries, k)
+            terurut dari similarity tertinggi
+        """
+        if index is not None:
+            distances, indices = index.kneighbors(query_vectors, n_neighbors=k)
+            return indices, 1.0 - distances
         
-        return k_nearest_indices, k_nearest_similarities
+        # Hitung similarity dengan semua dokumen, lalu top-k per query tanpa sort penuh
+        similarities = cosine_similarity(query_vectors, document_vectors)
+        return SimilarityCalculator._top_k_rows(similarities, min(k, similarities.shape[1]))
     
     @staticmethod
     def get_similarity_dataframe(tfidf_matrix: np.ndarray, 
@@ -236,6 +1305,9 @@ class SimilarityCalculator:
             
         Returns:
             DataFrame dengan similarity scores
+        
+        Seperti cosine_similarity_matrix, hanya untuk corpus kecil; untuk
+        corpus besar pakai get_similarity_edges.
         """
         similarity_matrix = cosine_similarity(tfidf_matrix)
         
@@ -247,6 +1319,29 @@ class SimilarityCalculator:
             index=document_names,
             columns=document_names
         )
+    
+    @staticmethod
+    def get_similarity_edges(tfidf_matrix, k: int = 10, document_names: List[str] = None,
+                             min_similarity: float = 0.0) -> pd.DataFrame:
+        """
+        DataFrame top-k similarity per dokumen (format panjang) untuk corpus besar
+        
+        Returns:
+            DataFrame dengan kolom source, target, similarity
+        """
+        coo = SimilarityCalculator.similarity_graph(
+            tfidf_matrix, k=k, min_similarity=min_similarity
+        ).tocoo()
+        
+        if document_names is None:
+            document_names = [f"Doc_{i}" for i in range(tfidf_matrix.shape[0])]
+        names = np.asarray(document_names, dtype=object)
+        
+        return pd.DataFrame({
+            'source': names[coo.row],
+            'target': names[coo.col],
+            'similarity': coo.data
+        })
 
 
 # Fungsi helper
@@ -2,7 +2,7 @@
 Script untuk inisialisasi database dan data sample
 """
 from app import app, db
-from models import Abstract
+from models import Abstract, upgrade_schema
 
 
 def init_database():
@@ -10,6 +10,7 @@ def init_database():
     with app.app_context():
         print("Creating database tables...")
         db.create_all()
+        upgrade_schema()
         print("Database tables created successfully!")
 
 
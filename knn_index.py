@@ -0,0 +1,479 @@
+"""
+Index KNN brute-force untuk vektor TF-IDF sparse (metric cosine)
+
+TF-IDF hasil FeatureExtractor sudah dinormalisasi L2, sehingga cosine
+similarity cukup dihitung dengan perkalian sparse X_query @ X_train.T.
+Perkalian dilakukan per blok baris query agar matrix jarak dense tidak
+pernah lebih besar dari block_elements (default ~16 juta elemen, jadi
+jumlah baris per blok mengecil saat n_train membesar), lalu k tetangga terdekat
+dipilih dengan np.argpartition (O(n) per baris, bukan sort penuh).
+
+Urutan operasi sengaja disamakan dengan KNeighborsClassifier(metric='cosine',
+weights='distance', algorithm='brute') di scikit-learn sehingga hasil
+prediksi dan probabilitas identik, tetapi prediksi dan probabilitas
+dihitung dari satu kali pencarian tetangga.
+"""
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from typing import Dict, Tuple
+from sklearn.preprocessing import normalize
+from sklearn.utils.extmath import safe_sparse_dot
+
+
+def distance_weights(distances: np.ndarray) -> np.ndarray:
+    """
+    Bobot 1 / jarak; jika ada tetangga dengan jarak 0, hanya tetangga
+    tersebut yang diberi bobot 1 (sama dengan weights='distance')
+    """
+    with np.errstate(divide='ignore'):
+        weights = 1.0 / distances
+    inf_mask = np.isinf(weights)
+    inf_row = np.any(inf_mask, axis=1)
+    weights[inf_row] = inf_mask[inf_row]
+    return weights
+
+
+def distance_vote(distances: np.ndarray, labels: np.ndarray, n_classes: int) -> np.ndarray:
+    """
+    Probabilitas kelas dari voting tetangga berbobot jarak
+    
+    Args:
+        distances: Jarak ke tetangga (n_queries, k)
+        labels: Index kelas tiap tetangga (n_queries, k)
+        n_classes: Jumlah kelas
+    
+    Returns:
+        Array probabilitas (n_queries, n_classes)
+    """
+    weights = distance_weights(distances)
+    
+    n_queries = labels.shape[0]
+    rows = np.arange(n_queries)
+    probabilities = np.zeros((n_queries, n_classes))
+    for i in range(labels.shape[1]):
+        probabilities[rows, labels[:, i]] += weights[:, i]
+    probabilities /= probabilities.sum(axis=1)[:, np.newaxis]
+    return probabilities
+
+
+class SparseKNNIndex:
+    """KNN brute-force cosine dengan bobot jarak (weights='distance')"""
+    
+    def __init__(self, n_neighbors: int = 5, block_size: int = None,
+                 block_elements: int = 1 << 24, dtype=None):
+        """
+        Args:
+            n_neighbors: Jumlah tetangga terdekat (k)
+            block_size: Baris query per blok perkalian matrix (default:
+                        block_elements // n_train)
+            block_elements: Maksimal elemen matrix jarak dense per blok
+            dtype: Tipe matrix training dan perhitungan jarak (np.float32 =
+                   setengah memori dan bandwidth); None = float32 jika X
+                   float32, selain itu float64
+        """
+        self.n_neighbors = n_neighbors
+        self.block_size = block_size
+        self.block_elements = block_elements
+        self.dtype = dtype
+        
+        self.classes_ = None
+        self._fit_X = None
+        self._y = None
+    
+    @property
+    def n_samples_fit_(self) -> int:
+        return 0 if self._fit_X is None else self._fit_X.shape[0]
+    
+    def fit(self, X, y, normalized: bool = False) -> 'SparseKNNIndex':
+        """
+        Simpan matrix training (dinormalisasi ulang L2) dan label
+        
+        Args:
+            X: Matrix TF-IDF training (sparse)
+            y: Label per baris
+            normalized: X adalah _fit_X index lain (CSR, sudah
+                        dinormalisasi) dan dipakai apa adanya tanpa salinan,
+                        misalnya matrix memory-mapped dari KNNClassifier.load
+        """
+        if normalized:
+            self._fit_X = X
+        else:
+            self._fit_X = normalize(sp.csr_matrix(X, dtype=self._fit_dtype(X)), copy=True)
+        self.classes_, self._y = np.unique(np.asarray(y), return_inverse=True)
+        return self
+    
+    def _fit_dtype(self, X) -> np.dtype:
+        """
+        Tipe nilai matrix training untuk X
+        """
+        if self.dtype is not None:
+            return np.dtype(self.dtype)
+        return np.dtype(np.float32 if X.dtype == np.float32 else np.float64)
+    
+    def _distances(self, X_block) -> np.ndarray:
+        """
+        Cosine distance dense untuk satu blok query (sama dengan
+        sklearn.metrics.pairwise.cosine_distances)
+        """
+        # Kernel sparse x sparse -> dense milik sklearn, tanpa matrix sparse perantara
+        S = safe_sparse_dot(normalize(X_block, copy=True), self._fit_X.T, dense_output=True)
+        S *= -1
+        S += 1
+        return np.clip(S, 0.0, 2.0, out=S)
+    
+    def kneighbors(self, X, n_neighbors: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cari k tetangga terdekat
+        
+        Args:
+            X: Matrix query (sparse, fitur sama dengan training)
+            n_neighbors: Override jumlah tetangga
+        
+        Returns:
+            Tuple (distances, indices), masing-masing (n_queries, k),
+            terurut dari tetangga terdekat
+        """
+        if self._fit_X is None:
+            raise ValueError("Index belum di-fit.")
+        
+        n_neighbors = n_neighbors or self.n_neighbors
+        if n_neighbors > self.n_samples_fit_:
+            raise ValueError(
+                f"Expected n_neighbors <= n_samples_fit, but n_neighbors = {n_neighbors}, "
+                f"n_samples_fit = {self.n_samples_fit_}"
+            )
+        
+        # Query mengikuti dtype matrix training (tidak ada upcast per blok)
+        X = sp.csr_matrix(X, dtype=self._fit_X.dtype)
+        n_queries = X.shape[0]
+        distances = np.empty((n_queries, n_neighbors), dtype=self._fit_X.dtype)
+        indices = np.empty((n_queries, n_neighbors), dtype=np.intp)
+        
+        block_size = self.block_size or max(1, self.block_elements // self.n_samples_fit_)
+        for start in range(0, n_queries, block_size):
+            stop = min(start + block_size, n_queries)
+            dist = self._distances(X[start:stop])
+            
+            rows = np.arange(dist.shape[0])[:, None]
+            neigh_ind = np.argpartition(dist, n_neighbors - 1, axis=1)[:, :n_neighbors]
+            # argpartition tidak menjamin urutan, urutkan k kandidat saja
+            neigh_ind = neigh_ind[rows, np.argsort(dist[rows, neigh_ind])]
+            
+            distances[start:stop] = dist[rows, neigh_ind]
+            indices[start:stop] = neigh_ind
+        
+        return distances, indices
+    
+    def predict_with_proba(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Prediksi label dan probabilitas dari satu kali pencarian tetangga
+        
+        Returns:
+            Tuple (predictions, probabilities (n_queries, n_classes))
+        """
+        distances, indices = self.kneighbors(X)
+        return self.vote(distances, indices)
+    
+    def vote(self, distances: np.ndarray, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Voting berbobot jarak dari hasil kneighbors
+        
+        Returns:
+            Tuple (predictions, probabilities (n_queries, n_classes))
+        """
+        probabilities = distance_vote(distances, self._y[indices], len(self.classes_))
+        predictions = self.classes_[np.argmax(probabilities, axis=1)]
+        return predictions, probabilities
+    
+    def predict(self, X) -> np.ndarray:
+        return self.predict_with_proba(X)[0]
+    
+    def predict_proba(self, X) -> np.ndarray:
+        return self.predict_with_proba(X)[1]
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """Hash integer 64-bit (SplitMix64) yang tervektorisasi"""
+    x = np.asarray(x, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class RandomProjectionIndex(SparseKNNIndex):
+    """
+    Approximate KNN cosine dengan LSH signed random projection
+    
+    Setiap tabel hash memakai n_bits hyperplane acak; kode dokumen adalah
+    tanda (sign) proyeksi vektor ke hyperplane tersebut. Dokumen dengan sudut
+    kecil cenderung jatuh ke bucket yang sama, sehingga query cukup
+    dibandingkan dengan kandidat dari bucket-nya (dan bucket berjarak Hamming
+    1 jika multi_probe) di n_tables tabel. Kandidat lalu di-rank ulang dengan
+    cosine distance eksak.
+    
+    Hyperplane berisi +1/-1 yang diturunkan dari hash (fitur, bit), sehingga
+    tidak ada matrix proyeksi yang disimpan dan index tetap murah untuk
+    HashingFeatureExtractor (2^18 fitur).
+    
+    Recall diatur lewat n_tables (lebih banyak = recall naik, query lebih
+    lambat) dan n_bits (lebih banyak = bucket lebih kecil, recall turun).
+    """
+    
+    def __init__(self, n_neighbors: int = 5, n_tables: int = 16, n_bits: int = 14,
+                 multi_probe: bool = True, seed: int = 42, block_size: int = 4096,
+                 max_pairs: int = 1 << 16, dtype=None):
+        """
+        Args:
+            n_neighbors: Jumlah tetangga terdekat (k)
+            n_tables: Jumlah tabel hash
+            n_bits: Bit per kode (hyperplane per tabel, maksimal 63)
+            multi_probe: Ikut periksa bucket yang berbeda 1 bit
+            seed: Seed hyperplane
+            block_size: Baris per blok saat menghitung kode
+            max_pairs: Pasangan (query, kandidat) per potongan saat re-rank
+            dtype: Lihat SparseKNNIndex
+        """
+        super().__init__(n_neighbors=n_neighbors, block_size=block_size, dtype=dtype)
+        if not 1 <= n_bits <= 63:
+            raise ValueError("n_bits harus antara 1 dan 63")
+        
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.multi_probe = multi_probe
+        self.seed = seed
+        self.max_pairs = max_pairs
+        
+        self._sorted_codes = None
+        self._order = None
+        self.n_candidates_ = None
+    
+    def _hyperplanes(self, columns: np.ndarray) -> np.ndarray:
+        """
+        Komponen hyperplane (+1/-1) untuk kolom fitur tertentu
+        
+        Returns:
+            Array (len(columns), n_tables * n_bits)
+        """
+        n_planes = self.n_tables * self.n_bits
+        keys = (columns.astype(np.uint64)[:, None] * np.uint64(n_planes)
+                + np.arange(n_planes, dtype=np.uint64))
+        hashed = _splitmix64(keys ^ _splitmix64(np.array([self.seed], dtype=np.uint64)))
+        return np.where(hashed >> np.uint64(63), 1.0, -1.0)
+    
+    def _hash(self, X) -> np.ndarray:
+        """
+        Kode LSH per dokumen per tabel
+        
+        Returns:
+            Array uint64 (n_documents, n_tables)
+        """
+        codes = np.empty((X.shape[0], self.n_tables), dtype=np.uint64)
+        powers = np.left_shift(np.uint64(1), np.arange(self.n_bits, dtype=np.uint64))
+        
+        for start in range(0, X.shape[0], self.block_size):
+            block = X[start:start + self.block_size]
+            # Hanya kolom yang muncul di blok yang butuh komponen hyperplane
+            columns, inverse = np.unique(block.indices, return_inverse=True)
+            compact = sp.csr_matrix((block.data, inverse.ravel(), block.indptr),
+                                    shape=(block.shape[0], len(columns)))
+            projection = compact @ self._hyperplanes(columns)
+            
+            bits = (projection > 0).reshape(block.shape[0], self.n_tables, self.n_bits)
+            codes[start:start + block.shape[0]] = (bits * powers).sum(axis=2, dtype=np.uint64)
+        
+        return codes
+    
+    def fit(self, X, y, normalized: bool = False,
+            tables: Tuple[np.ndarray, np.ndarray] = None) -> 'RandomProjectionIndex':
+        """
+        Simpan matrix training dan bangun tabel hash (kode terurut per tabel)
+        
+        Args:
+            X: Matrix TF-IDF training (sparse)
+            y: Label per baris
+            normalized: Lihat SparseKNNIndex.fit
+            tables: (order, sorted_codes) hasil fit sebelumnya dengan seed,
+                    n_tables, dan n_bits yang sama, berbentuk (n_tables,
+                    n_train); dipakai tanpa hashing ulang
+        """
+        super().fit(X, y, normalized=normalized)
+        
+        # Satu baris C-contiguous per tabel: query hanya menyentuh rentang
+        # bucket di baris tabelnya, tanpa menyalin seluruh array
+        if tables is None:
+            codes = np.ascontiguousarray(self._hash(self._fit_X).T)
+            order = np.argsort(codes, axis=1, kind='stable')
+            tables = order, np.take_along_axis(codes, order, axis=1)
+        self._order, self._sorted_codes = (
+            array if array.flags.c_contiguous else np.ascontiguousarray(array) for array in tables
+        )
+        return self
+    
+    def _probe_codes(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Kode bucket yang diperiksa per query per tabel
+        
+        Returns:
+            Array (n_queries, n_tables, n_probes)
+        """
+        flips = [np.uint64(0)]
+        if self.multi_probe:
+            flips += [np.uint64(1) << np.uint64(bit) for bit in range(self.n_bits)]
+        return codes[:, :, None] ^ np.array(flips, dtype=np.uint64)
+    
+    def candidates(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Baris training kandidat untuk setiap query (gabungan bucket semua tabel)
+        
+        Args:
+            X: Matrix query
+        
+        Returns:
+            Tuple (query_ids, rows) pasangan unik, terurut per query
+        """
+        n_train = self.n_samples_fit_
+        probes = self._probe_codes(self._hash(X))
+        n_queries, _, n_probes = probes.shape
+        probe_queries = np.repeat(np.arange(n_queries), n_probes)
+        
+        query_ids, rows = [], []
+        for table in range(self.n_tables):
+            sorted_codes = self._sorted_codes[table]
+            table_probes = probes[:, table, :].ravel()
+            lefts = np.searchsorted(sorted_codes, table_probes, side='left')
+            lengths = np.searchsorted(sorted_codes, table_probes, side='right') - lefts
+            
+            # Gabungkan semua rentang [left, right) tanpa loop Python
+            starts = np.repeat(lefts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+            rows.append(self._order[table][starts + np.arange(lengths.sum())])
+            query_ids.append(np.repeat(probe_queries, lengths))
+        
+        query_ids = np.concatenate(query_ids)
+        rows = np.concatenate(rows)
+        
+        # Buang duplikat (np.sort + mask jauh lebih cepat dari np.unique di sini)
+        keys = np.sort(query_ids.astype(np.int64) * n_train + rows)
+        keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+        return keys // n_train, keys % n_train
+    
+    def kneighbors(self, X, n_neighbors: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cari k tetangga terdekat (perkiraan) di antara kandidat LSH
+        
+        Query dengan kandidat kurang dari k dibandingkan dengan seluruh data.
+        Jumlah kandidat per query tersimpan di n_candidates_.
+        
+        Returns:
+            Tuple (distances, indices), terurut dari tetangga terdekat
+        """
+        if self._fit_X is None:
+            raise ValueError("Index belum di-fit.")
+        
+        n_neighbors = n_neighbors or self.n_neighbors
+        if n_neighbors > self.n_samples_fit_:
+            raise ValueError(
+                f"Expected n_neighbors <= n_samples_fit, but n_neighbors = {n_neighbors}, "
+                f"n_samples_fit = {self.n_samples_fit_}"
+            )
+        
+        X = normalize(sp.csr_matrix(X, dtype=self._fit_X.dtype), copy=True)
+        n_queries = X.shape[0]
+        distances = np.empty((n_queries, n_neighbors), dtype=self._fit_X.dtype)
+        indices = np.empty((n_queries, n_neighbors), dtype=np.intp)
+        self.n_candidates_ = np.empty(n_queries, dtype=np.intp)
+        
+        # Query blok dibuat dense (maksimal ~4 juta elemen) untuk dot product per pasangan
+        query_block = max(1, min(self.block_size, (1 << 22) // max(X.shape[1], 1)))
+        for start in range(0, n_queries, query_block):
+            stop = min(start + query_block, n_queries)
+            block_dist, block_ind, n_candidates = self._rerank(X[start:stop], n_neighbors)
+            distances[start:stop] = block_dist
+            indices[start:stop] = block_ind
+            self.n_candidates_[start:stop] = n_candidates
+        
+        return distances, indices
+    
+    def _rerank(self, X_block, n_neighbors: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Cosine distance eksak untuk semua pasangan (query, kandidat) dalam
+        satu blok lalu ambil k terdekat per query
+        """
+        n_block = X_block.shape[0]
+        query_ids, rows = self.candidates(X_block)
+        
+        # Query dengan kandidat < k: bandingkan dengan semua baris training
+        n_candidates = np.bincount(query_ids, minlength=n_block)
+        short = np.flatnonzero(n_candidates < n_neighbors)
+        if short.size:
+            keep = ~np.isin(query_ids, short)
+            query_ids = np.concatenate([query_ids[keep], np.repeat(short, self.n_samples_fit_)])
+            rows = np.concatenate([rows[keep], np.tile(np.arange(self.n_samples_fit_), short.size)])
+            n_candidates[short] = self.n_samples_fit_
+        
+        # Dot product per pasangan, per potongan agar memori tetap terbatas
+        query_dense = X_block.toarray().ravel()
+        n_features = X_block.shape[1]
+        dist = np.zeros(len(rows))
+        for begin in range(0, len(rows), self.max_pairs):
+            end = min(begin + self.max_pairs, len(rows))
+            candidate_X = self._fit_X[rows[begin:end]]
+            row_nnz = np.diff(candidate_X.indptr)
+            if not candidate_X.nnz:
+                continue
+            
+            positions = np.repeat(query_ids[begin:end] * n_features, row_nnz) + candidate_X.indices
+            products = candidate_X.data * np.take(query_dense, positions)
+            # reduceat salah untuk baris kosong (nilainya tetap 0)
+            non_empty = row_nnz > 0
+            dist[begin:end][non_empty] = np.add.reduceat(products, candidate_X.indptr[:-1][non_empty])
+        dist *= -1
+        dist += 1
+        np.clip(dist, 0.0, 2.0, out=dist)
+        
+        # Top-k per query: satu argsort atas kunci (query, jarak), jarak <= 2
+        order = np.argsort(query_ids * 4.0 + dist, kind='stable')
+        starts = np.searchsorted(query_ids[order], np.arange(n_block))
+        nearest = order[starts[:, None] + np.arange(n_neighbors)]
+        
+        return dist[nearest], rows[nearest], n_candidates
+
+
+def recall_at_k(index: SparseKNNIndex, X, k: int = None) -> Dict:
+    """
+    Bandingkan hasil index (misalnya RandomProjectionIndex) dengan pencarian eksak
+    
+    Args:
+        index: Index yang sudah di-fit
+        X: Matrix query
+        k: Jumlah tetangga (default index.n_neighbors)
+    
+    Returns:
+        Dictionary berisi recall@k (rata-rata proporsi tetangga eksak yang
+        ditemukan), rata-rata kandidat per query, serta waktu query eksak
+        dan index
+    """
+    k = k or index.n_neighbors
+    exact = SparseKNNIndex(n_neighbors=k)
+    exact._fit_X, exact._y, exact.classes_ = index._fit_X, index._y, index.classes_
+    
+    start = time.perf_counter()
+    _, expected = exact.kneighbors(X)
+    exact_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    _, found = index.kneighbors(X, n_neighbors=k)
+    index_seconds = time.perf_counter() - start
+    
+    hits = [len(np.intersect1d(a, b)) for a, b in zip(expected, found)]
+    n_candidates = getattr(index, 'n_candidates_', None)
+    
+    return {
+        'k': k,
+        'recall': float(np.sum(hits) / expected.size) if expected.size else 1.0,
+        'mean_candidates': float(np.mean(n_candidates)) if n_candidates is not None
+                           else float(index.n_samples_fit_),
+        'exact_seconds': exact_seconds,
+        'index_seconds': index_seconds
+    }
@@ -0,0 +1,322 @@
+"""
+Registry model ber-versi dengan pergantian model (hot-swap) yang atomik
+
+Layout direktori:
+    models/
+        versions/
+            20260101-120000-000000/   # satu direktori per model (KNNClassifier.save)
+            20260102-093000-000000/
+        CURRENT                       # nama versi yang aktif
+
+Model baru selalu ditulis ke direktori sementara lalu di-rename menjadi
+direktori versi, kemudian file CURRENT diganti dengan os.replace. Crash di
+tengah penyimpanan hanya meninggalkan direktori sementara; versi aktif tidak
+pernah setengah tertulis. Rollback cukup mengganti isi CURRENT.
+
+ModelHandle dipakai proses serving: setiap request mengambil referensi model
+aktif lewat get(), dan versi baru (dari proses lain atau /train) di-load di
+thread background lalu ditukar dengan satu assignment, sehingga request tidak
+pernah melihat model setengah di-load dan tidak menunggu load selesai.
+"""
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+
+# Jumlah versi yang disimpan (versi aktif tidak pernah dihapus)
+DEFAULT_KEEP_VERSIONS = 5
+
+# Versi untuk model lama yang tersimpan langsung di root (tanpa registry)
+LEGACY_VERSION = 'legacy'
+
+_TMP_PREFIX = '.tmp-'
+
+
+class ModelRegistry:
+    """Direktori model ber-versi dengan pointer CURRENT"""
+    
+    def __init__(self, root: str = 'models', keep: int = DEFAULT_KEEP_VERSIONS):
+        """
+        Args:
+            root: Direktori model
+            keep: Jumlah versi terbaru yang dipertahankan oleh prune()
+        """
+        self.root = root
+        self.keep = keep
+        self.versions_dir = os.path.join(root, 'versions')
+        self.pointer_path = os.path.join(root, 'CURRENT')
+        self._lock = threading.Lock()
+    
+    def versions(self) -> List[str]:
+        """
+        Semua versi yang lengkap, dari yang terlama
+        """
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.versions_dir)
+            if not name.startswith(_TMP_PREFIX)
+            and os.path.isdir(os.path.join(self.versions_dir, name))
+        )
+    
+    def current_version(self) -> Optional[str]:
+        """
+        Versi aktif; LEGACY_VERSION jika belum ada pointer tetapi ada model
+        lama di root, None jika belum ada model sama sekali
+        """
+        try:
+            with open(self.pointer_path) as f:
+                version = f.read().strip()
+            if version:
+                return version
+        except FileNotFoundError:
+            pass
+        
+        if os.path.exists(os.path.join(self.root, 'model_metadata.joblib')):
+            return LEGACY_VERSION
+        return None
+    
+    def version_path(self, version: str) -> str:
+        """
+        Direktori tempat model versi tertentu disimpan
+        """
+        if version == LEGACY_VERSION:
+            return self.root
+        return os.path.join(self.versions_dir, version)
+    
+    def publish(self, classifier, activate: bool = True) -> str:
+        """
+        Simpan model sebagai versi baru (opsional langsung diaktifkan)
+        
+        Args:
+            classifier: KNNClassifier yang sudah di-train
+            activate: Ganti pointer CURRENT ke versi baru
+        
+        Returns:
+            Nama versi baru
+        """
+        os.makedirs(self.versions_dir, exist_ok=True)
+        
+        with self._lock:
+            version = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            while os.path.exists(self.version_path(version)):
+                time.sleep(1e-6)
+                version = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            
+            tmp_path = os.path.join(self.versions_dir, _TMP_PREFIX + version)
+            try:
+                classifier.save(tmp_path)
+                os.replace(tmp_path, self.version_path(version))
+            except Exception:
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                raise
+        
+        if activate:
+            self.activate(version)
+        self.prune()
+        
+        print(f"Model version {version} published to {self.versions_dir}/")
+        return version
+    
+    def activate(self, version: str):
+        """
+        Jadikan versi tertentu aktif (pointer diganti secara atomik)
+        """
+        if version != LEGACY_VERSION and version not in self.versions():
+            raise ValueError(f"Versi model tidak ditemukan: {version}")
+        
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.pointer_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.pointer_path)
+    
+    def rollback(self, version: str = None) -> str:
+        """
+        Aktifkan versi sebelumnya (atau versi tertentu)
+        
+        Returns:
+            Versi yang sekarang aktif
+        """
+        if version is None:
+            versions = self.versions()
+            current = self.current_version()
+            older = [v for v in versions if current is None or v < current]
+            if not older:
+                raise ValueError("Tidak ada versi model sebelumnya untuk rollback")
+            version = older[-1]
+        
+        self.activate(version)
+        print(f"Model rolled back to version {version}")
+        return version
+    
+    def prune(self) -> List[str]:
+        """
+        Hapus versi terlama di luar `keep` versi terbaru, juga direktori
+        sementara sisa crash. Versi aktif selalu dipertahankan.
+        
+        Returns:
+            Versi yang dihapus
+        """
+        current = self.current_version()
+        versions = self.versions()
+        removed = [v for v in versions[:max(len(versions) - self.keep, 0)] if v != current]
+        
+        for version in removed:
+            shutil.rmtree(self.version_path(version), ignore_errors=True)
+        
+        # Direktori sementara milik publish() yang sedang berjalan tetap ada
+        # sampai di-rename, jadi hanya yang lebih tua dari satu jam dihapus
+        if os.path.isdir(self.versions_dir):
+            for name in os.listdir(self.versions_dir):
+                path = os.path.join(self.versions_dir, name)
+                if name.startswith(_TMP_PREFIX) and time.time() - os.path.getmtime(path) > 3600:
+                    shutil.rmtree(path, ignore_errors=True)
+        
+        return removed
+    
+    def load(self, classifier, version: str = None) -> str:
+        """
+        Load model versi tertentu (default versi aktif) ke classifier
+        
+        Returns:
+            Versi yang di-load
+        """
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"Belum ada model di {self.root}/")
+        
+        classifier.load(self.version_path(version))
+        return version
+    
+    def pointer_stamp(self) -> Optional[Tuple[int, int]]:
+        """
+        (mtime_ns, size) file CURRENT untuk deteksi perubahan yang murah
+        """
+        try:
+            stat = os.stat(self.pointer_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+class ModelHandle:
+    """
+    Referensi model aktif untuk serving
+    
+    get() mengembalikan classifier yang aktif saat dipanggil; request memakai
+    referensi itu sampai selesai, jadi penggantian model tidak mengganggu
+    request yang sedang berjalan. Perubahan pointer CURRENT dicek paling sering
+    setiap check_interval detik, dan versi baru di-load di thread background.
+    """
+    
+    def __init__(self, registry: ModelRegistry, factory: Callable[[], object],
+                 check_interval: float = 2.0, background: bool = True):
+        """
+        Args:
+            registry: ModelRegistry sumber model
+            factory: Fungsi tanpa argumen yang membuat KNNClassifier kosong
+            check_interval: Jeda minimal antar pengecekan pointer (detik)
+            background: Load versi baru di thread background (False = di
+                        thread pemanggil, misalnya untuk script/test)
+        """
+        self.registry = registry
+        self.factory = factory
+        self.check_interval = check_interval
+        self.background = background
+        
+        # (versi, classifier) ditukar sebagai satu tuple agar selalu konsisten
+        self._active = (None, None)
+        self._stamp = None
+        self._next_check = 0.0
+        self._loading = None
+        self._lock = threading.Lock()
+    
+    @property
+    def version(self) -> Optional[str]:
+        return self._active[0]
+    
+    def get(self):
+        """
+        Classifier aktif (None jika belum ada model)
+        """
+        return self.get_versioned()[1]
+    
+    def get_versioned(self) -> Tuple[Optional[str], object]:
+        """
+        (versi, classifier) aktif sebagai pasangan yang konsisten, misalnya
+        untuk key cache prediksi yang harus ikut versi model
+        """
+        if time.monotonic() >= self._next_check:
+            self.refresh()
+        return self._active
+    
+    def set(self, classifier, version: str = None):
+        """
+        Tukar model aktif secara langsung (misalnya setelah publish di proses ini)
+        """
+        self._active = (version, classifier)
+        self._stamp = self.registry.pointer_stamp()
+    
+    def refresh(self, wait: bool = False) -> bool:
+        """
+        Cek pointer CURRENT dan load versi baru jika berubah
+        
+        Model pertama selalu di-load di thread pemanggil karena belum ada
+        model lama yang bisa dipakai sementara.
+        
+        Args:
+            wait: Tunggu sampai load background selesai
+        
+        Returns:
+            True jika ada versi baru yang di-load (atau sedang di-load)
+        """
+        self._next_check = time.monotonic() + self.check_interval
+        
+        stamp = self.registry.pointer_stamp()
+        version = self.registry.current_version()
+        if version is None or (stamp == self._stamp and version == self.version):
+            return False
+        
+        with self._lock:
+            if self._loading is not None and self._loading.is_alive():
+                loading = self._loading
+            elif self._active[1] is None or not self.background:
+                self._load(version, stamp)
+                return True
+            else:
+                loading = self._loading = threading.Thread(
+                    target=self._load, args=(version, stamp), daemon=True
+                )
+                loading.start()
+        
+        if wait:
+            loading.join()
+        return True
+    
+    def _load(self, version: str, stamp):
+        """
+        Load versi ke classifier baru lalu tukar referensi aktif
+        """
+        if version == self.version:
+            self._stamp = stamp
+            return
+        
+        start = time.perf_counter()
+        try:
+            classifier = self.factory()
+            self.registry.load(classifier, version)
+        except Exception as e:
+            print(f"❌ Error loading model version {version}: {e}")
+            # Jangan coba ulang terus-menerus untuk pointer yang sama
+            self._stamp = stamp
+            return
+        
+        self._active = (version, classifier)
+        self._stamp = stamp
+        print(f"✅ Model version {version} active ({time.perf_counter() - start:.3f}s load)")
@@ -1,8 +1,11 @@
 """
 Database models untuk aplikasi
 """
+import json
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
+from sqlalchemy.orm.attributes import flag_modified
 
 db = SQLAlchemy()
 
@@ -22,6 +25,10 @@ class Abstract(db.Model):
     predicted_label = db.Column(db.String(10))  # Hasil prediksi
     confidence = db.Column(db.Float)  # Confidence score
     
+    # Cache hasil preprocessing (lihat TextPreprocessor.ensure_preprocessed)
+    preprocessed_text = db.Column(db.Text)  # Token hasil preprocessing, dipisah spasi
+    preprocess_hash = db.Column(db.String(40))  # Hash versi preprocessing + abstract_text
+    
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -68,6 +75,12 @@ class ModelMetrics(db.Model):
     test_samples = db.Column(db.Integer)
     trained_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Kurva accuracy/F1 per k dari pencarian k optimal (JSON, opsional)
+    k_curve = db.Column(db.Text)
+    
+    # Metrik per fold + rata-rata/spread dari cross_validate_corpus (JSON, opsional)
+    cv_results = db.Column(db.Text)
+    
     def __repr__(self):
         return f'<ModelMetrics {self.model_name} k={self.k_value} acc={self.accuracy:.2f}>'
     
@@ -91,7 +104,9 @@ class ModelMetrics(db.Model):
             },
             'training_samples': self.training_samples,
             'test_samples': self.test_samples,
-            'trained_at': self.trained_at.isoformat() if self.trained_at else None
+            'trained_at': self.trained_at.isoformat() if self.trained_at else None,
+            'k_curve': json.loads(self.k_curve) if self.k_curve else None,
+            'cv_results': json.loads(self.cv_results) if self.cv_results else None
         }
 
 
@@ -118,3 +133,98 @@ class ClassificationHistory(db.Model):
             'source': self.source,
             'classified_at': self.classified_at.isoformat() if self.classified_at else None
         }
+
+
+class PipelineState(db.Model):
+    """High-water mark per tahap pipeline (lihat pipeline.py)"""
+    __tablename__ = 'pipeline_state'
+    
+    stage = db.Column(db.String(20), primary_key=True)  # 'preprocess', 'vectorize', 'predict'
+    last_id = db.Column(db.Integer, default=0)  # Abstract.id terbesar yang sudah diproses
+    last_updated_at = db.Column(db.DateTime)  # Abstract.updated_at terbesar yang sudah diproses
+    version = db.Column(db.String(50))  # Versi preprocessing/model saat tahap terakhir dijalankan
+    processed_count = db.Column(db.Integer, default=0)  # Total baris yang pernah diproses
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PipelineState {self.stage} id>{self.last_id}>'
+    
+    def to_dict(self):
+        return {
+            'stage': self.stage,
+            'last_id': self.last_id,
+            'last_updated_at': self.last_updated_at.isoformat() if self.last_updated_at else None,
+            'version': self.version,
+            'processed_count': self.processed_count,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+def keep_updated_at(abstracts):
+    """
+    Pertahankan Abstract.updated_at saat menulis kolom turunan
+    
+    preprocessed_text, predicted_label dan confidence adalah hasil pipeline,
+    bukan perubahan data. Tanpa ini onupdate menaikkan updated_at sehingga
+    baris yang baru diproses dianggap berubah lagi oleh high-water mark.
+    """
+    for abstract in abstracts:
+        flag_modified(abstract, 'updated_at')
+
+
+def iter_abstract_chunks(query=None, chunk_size: int = 500):
+    """
+    Ambil baris Abstract per chunk (keyset pagination berdasarkan id)
+    
+    Berbeda dengan query.all(), hanya satu chunk yang dimuat sekaligus, jadi
+    aman untuk tabel berisi ratusan ribu abstrak. Caller boleh meng-update dan
+    commit baris di setiap chunk, termasuk kolom yang dipakai di filter query.
+    
+    Args:
+        query: Query Abstract (default semua abstrak)
+        chunk_size: Jumlah baris per chunk
+        
+    Yields:
+        List of Abstract
+    """
+    if query is None:
+        query = Abstract.query
+    
+    last_id = 0
+    while True:
+        chunk = query.filter(Abstract.id > last_id)\
+                     .order_by(Abstract.id)\
+                     .limit(chunk_size)\
+                     .all()
+        if not chunk:
+            break
+        
+        # Simpan id sebelum yield: commit oleh caller meng-expire atribut
+        last_id = chunk[-1].id
+        yield chunk
+
+
+def upgrade_schema():
+    """
+    Tambahkan kolom baru ke tabel yang sudah ada
+    
+    db.create_all() hanya membuat tabel yang belum ada, jadi database lama
+    tidak otomatis mendapat kolom baru. Harus dipanggil dalam app context.
+    """
+    inspector = inspect(db.engine)
+    
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            with db.engine.begin() as connection:
+                connection.execute(text(
+                    f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                ))
+            print(f"Added column {table.name}.{column.name}")
@@ -0,0 +1,307 @@
+"""
+Pipeline incremental: hanya abstrak baru atau yang berubah yang diproses
+
+Setiap tahap pipeline menyimpan high-water mark di tabel pipeline_state,
+yaitu Abstract.id dan Abstract.updated_at terbesar yang sudah diproses.
+Baris dengan id lebih besar (hasil scraping baru) atau updated_at lebih baru
+(diedit) dianggap pending untuk tahap tersebut, sehingga scraping harian
+beberapa puluh artikel tidak memicu pemrosesan ulang seluruh corpus.
+
+Tahap:
+    preprocess : isi cache preprocessed_text (semua abstrak)
+    vectorize  : TF-IDF dengan vectorizer model aktif (abstrak tanpa label)
+    predict    : simpan predicted_label/confidence (abstrak tanpa label; semua
+                 diprediksi ulang jika versi model berubah)
+    auto_label : label keyword scoring (abstrak tanpa label dan prediksi)
+    train      : tambahkan abstrak berlabel ke model (KNNClassifier.partial_fit)
+"""
+from typing import Dict, Iterable, Optional
+
+from models import db, Abstract, PipelineState, iter_abstract_chunks, keep_updated_at
+from preprocessing import PREPROCESS_VERSION, TextPreprocessor
+
+
+STAGES = ('preprocess', 'vectorize', 'predict', 'auto_label', 'train')
+
+
+def get_state(stage: str) -> PipelineState:
+    """
+    Ambil state tahap pipeline, buat baru jika belum ada
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Tahap pipeline tidak dikenal: {stage}")
+    
+    state = db.session.get(PipelineState, stage)
+    if state is None:
+        state = PipelineState(stage=stage, last_id=0, processed_count=0)
+        db.session.add(state)
+    return state
+
+
+def pending_query(stage: str, query=None):
+    """
+    Query abstrak yang belum diproses oleh tahap ini
+    
+    Args:
+        stage: Nama tahap (lihat STAGES)
+        query: Query Abstract dasar (default semua abstrak)
+    """
+    if query is None:
+        query = Abstract.query
+    
+    state = get_state(stage)
+    if state.last_updated_at is None:
+        return query.filter(Abstract.id > (state.last_id or 0))
+    
+    return query.filter(db.or_(
+        Abstract.id > (state.last_id or 0),
+        Abstract.updated_at > state.last_updated_at
+    ))
+
+
+def reset_stages(stages: Iterable[str] = STAGES):
+    """
+    Hapus high-water mark agar tahap berikutnya memproses ulang semua abstrak
+    """
+    for stage in stages:
+        state = get_state(stage)
+        state.last_id = 0
+        state.last_updated_at = None
+    db.session.commit()
+
+
+def mark_processed(stage: str, query=None, version: Optional[str] = None):
+    """
+    Majukan high-water mark ke baris terbaru query (setelah pemrosesan penuh,
+    misalnya training ulang dari semua data berlabel)
+    """
+    if query is None:
+        query = Abstract.query
+    
+    last_id, last_updated_at = query.with_entities(
+        db.func.max(Abstract.id), db.func.max(Abstract.updated_at)
+    ).one()
+    
+    state = get_state(stage)
+    state.last_id = last_id or 0
+    state.last_updated_at = last_updated_at
+    state.processed_count = query.count()
+    if version is not None:
+        state.version = version
+    db.session.commit()
+
+
+class _Watermark:
+    """Kumpulkan id/updated_at terbesar dari baris yang diproses dalam satu run"""
+    
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.last_id = 0
+        self.last_updated_at = None
+        self.count = 0
+    
+    def update(self, abstracts):
+        for abstract in abstracts:
+            self.last_id = max(self.last_id, abstract.id)
+            if abstract.updated_at is not None and (
+                    self.last_updated_at is None or abstract.updated_at > self.last_updated_at):
+                self.last_updated_at = abstract.updated_at
+            self.count += 1
+    
+    def save(self, version: Optional[str] = None):
+        """
+        Majukan high-water mark tahap (dipanggil setelah seluruh run selesai,
+        sehingga run yang gagal di tengah cukup diulang)
+        """
+        state = get_state(self.stage)
+        state.last_id = max(state.last_id or 0, self.last_id)
+        if self.last_updated_at is not None and (
+                state.last_updated_at is None or self.last_updated_at > state.last_updated_at):
+            state.last_updated_at = self.last_updated_at
+        state.processed_count = (state.processed_count or 0) + self.count
+        if version is not None:
+            state.version = version
+        db.session.commit()
+
+
+def run_preprocess_stage(preprocessor: TextPreprocessor, chunk_size: int = 500) -> int:
+    """
+    Isi preprocessed_text untuk abstrak baru/berubah
+    
+    Jika PREPROCESS_VERSION berubah sejak run terakhir, semua abstrak diproses ulang.
+    
+    Returns:
+        Jumlah abstrak yang diperiksa
+    """
+    state = get_state('preprocess')
+    if state.version is not None and state.version != PREPROCESS_VERSION:
+        print(f"Preprocessing version changed ({state.version} -> {PREPROCESS_VERSION}), "
+              f"reprocessing all abstracts")
+        reset_stages(['preprocess'])
+    
+    watermark = _Watermark('preprocess')
+    for chunk in iter_abstract_chunks(pending_query('preprocess'), chunk_size):
+        preprocessor.ensure_preprocessed(chunk)
+        watermark.update(chunk)
+        if db.session.dirty:
+            keep_updated_at(chunk)
+            db.session.commit()
+    
+    watermark.save(PREPROCESS_VERSION)
+    return watermark.count
+
+
+def model_version(classifier) -> Optional[str]:
+    """
+    Versi model untuk pipeline_state
+    
+    Waktu update incremental terakhir (partial_fit), atau waktu training
+    penuh jika model belum pernah di-update.
+    """
+    info = classifier.training_info or {}
+    stamp = info.get('updated_at') or info.get('trained_at')
+    return stamp.isoformat() if stamp is not None else None
+
+
+def run_predict_stages(classifier, chunk_size: int = 500) -> Dict:
+    """
+    Vectorize dan prediksi abstrak tanpa label yang baru/berubah
+    
+    Jika model berbeda dari model run terakhir (training ulang, training
+    incremental, atau rollback), semua abstrak tanpa label diprediksi ulang.
+    
+    Returns:
+        Dictionary jumlah baris per tahap dan distribusi label prediksi
+    """
+    version = model_version(classifier)
+    state = get_state('predict')
+    if state.version is not None and state.version != version:
+        print(f"Model version changed ({state.version} -> {version}), "
+              f"re-predicting all unlabeled abstracts")
+        reset_stages(['vectorize', 'predict'])
+    
+    unlabeled = Abstract.query.filter(Abstract.label.is_(None))
+    
+    vectorized = _Watermark('vectorize')
+    predicted = _Watermark('predict')
+    counts = {}
+    
+    for chunk in iter_abstract_chunks(pending_query('predict', unlabeled), chunk_size):
+        texts = classifier.preprocessor.ensure_preprocessed(chunk)
+        
+        # Transform, pencarian tetangga, dan voting dalam satu pass
+        details = classifier.predict_with_details(texts, preprocessed=True)
+        vectorized.update(chunk)
+        
+        for abstract, label, confidence in zip(chunk, details['labels'], details['confidence']):
+            abstract.predicted_label = label
+            abstract.confidence = float(confidence)
+            counts[label] = counts.get(label, 0) + 1
+        predicted.update(chunk)
+        
+        keep_updated_at(chunk)
+        db.session.commit()
+    
+    vectorized.save(version)
+    predicted.save(version)
+    
+    return {'vectorize': vectorized.count, 'predict': predicted.count, 'labels': counts}
+
+
+def run_auto_label_stage(chunk_size: int = 500, query=None) -> Dict:
+    """
+    Label keyword scoring untuk abstrak baru yang belum berlabel
+    
+    Args:
+        chunk_size: Baris Abstract per chunk
+        query: Query kandidat (default abstrak tanpa label dan tanpa prediksi)
+    
+    Returns:
+        Dictionary {label: jumlah}
+    """
+    from auto_labeler import auto_label_text
+    
+    if query is None:
+        query = Abstract.query.filter(
+            Abstract.label.is_(None),
+            Abstract.predicted_label.is_(None)
+        )
+    
+    watermark = _Watermark('auto_label')
+    counts = {}
+    for chunk in iter_abstract_chunks(pending_query('auto_label', query), chunk_size):
+        for abstract in chunk:
+            label, confidence = auto_label_text(abstract.abstract_text)
+            abstract.label = label
+            abstract.confidence = confidence
+            counts[label] = counts.get(label, 0) + 1
+        watermark.update(chunk)
+        
+        keep_updated_at(chunk)
+        db.session.commit()
+    
+    watermark.save()
+    return counts
+
+
+def run_train_stage(classifier, chunk_size: int = 500, drift_threshold: float = 0.05) -> Dict:
+    """
+    Tambahkan abstrak yang baru diberi label (atau labelnya dikoreksi) ke model
+    
+    Returns:
+        Hasil KNNClassifier.partial_fit (added=0 jika tidak ada data baru)
+    """
+    labeled = Abstract.query.filter(Abstract.label.isnot(None))
+    
+    watermark = _Watermark('train')
+    texts, labels, ids = [], [], []
+    for chunk in iter_abstract_chunks(pending_query('train', labeled), chunk_size):
+        texts.extend(classifier.preprocessor.ensure_preprocessed(chunk))
+        labels.extend(abstract.label for abstract in chunk)
+        ids.extend(abstract.id for abstract in chunk)
+        watermark.update(chunk)
+        if db.session.dirty:
+            keep_updated_at(chunk)
+            db.session.commit()
+    
+    if not texts:
+        return {'added': 0, 'replaced': 0, 'n_samples': classifier.training_info.get('n_samples', 0),
+                'idf_drift': classifier.training_info.get('idf_drift', 0.0), 'rebuilt': False,
+                'seconds': 0.0}
+    
+    result = classifier.partial_fit(texts, labels, ids=ids, preprocessed=True,
+                                    drift_threshold=drift_threshold)
+    watermark.save(model_version(classifier))
+    return result
+
+
+def process_new_abstracts(preprocessor: TextPreprocessor = None, classifier=None,
+                          chunk_size: int = 500) -> Dict:
+    """
+    Jalankan tahap preprocess lalu vectorize/predict untuk abstrak baru saja
+    
+    Harus dipanggil dalam app context.
+    
+    Args:
+        preprocessor: TextPreprocessor (default preprocessor milik classifier)
+        classifier: KNNClassifier yang sudah di-train; tanpa classifier hanya
+                    tahap preprocess yang dijalankan
+        chunk_size: Baris Abstract per chunk
+    
+    Returns:
+        Dictionary jumlah baris per tahap
+    """
+    if preprocessor is None:
+        if classifier is not None:
+            preprocessor = classifier.preprocessor
+        else:
+            from preprocessing import get_preprocessor
+            preprocessor = get_preprocessor()
+    
+    summary = {'preprocess': run_preprocess_stage(preprocessor, chunk_size)}
+    
+    if classifier is not None and classifier.is_trained:
+        summary.update(run_predict_stages(classifier, chunk_size))
+    
+    print(f"Incremental pipeline: {summary}")
+    return summary
@@ -0,0 +1,180 @@
+"""
+Cache hasil prediksi per teks untuk /classify dan /upload
+
+Pengguna sering mengirim ulang abstrak yang sama, padahal setiap prediksi
+membayar Sastrawi + TF-IDF + KNN. Cache ini menyimpan hasilnya dengan key
+hash teks ter-normalisasi (whitespace) dan versi model aktif:
+
+    (versi model, jenis hasil, sha256(teks ter-normalisasi)) -> hasil
+
+Entri dibuang jika cache penuh (LRU) atau umurnya melewati TTL. Begitu versi
+model berubah (/train, training incremental, rollback, atau hot-swap dari
+proses lain) semua entri versi lama dibuang, jadi hasil lama tidak pernah
+dipakai oleh model baru.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_CACHE_TTL = 3600.0
+
+
+class PredictionCache:
+    """
+    Cache LRU + TTL yang thread-safe untuk hasil prediksi per teks
+    
+    Nilai yang disimpan dipakai bersama oleh semua request yang hit, jadi
+    pemanggil tidak boleh mengubahnya.
+    """
+    
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_CACHE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_size: Jumlah maksimal entri (entri terlama dibuang); 0 = nonaktif
+            ttl: Umur maksimal entri dalam detik; None = tanpa batas umur
+            clock: Sumber waktu (detik), bisa diganti untuk test
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        
+        # key -> (waktu disimpan, nilai), urut dari yang paling lama tidak dipakai
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Teks ter-normalisasi untuk key: whitespace berlebih dan line break
+        (misalnya hasil copy dari PDF) tidak mengubah hasil prediksi
+        """
+        return ' '.join(text.split())
+    
+    @classmethod
+    def key(cls, text: str, version: Optional[str], kind: str = 'predict') -> Tuple[Hashable, ...]:
+        """
+        Key cache untuk teks pada versi model tertentu
+        """
+        digest = hashlib.sha256(cls.normalize(text).encode('utf-8')).hexdigest()
+        return version, kind, digest
+    
+    def _check_version(self, version: Optional[str]):
+        """
+        Buang semua entri jika versi model berubah (dipanggil dengan lock)
+        """
+        if version != self._version:
+            if self._data:
+                self._data.clear()
+                self.invalidations += 1
+            self._version = version
+    
+    def get(self, text: str, version: Optional[str], kind: str = 'predict'):
+        """
+        Hasil yang tersimpan untuk teks ini, None jika belum ada atau kedaluwarsa
+        """
+        key = self.key(text, version, kind)
+        with self._lock:
+            self._check_version(version)
+            entry = self._data.get(key)
+            if entry is not None and self.ttl is not None and self.clock() - entry[0] > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, text: str, version: Optional[str], value, kind: str = 'predict'):
+        """
+        Simpan hasil untuk teks ini, buang entri terlama jika penuh
+        """
+        if self.max_size <= 0:
+            return
+        
+        key = self.key(text, version, kind)
+        with self._lock:
+            self._check_version(version)
+            self._data[key] = (self.clock(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def get_or_compute(self, text: str, version: Optional[str], compute: Callable[[], object],
+                       kind: str = 'predict'):
+        """
+        Hasil dari cache; compute() hanya dipanggil saat miss
+        
+        Args:
+            text: Teks mentah yang diprediksi
+            version: Versi model yang dipakai compute (lihat ModelHandle.get_versioned)
+            compute: Fungsi tanpa argumen yang menghitung hasil
+            kind: Jenis hasil ('predict', 'important_words', ...), key terpisah
+        """
+        value = self.get(text, version, kind)
+        if value is None:
+            # Prediksi dilakukan di luar lock agar request lain tidak tertahan
+            value = compute()
+            self.set(text, version, value, kind)
+        return value
+    
+    def invalidate(self):
+        """
+        Buang semua entri (misalnya setelah model baru dipublish)
+        """
+        with self._lock:
+            if self._data:
+                self._data.clear()
+                self.invalidations += 1
+    
+    def stats(self) -> Dict:
+        """
+        Statistik cache (ukuran, hit, miss, hit rate, entri yang dibuang)
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'version': self._version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+    
+    def clear(self):
+        """
+        Kosongkan cache dan reset counter
+        """
+        with self._lock:
+            self._data.clear()
+            self._version = None
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+            self.invalidations = 0
@@ -2,37 +2,466 @@
 Modul untuk preprocessing teks Bahasa Indonesia
 Meliputi: tokenisasi, stopword removal, dan stemming
 """
+import hashlib
+import os
 import re
-import string
-from typing import List
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+import joblib
 from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
 from Sastrawi.StopWordRemover.StopWordRemoverFactory import StopWordRemoverFactory
 
 
-class TextPreprocessor:
-    """Class untuk preprocessing teks Bahasa Indonesia"""
+# Awal URL: 'http'/'www' yang diikuti minimal satu karakter non-spasi
+_URL_START = r'(?:http|www)\S'
+
+# Pattern URL + email untuk clean_text, setara dengan rangkaian lama:
+#   re.sub(r'http\S+|www\S+|https\S+', '')  lalu  re.sub(r'\S+@\S+', '')
+# Email dicek setelah URL dihapus, jadi bagian email tidak boleh melewati
+# awal URL, dan (karena \S+ rakus) email selalu dimulai di awal kata.
+_URL_EMAIL_PATTERN = re.compile(
+    r'(?:http|www)\S+'
+    r'|(?<!\S)(?=[^\s@]*@)(?:(?!' + _URL_START + r')\S)+@(?:(?!' + _URL_START + r')\S)+'
+)
+
+# Angka, tanda baca (string.punctuation, termasuk '_') dan karakter khusus
+_CHAR_PATTERN = re.compile(r'[^\w\s]+|[\d_]+')
+
+# Tabel hapus untuk teks ASCII (jauh lebih cepat dari regex), isinya sama
+# dengan karakter ASCII yang cocok dengan _CHAR_PATTERN
+_ASCII_DELETE_TABLE = {
+    code: None for code in range(128) if _CHAR_PATTERN.match(chr(code))
+}
+
+# Versi pipeline preprocessing. Naikkan jika output preprocess berubah
+# (stopwords, aturan cleaning, dll) agar cache di tabel abstracts dihitung ulang.
+PREPROCESS_VERSION = '1'
+
+# Panjang minimal token yang dipertahankan
+MIN_TOKEN_LENGTH = 3
+
+# Default ukuran tabel token -> stem (lihat TextPreprocessor.build_token_table)
+DEFAULT_TOKEN_TABLE_SIZE = 100000
+
+# Penanda token yang belum ada di tabel token (None berarti token dibuang)
+_MISSING = object()
+
+# Default batch paralel (lihat Config.PREPROCESS_*)
+DEFAULT_CHUNK_SIZE = 32
+DEFAULT_MIN_PARALLEL_BATCH = 200
+
+# Default ukuran dan lokasi cache stemming (lihat Config.STEM_CACHE_*)
+DEFAULT_STEM_CACHE_SIZE = 50000
+DEFAULT_STEM_CACHE_PATH = os.path.join('models', 'stem_cache.joblib')
+
+
+class StemCache:
+    """
+    Cache word -> stem berukuran terbatas (LRU) dan thread-safe
+    
+    Stemming Sastrawi adalah bagian paling mahal dari preprocessing, padahal
+    kosakata abstrak Bahasa Indonesia relatif kecil dan berulang. Cache ini
+    menyimpan hasil stem per kata, mencatat hit/miss, dan bisa disimpan ke disk
+    supaya restart aplikasi atau train_now.py langsung "hangat".
+    """
+    
+    def __init__(self, max_size: int = DEFAULT_STEM_CACHE_SIZE):
+        """
+        Args:
+            max_size: Jumlah maksimal kata yang disimpan (kata terlama dibuang)
+        """
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def get(self, word: str) -> Optional[str]:
+        """
+        Ambil stem dari cache, None jika belum ada
+        """
+        with self._lock:
+            stem = self._data.get(word)
+            if stem is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(word)
+            self.hits += 1
+            return stem
+    
+    def set(self, word: str, stem: str):
+        """
+        Simpan stem ke cache, buang entri terlama jika penuh
+        """
+        with self._lock:
+            self._data[word] = stem
+            self._data.move_to_end(word)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+    
+    def stem(self, word: str, stemmer) -> str:
+        """
+        Stem satu kata lewat cache; stemmer hanya dipanggil saat miss
+        """
+        stem = self.get(word)
+        if stem is None:
+            # Stemming dilakukan di luar lock agar thread lain tidak tertahan
+            stem = stemmer.stem(word)
+            self.set(word, stem)
+        return stem
+    
+    def words(self) -> List[str]:
+        """
+        Semua kata yang ada di cache (misalnya untuk build_token_table)
+        """
+        with self._lock:
+            return list(self._data)
+    
+    def stats(self) -> Dict:
+        """
+        Statistik cache (ukuran, hit, miss, hit rate)
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+    
+    def clear(self):
+        """
+        Kosongkan cache dan reset counter
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
     
-    def __init__(self):
-        # Inisialisasi stemmer Sastrawi
-        stemmer_factory = StemmerFactory()
-        self.stemmer = stemmer_factory.create_stemmer()
+    def save(self, filepath: str = DEFAULT_STEM_CACHE_PATH):
+        """
+        Simpan isi cache ke file
+        """
+        with self._lock:
+            data = dict(self._data)
         
-        # Inisialisasi stopword remover Sastrawi
-        stopword_factory = StopWordRemoverFactory()
-        self.stopword_remover = stopword_factory.create_stop_word_remover()
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        joblib.dump(data, filepath)
+        print(f"Stem cache saved to {filepath} ({len(data)} words)")
+    
+    def load(self, filepath: str = DEFAULT_STEM_CACHE_PATH) -> bool:
+        """
+        Load isi cache dari file (jika ada)
         
-        # Get stopwords list untuk filtering manual jika diperlukan
-        self.stopwords = stopword_factory.get_stop_words()
+        Returns:
+            True jika file ditemukan dan berhasil di-load
+        """
+        if not os.path.exists(filepath):
+            return False
         
-        # Tambahan stopwords khusus - HANYA kata-kata yang benar-benar umum/tidak informatif
-        additional_stopwords = [
-            'abstrak', 'abstract', 'hal', 'vol', 'no', 'issn'
-        ]
-        self.stopwords.extend(additional_stopwords)
+        data = joblib.load(filepath)
+        with self._lock:
+            for word, stem in data.items():
+                self._data[word] = stem
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+        
+        print(f"Stem cache loaded from {filepath} ({len(data)} words)")
+        return True
+
+
+_stem_cache_instance = None
+
+def get_stem_cache() -> StemCache:
+    """
+    Singleton cache stemming yang dipakai bersama oleh semua TextPreprocessor
+    """
+    global _stem_cache_instance
+    if _stem_cache_instance is None:
+        _stem_cache_instance = StemCache()
+    return _stem_cache_instance
+
+
+# Token yang dihitung TfidfVectorizer (sama dengan token_pattern default-nya).
+# Dipakai saat interning agar TokenCorpus berisi token yang sama persis dengan
+# yang dilihat vectorizer dari preprocess_to_text.
+FEATURE_TOKEN_PATTERN = re.compile(r'(?u)\b\w\w+\b')
+
+
+class Vocabulary:
+    """
+    Vocabulary ter-intern: token -> integer id
+    
+    Id 0 dicadangkan untuk token yang tidak dikenal (lihat encode dengan
+    grow=False), jadi token pertama mendapat id 1.
+    """
+    
+    UNKNOWN_ID = 0
+    
+    def __init__(self, tokens: Iterable[str] = ()):
+        self.tokens = [None]
+        self.token_to_id = {}
+        # Cache hasil stem -> id token, karena satu stem bisa berisi beberapa
+        # token vectorizer (mis. 'na ve') atau tidak ada sama sekali ('a')
+        self._expansions = {}
+        
+        for token in tokens:
+            self.add(token)
+    
+    def __len__(self) -> int:
+        return len(self.tokens)
+    
+    def add(self, token: str) -> int:
+        """
+        Id untuk token, tambahkan ke vocabulary jika belum ada
+        """
+        token_id = self.token_to_id.get(token)
+        if token_id is None:
+            token_id = len(self.tokens)
+            self.token_to_id[token] = token_id
+            self.tokens.append(token)
+        return token_id
+    
+    def get(self, token: str) -> int:
+        """
+        Id untuk token, UNKNOWN_ID jika tidak ada
+        """
+        return self.token_to_id.get(token, self.UNKNOWN_ID)
+    
+    def encode(self, stem: str, grow: bool = True) -> Tuple[int, ...]:
+        """
+        Id token vectorizer untuk satu stem hasil preprocessing
+        
+        Args:
+            stem: Satu token hasil preprocess
+            grow: Tambahkan token baru ke vocabulary; jika False token baru
+                  menjadi UNKNOWN_ID
+        """
+        ids = self._expansions.get(stem)
+        if ids is not None:
+            return ids
+        
+        pieces = FEATURE_TOKEN_PATTERN.findall(stem)
+        if grow:
+            ids = tuple(self.add(piece) for piece in pieces)
+        else:
+            ids = tuple(self.get(piece) for piece in pieces)
+            if self.UNKNOWN_ID in ids:
+                # Jangan cache token tidak dikenal agar cache tetap terbatas
+                return ids
+        
+        self._expansions[stem] = ids
+        return ids
+
+
+class TokenCorpus:
+    """
+    Corpus hasil preprocessing dalam format CSR
+    
+    Semua token id disimpan dalam satu array('I') datar; dokumen ke-i adalah
+    ids[offsets[i]:offsets[i + 1]]. Jauh lebih hemat memori dibanding list of
+    strings dan bisa langsung dipakai FeatureExtractor.transform_corpus.
+    """
+    
+    def __init__(self, vocabulary: Vocabulary = None, grow: bool = True):
+        """
+        Args:
+            vocabulary: Vocabulary untuk interning (default Vocabulary baru)
+            grow: Tambahkan token baru ke vocabulary (False untuk vocabulary
+                  yang sudah fix, mis. milik FeatureExtractor yang sudah di-fit)
+        """
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        self.grow = grow
+        self.ids = array('I')
+        self.offsets = array('Q', [0])
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def append(self, stems: Iterable[str]):
+        """
+        Tambahkan satu dokumen (token hasil preprocess)
+        """
+        encode = self.vocabulary.encode
+        grow = self.grow
+        for stem in stems:
+            self.ids.extend(encode(stem, grow))
+        self.offsets.append(len(self.ids))
+    
+    def append_text(self, preprocessed_text: str):
+        """
+        Tambahkan satu dokumen dari string hasil preprocess_to_text
+        """
+        self.append(preprocessed_text.split())
+    
+    def nbytes(self) -> int:
+        """
+        Ukuran array ids + offsets dalam byte
+        """
+        return (len(self.ids) * self.ids.itemsize +
+                len(self.offsets) * self.offsets.itemsize)
+    
+    def subset(self, indices: Iterable[int]) -> 'TokenCorpus':
+        """
+        Corpus baru berisi dokumen-dokumen terpilih (misalnya satu fold CV)
+        
+        Vocabulary dipakai bersama (tidak disalin) dan token id disalin per
+        potongan array, jadi tidak ada preprocessing ulang.
+        """
+        corpus = TokenCorpus(self.vocabulary, grow=self.grow)
+        ids, offsets = self.ids, self.offsets
+        for index in indices:
+            corpus.ids.extend(ids[offsets[index]:offsets[index + 1]])
+            corpus.offsets.append(len(corpus.ids))
+        return corpus
+    
+    def document(self, index: int) -> List[str]:
+        """
+        Token dokumen ke-index (untuk debugging)
+        """
+        tokens = self.vocabulary.tokens
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return [tokens[token_id] for token_id in self.ids[start:end]]
+
+
+# Resource Sastrawi dimuat lazily dan dibagi oleh semua TextPreprocessor di
+# satu proses. Panggil preload_resources() sebelum fork (misalnya gunicorn
+# --preload) agar semua worker memakai salinan yang sama.
+_resource_lock = threading.Lock()
+_stemmer_instance = None
+_stopword_remover_instance = None
+_stopwords_instance = None
+
+# Tambahan stopwords khusus - HANYA kata-kata yang benar-benar umum/tidak informatif
+ADDITIONAL_STOPWORDS = [
+    'abstrak', 'abstract', 'hal', 'vol', 'no', 'issn'
+]
+
+
+def get_stemmer():
+    """
+    Stemmer Sastrawi bersama (dibuat sekali per proses)
+    """
+    global _stemmer_instance
+    if _stemmer_instance is None:
+        with _resource_lock:
+            if _stemmer_instance is None:
+                _stemmer_instance = StemmerFactory().create_stemmer()
+    return _stemmer_instance
+
+
+def get_stopword_remover():
+    """
+    Stopword remover Sastrawi bersama (dibuat sekali per proses)
+    """
+    global _stopword_remover_instance
+    if _stopword_remover_instance is None:
+        with _resource_lock:
+            if _stopword_remover_instance is None:
+                _stopword_remover_instance = StopWordRemoverFactory().create_stop_word_remover()
+    return _stopword_remover_instance
+
+
+def get_stopwords() -> FrozenSet[str]:
+    """
+    Set stopwords Sastrawi + ADDITIONAL_STOPWORDS (dibuat sekali per proses)
+    
+    Berupa frozenset agar cek keanggotaan per token O(1) dan tidak bisa
+    diubah tanpa sengaja oleh salah satu TextPreprocessor.
+    """
+    global _stopwords_instance
+    if _stopwords_instance is None:
+        with _resource_lock:
+            if _stopwords_instance is None:
+                stopwords = StopWordRemoverFactory().get_stop_words()
+                _stopwords_instance = frozenset(stopwords + ADDITIONAL_STOPWORDS)
+    return _stopwords_instance
+
+
+def preload_resources() -> float:
+    """
+    Muat semua resource Sastrawi sekarang (bukan saat request pertama)
+    
+    Returns:
+        Waktu yang dibutuhkan (detik)
+    """
+    start = time.perf_counter()
+    get_stemmer()
+    get_stopword_remover()
+    get_stopwords()
+    return time.perf_counter() - start
+
+
+class TextPreprocessor:
+    """Class untuk preprocessing teks Bahasa Indonesia"""
+    
+    def __init__(self, stem_cache: StemCache = None, n_jobs: int = 1,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 min_parallel_batch: int = DEFAULT_MIN_PARALLEL_BATCH,
+                 use_token_table: bool = False,
+                 token_table_size: int = DEFAULT_TOKEN_TABLE_SIZE):
+        """
+        Args:
+            stem_cache: Cache stemming; default memakai cache bersama (get_stem_cache)
+            n_jobs: Jumlah proses untuk batch preprocessing (1 = serial, -1 = semua core)
+            chunk_size: Jumlah teks yang dikirim ke worker sekaligus
+            min_parallel_batch: Batch lebih kecil dari ini selalu diproses serial
+            use_token_table: Pakai tabel token -> stem/None (lihat build_token_table)
+            token_table_size: Maksimal entri tabel token
+        """
+        self.stem_cache = stem_cache if stem_cache is not None else get_stem_cache()
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.min_parallel_batch = min_parallel_batch
+        
+        # Tabel token -> hasil akhir (stem, atau None jika token dibuang).
+        # Menggabungkan filter panjang, cek stopword dan stemming menjadi satu
+        # lookup dict per token.
+        self.token_table = {} if use_token_table else None
+        self.token_table_size = token_table_size
+    
+    @property
+    def stemmer(self):
+        """
+        Stemmer Sastrawi (dimuat saat pertama dipakai, dibagi satu proses)
+        """
+        return get_stemmer()
+    
+    @property
+    def stopword_remover(self):
+        """
+        Stopword remover Sastrawi (dimuat saat pertama dipakai, dibagi satu proses)
+        """
+        return get_stopword_remover()
+    
+    @property
+    def stopwords(self) -> FrozenSet[str]:
+        """
+        Set stopwords Sastrawi + stopwords tambahan (dibagi satu proses)
+        """
+        return get_stopwords()
     
     def clean_text(self, text: str) -> str:
         """
         Membersihkan teks dari karakter yang tidak diperlukan
+        
+        Hasilnya identik dengan rangkaian re.sub lama (URL, email, angka,
+        tanda baca, karakter khusus, whitespace), tetapi memakai pattern dan
+        tabel yang sudah di-compile, dan langkah URL/email dilewati jika teks
+        tidak mengandung '@', 'http' atau 'www'.
         """
         if not text:
             return ""
@@ -40,25 +469,18 @@ class TextPreprocessor:
         # Convert ke lowercase
         text = text.lower()
         
-        # Hapus URL
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-        
-        # Hapus email
-        text = re.sub(r'\S+@\S+', '', text)
+        # Hapus URL dan email
+        if '@' in text or 'http' in text or 'www' in text:
+            text = _URL_EMAIL_PATTERN.sub('', text)
         
-        # Hapus angka
-        text = re.sub(r'\d+', '', text)
-        
-        # Hapus tanda baca
-        text = text.translate(str.maketrans('', '', string.punctuation))
-        
-        # Hapus karakter khusus
-        text = re.sub(r'[^\w\s]', '', text)
+        # Hapus angka, tanda baca, dan karakter khusus
+        if text.isascii():
+            text = text.translate(_ASCII_DELETE_TABLE)
+        else:
+            text = _CHAR_PATTERN.sub('', text)
         
         # Hapus whitespace berlebih
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
+        return ' '.join(text.split())
     
     def tokenize(self, text: str) -> List[str]:
         """
@@ -71,7 +493,7 @@ class TextPreprocessor:
         tokens = text.split()
         
         # Filter token yang terlalu pendek (< 3 karakter)
-        tokens = [token for token in tokens if len(token) >= 3]
+        tokens = [token for token in tokens if len(token) >= MIN_TOKEN_LENGTH]
         
         return tokens
     
@@ -79,10 +501,11 @@ class TextPreprocessor:
         """
         Hapus stopwords dari list tokens
         """
-        # Filter menggunakan list stopwords
+        # Filter menggunakan set stopwords (lookup O(1))
+        stopwords = self.stopwords
         filtered_tokens = [
             token for token in tokens 
-            if token not in self.stopwords
+            if token not in stopwords
         ]
         
         return filtered_tokens
@@ -95,11 +518,80 @@ class TextPreprocessor:
         
         for token in tokens:
             # Sastrawi stemmer bekerja pada teks, bukan token individual
-            stemmed = self.stemmer.stem(token)
+            # Hasilnya di-cache karena kosakata abstrak banyak berulang
+            stemmed = self.stem_cache.stem(token, self.stemmer)
             stemmed_tokens.append(stemmed)
         
         return stemmed_tokens
     
+    def resolve_token(self, token: str) -> Optional[str]:
+        """
+        Hasil akhir satu token mentah (hasil clean_text().split())
+        
+        Returns:
+            Stem token, atau None jika token dibuang (terlalu pendek,
+            stopword, atau hasil stem kosong)
+        """
+        if len(token) < MIN_TOKEN_LENGTH or token in self.stopwords:
+            return None
+        return self.stem_cache.stem(token, self.stemmer) or None
+    
+    def build_token_table(self, words: Iterable[str]) -> int:
+        """
+        Isi tabel token -> stem/None di muka (misalnya dari kata di cache stemming)
+        
+        Args:
+            words: Token mentah yang akan dimasukkan ke tabel
+            
+        Returns:
+            Jumlah entri tabel
+        """
+        if self.token_table is None:
+            self.token_table = {}
+        
+        for word in words:
+            if len(self.token_table) >= self.token_table_size:
+                break
+            if word not in self.token_table:
+                self.token_table[word] = self.resolve_token(word)
+        
+        return len(self.token_table)
+    
+    def iter_tokens(self, text: str) -> Iterator[str]:
+        """
+        Fast path preprocessing: tokenisasi, filter, stopword removal dan
+        stemming dalam satu loop tanpa list perantara
+        
+        Hasilnya token demi token identik dengan tokenize -> remove_stopwords
+        -> stem_tokens -> filter token kosong.
+        """
+        table = self.token_table
+        
+        if table is None:
+            stopwords = self.stopwords
+            stem = self.stem_cache.stem
+            stemmer = self.stemmer
+            
+            for token in self.clean_text(text).split():
+                if len(token) < MIN_TOKEN_LENGTH or token in stopwords:
+                    continue
+                stemmed = stem(token, stemmer)
+                if stemmed:
+                    yield stemmed
+            return
+        
+        # Dengan tabel token: satu lookup dict per token. Token yang belum ada
+        # di-resolve lalu ditambahkan selama tabel belum penuh.
+        max_size = self.token_table_size
+        for token in self.clean_text(text).split():
+            result = table.get(token, _MISSING)
+            if result is _MISSING:
+                result = self.resolve_token(token)
+                if len(table) < max_size:
+                    table[token] = result
+            if result is not None:
+                yield result
+    
     def preprocess(self, text: str) -> List[str]:
         """
         Pipeline lengkap preprocessing:
@@ -109,39 +601,168 @@ class TextPreprocessor:
         
         Returns: List of preprocessed tokens
         """
-        # Step 1: Tokenisasi
-        tokens = self.tokenize(text)
-        
-        # Step 2: Hapus stopwords
-        tokens = self.remove_stopwords(tokens)
-        
-        # Step 3: Stemming
-        tokens = self.stem_tokens(tokens)
-        
-        # Filter token kosong jika ada
-        tokens = [token for token in tokens if token]
-        
-        return tokens
+        return list(self.iter_tokens(text))
     
     def preprocess_to_text(self, text: str) -> str:
         """
         Preprocessing dan return sebagai string (bukan list)
         Berguna untuk beberapa algoritma yang memerlukan input string
         """
-        tokens = self.preprocess(text)
-        return ' '.join(tokens)
+        return ' '.join(self.iter_tokens(text))
     
-    def batch_preprocess(self, texts: List[str]) -> List[List[str]]:
+    def batch_preprocess(self, texts: List[str], n_jobs: int = None,
+                         chunk_size: int = None) -> List[List[str]]:
         """
         Preprocessing batch untuk multiple teks
+        
+        Args:
+            texts: List of raw texts
+            n_jobs: Override jumlah proses (default self.n_jobs)
+            chunk_size: Override ukuran chunk per worker (default self.chunk_size)
         """
-        return [self.preprocess(text) for text in texts]
+        return self._run_batch(texts, 'preprocess', n_jobs, chunk_size)
     
-    def batch_preprocess_to_text(self, texts: List[str]) -> List[str]:
+    def batch_preprocess_to_text(self, texts: List[str], n_jobs: int = None,
+                                 chunk_size: int = None) -> List[str]:
         """
         Preprocessing batch dan return sebagai list of strings
+        
+        Args:
+            texts: List of raw texts
+            n_jobs: Override jumlah proses (default self.n_jobs)
+            chunk_size: Override ukuran chunk per worker (default self.chunk_size)
+        """
+        return self._run_batch(texts, 'preprocess_to_text', n_jobs, chunk_size)
+    
+    def batch_preprocess_to_corpus(self, texts: Iterable[str], vocabulary: Vocabulary = None,
+                                   grow: bool = True, preprocessed: bool = False) -> TokenCorpus:
+        """
+        Preprocessing batch menjadi TokenCorpus (token id + offsets)
+        
+        Args:
+            texts: Raw texts, atau hasil preprocess_to_text jika preprocessed=True
+            vocabulary: Vocabulary untuk interning (default Vocabulary baru)
+            grow: Tambahkan token baru ke vocabulary
+            preprocessed: True jika texts sudah hasil preprocess_to_text
+        """
+        corpus = TokenCorpus(vocabulary, grow=grow)
+        
+        if not preprocessed and _resolve_n_jobs(self.n_jobs) > 1:
+            # Preprocessing paralel lewat process pool, interning di proses utama
+            texts = self.batch_preprocess_to_text(list(texts))
+            preprocessed = True
+        
+        if preprocessed:
+            for text in texts:
+                corpus.append_text(text)
+        else:
+            for text in texts:
+                corpus.append(self.iter_tokens(text))
+        
+        return corpus
+    
+    def ensure_preprocessed(self, records) -> List[str]:
+        """
+        Ambil hasil preprocessing yang tersimpan pada record, hitung ulang yang basi
+        
+        Record adalah objek dengan atribut abstract_text, preprocessed_text dan
+        preprocess_hash (misalnya models.Abstract). Record baru atau yang
+        abstract_text/versi preprocessing-nya berubah diproses ulang dalam satu
+        batch dan atributnya di-update; caller yang melakukan commit.
+        
+        Returns:
+            List of preprocessed texts, urut sesuai records
+        """
+        records = list(records)
+        hashes = [preprocess_hash(record.abstract_text) for record in records]
+        
+        stale = [
+            i for i, record in enumerate(records)
+            if record.preprocessed_text is None or record.preprocess_hash != hashes[i]
+        ]
+        
+        if stale:
+            print(f"Preprocessing {len(stale)}/{len(records)} stale texts...")
+            results = self.batch_preprocess_to_text([records[i].abstract_text for i in stale])
+            for i, preprocessed_text in zip(stale, results):
+                records[i].preprocessed_text = preprocessed_text
+                records[i].preprocess_hash = hashes[i]
+        
+        return [record.preprocessed_text for record in records]
+    
+    def _run_batch(self, texts: List[str], method: str,
+                   n_jobs: int = None, chunk_size: int = None) -> list:
+        """
+        Jalankan method preprocessing untuk setiap teks, paralel jika batch besar
+        
+        Urutan hasil selalu sama dengan urutan input. Batch kecil (misalnya
+        dari /classify) diproses serial agar tidak membayar biaya start pool.
         """
-        return [self.preprocess_to_text(text) for text in texts]
+        texts = list(texts)
+        n_jobs = _resolve_n_jobs(self.n_jobs if n_jobs is None else n_jobs)
+        chunk_size = chunk_size or self.chunk_size
+        
+        if n_jobs <= 1 or len(texts) < self.min_parallel_batch:
+            func = getattr(self, method)
+            return [func(text) for text in texts]
+        
+        worker_func = _worker_preprocess if method == 'preprocess' else _worker_preprocess_to_text
+        
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs,
+                                     initializer=_init_worker,
+                                     initargs=(self.token_table is not None,)) as executor:
+                return list(executor.map(worker_func, texts, chunksize=chunk_size))
+        except (OSError, BrokenProcessPool) as e:
+            # Misalnya lingkungan yang tidak mengizinkan multiprocessing
+            print(f"Parallel preprocessing gagal ({e}), fallback ke serial")
+            func = getattr(self, method)
+            return [func(text) for text in texts]
+
+
+def preprocess_hash(text: str) -> str:
+    """
+    Hash untuk mendeteksi hasil preprocessing yang basi
+    
+    Menggabungkan PREPROCESS_VERSION dengan teks mentah, jadi berubah jika
+    teks diedit atau pipeline preprocessing berubah.
+    """
+    payload = f"{PREPROCESS_VERSION}\n{text or ''}".encode('utf-8')
+    return hashlib.sha1(payload).hexdigest()
+
+
+def _resolve_n_jobs(n_jobs: int) -> int:
+    """
+    Terjemahkan n_jobs (-1 = semua core) menjadi jumlah proses
+    """
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+
+# Preprocessor milik setiap proses worker (dibuat sekali oleh _init_worker)
+_worker_preprocessor = None
+
+def _init_worker(use_token_table: bool = False):
+    """
+    Initializer worker: bangun stemmer Sastrawi sekali per proses
+    
+    Dengan start method fork resource yang sudah dimuat parent ikut terwariskan,
+    jadi preload_resources() di sini tidak melakukan apa-apa.
+    """
+    global _worker_preprocessor
+    preload_resources()
+    _worker_preprocessor = TextPreprocessor(use_token_table=use_token_table)
+
+
+def _worker_preprocess(text: str) -> List[str]:
+    return _worker_preprocessor.preprocess(text)
+
+
+def _worker_preprocess_to_text(text: str) -> str:
+    return _worker_preprocessor.preprocess_to_text(text)
 
 
 # Fungsi helper untuk penggunaan cepat
@@ -266,17 +266,24 @@ class JournalScraper:
         return saved_count
 
 
-def scrape_and_save(base_url: str, start_year: int, end_year: int, auto_label=True):
+def scrape_and_save(base_url: str, start_year: int, end_year: int, auto_label=True,
+                    classifier=None, chunk_size: int = 500):
     """
     Fungsi helper untuk scraping dan menyimpan ke database
     
+    Setelah disimpan, hanya abstrak baru yang diproses (auto-label,
+    preprocessing, dan prediksi jika classifier diberikan) lewat pipeline
+    incremental, bukan seluruh corpus.
+    
     Args:
         base_url: URL dasar journal
         start_year: Tahun mulai scraping
         end_year: Tahun akhir scraping
         auto_label: Jika True (default), otomatis label data hasil scraping menggunakan keyword scoring
+        classifier: KNNClassifier yang sudah di-train untuk memprediksi abstrak baru (opsional)
+        chunk_size: Baris Abstract per chunk untuk pipeline incremental
     """
-    from auto_labeler import auto_label_text
+    from pipeline import process_new_abstracts, run_auto_label_stage
     
     scraper = JournalScraper(base_url)
     articles = scraper.scrape_range(start_year, end_year)
@@ -293,45 +300,38 @@ def scrape_and_save(base_url: str, start_year: int, end_year: int, auto_label=Tr
         # Auto-label menggunakan keyword-based scoring (SELALU aktif untuk data scraping)
         if auto_label and saved > 0:
             try:
-                # Ambil artikel yang baru saja disimpan (belum ada label)
-                new_abstracts = Abstract.query.filter(
-                    Abstract.label.is_(None),
-                    Abstract.predicted_label.is_(None)
-                ).all()
+                # Hanya artikel baru sejak run terakhir (high-water mark tahap auto_label)
+                # Set sebagai label (bukan predicted_label) karena ini data training
+                # User bisa koreksi manual di halaman /label jika perlu
+                counts = run_auto_label_stage(chunk_size)
+                labeled = sum(counts.values())
                 
-                if new_abstracts:
-                    print(f"\n🤖 Auto-labeling {len(new_abstracts)} new articles using keyword scoring...")
-                    
-                    # Label menggunakan keyword-based auto-labeler
-                    rpl_count = 0
-                    tkj_count = 0
-                    
-                    for abstract in new_abstracts:
-                        label, confidence = auto_label_text(abstract.abstract_text)
-                        
-                        # Set sebagai label (bukan predicted_label) karena ini data training
-                        # User bisa koreksi manual di halaman /label jika perlu
-                        abstract.label = label
-                        abstract.confidence = confidence
-                        
-                        if label == 'RPL':
-                            rpl_count += 1
-                        else:
-                            tkj_count += 1
-                    
-                    db.session.commit()
+                if labeled:
+                    rpl_count = counts.get('RPL', 0)
+                    tkj_count = counts.get('TKJ', 0)
                     
-                    result['auto_labeled'] = len(new_abstracts)
+                    result['auto_labeled'] = labeled
                     result['rpl_count'] = rpl_count
                     result['tkj_count'] = tkj_count
-                    result['message'] += f' | Auto-labeled: {len(new_abstracts)} (RPL: {rpl_count}, TKJ: {tkj_count})'
+                    result['message'] += f' | Auto-labeled: {labeled} (RPL: {rpl_count}, TKJ: {tkj_count})'
                     
                     print(f"✓ Auto-labeling complete! RPL: {rpl_count}, TKJ: {tkj_count}")
                     
             except Exception as e:
+                db.session.rollback()
                 print(f"❌ Error during auto-labeling: {str(e)}")
                 result['auto_label_error'] = str(e)
         
+        # Preprocessing (dan prediksi) hanya untuk abstrak baru
+        if saved > 0:
+            try:
+                result['pipeline'] = process_new_abstracts(classifier=classifier,
+                                                           chunk_size=chunk_size)
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Error during incremental processing: {str(e)}")
+                result['pipeline_error'] = str(e)
+        
         return result
     else:
         return {
@@ -0,0 +1,49 @@
+"""
+Test route Flask (tanpa database dan tanpa scraping sungguhan)
+"""
+import tempfile
+
+import app as app_module
+from model_registry import ModelHandle, ModelRegistry
+from test_model_registry import train_knn
+
+
+def test_scrape_passes_active_classifier():
+    """POST /scrape memanggil scrape_and_save dengan classifier versi aktif"""
+    knn = train_knn(k=3)
+    calls = []
+    
+    def fake_scrape_and_save(base_url, start_year, end_year, **kwargs):
+        calls.append((start_year, end_year, kwargs))
+        return {'message': 'ok', 'total_saved': 0}
+    
+    flask_app = app_module.app
+    original = (app_module.scrape_and_save, app_module.model_handle,
+                dict(flask_app.before_request_funcs))
+    with tempfile.TemporaryDirectory() as tmp:
+        handle = ModelHandle(ModelRegistry(tmp), lambda: None, check_interval=3600.0)
+        handle.set(knn, 'v1')
+        try:
+            app_module.scrape_and_save = fake_scrape_and_save
+            app_module.model_handle = handle
+            # Lewati init database/model di before_request
+            flask_app.before_request_funcs.clear()
+            
+            response = flask_app.test_client().post(
+                '/scrape', data={'start_year': '2023', 'end_year': '2024'}
+            )
+        finally:
+            app_module.scrape_and_save, app_module.model_handle = original[:2]
+            flask_app.before_request_funcs.clear()
+            flask_app.before_request_funcs.update(original[2])
+    
+    assert response.status_code == 302
+    assert len(calls) == 1
+    start_year, end_year, kwargs = calls[0]
+    assert (start_year, end_year) == (2023, 2024)
+    assert kwargs['classifier'] is knn
+
+
+if __name__ == '__main__':
+    test_scrape_passes_active_classifier()
+    print("✅ All app route tests passed")
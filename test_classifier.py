@@ -0,0 +1,718 @@
+"""
+Test untuk KNNClassifier dan FeatureExtractor (tanpa database)
+"""
+import random
+import re
+import tempfile
+
+import numpy as np
+
+from benchmark import SAMPLE_SENTENCES
+from classifier import KNNClassifier
+from feature_extraction import FeatureExtractor, HashingFeatureExtractor
+from preprocessing import TextPreprocessor
+
+
+RPL_SENTENCES = [s for s in SAMPLE_SENTENCES if 'jaringan' not in s.lower()
+                 and 'routing' not in s.lower() and 'iot' not in s.lower()
+                 and 'qos' not in s.lower()]
+TKJ_SENTENCES = [s for s in SAMPLE_SENTENCES if s not in RPL_SENTENCES]
+
+
+def make_corpus(n_docs: int = 60, seed: int = 0):
+    """Corpus sintetis dua kelas (RPL/TKJ)"""
+    rng = random.Random(seed)
+    texts, labels = [], []
+    for i in range(n_docs):
+        label = 'RPL' if i % 2 else 'TKJ'
+        source = RPL_SENTENCES if label == 'RPL' else TKJ_SENTENCES
+        texts.append(' '.join(rng.choice(source) for _ in range(4)))
+        labels.append(label)
+    return texts, labels
+
+
+def test_prepare_data_stream_matches_prepare_data():
+    """Training streaming per chunk harus menghasilkan matrix yang sama"""
+    texts, labels = make_corpus()
+
+    batch = KNNClassifier(k=3).prepare_data(texts, labels)
+
+    def chunks():
+        for start in range(0, len(texts), 7):
+            yield texts[start:start + 7], labels[start:start + 7]
+
+    streaming = KNNClassifier(k=3).prepare_data_stream(chunks)
+
+    assert np.allclose(batch['X_train'].toarray(), streaming['X_train'].toarray())
+    assert np.allclose(batch['X_test'].toarray(), streaming['X_test'].toarray())
+    assert list(batch['y_train']) == list(streaming['y_train'])
+
+
+def test_predict_stream_matches_predict():
+    """predict_stream per chunk sama dengan predict sekaligus"""
+    texts, labels = make_corpus()
+    knn = KNNClassifier(k=3)
+    data = knn.prepare_data(texts, labels)
+    knn.train(data['X_train'], data['y_train'])
+
+    queries, _ = make_corpus(20, seed=1)
+    chunks = [queries[:8], queries[8:16], queries[16:]]
+
+    results = list(knn.predict_stream(chunks))
+    predictions = np.concatenate([pred for pred, _ in results])
+    probabilities = np.vstack([proba for _, proba in results])
+
+    assert list(predictions) == list(knn.predict(queries))
+    assert np.allclose(probabilities, knn.predict_proba(queries))
+
+
+def test_token_corpus_matches_string_vectorizer():
+    """Fit/transform dari TokenCorpus identik dengan TfidfVectorizer berbasis string"""
+    preprocessor = TextPreprocessor()
+    texts, _ = make_corpus(80)
+    texts += ["", "naïve café jaringan-jaringan", "a b c"]
+    preprocessed = preprocessor.batch_preprocess_to_text(texts)
+
+    by_string = FeatureExtractor()
+    expected = by_string.fit_transform(preprocessed)
+
+    by_corpus = FeatureExtractor()
+    corpus = preprocessor.batch_preprocess_to_corpus(texts)
+    actual = by_corpus.fit_transform_corpus(corpus)
+
+    assert list(by_corpus.feature_names) == list(by_string.feature_names)
+    assert np.allclose(by_corpus.vectorizer.idf_, by_string.vectorizer.idf_)
+    assert np.allclose(actual.toarray(), expected.toarray())
+
+    # Query memakai vocabulary token milik extractor (token asing -> id 0)
+    queries, _ = make_corpus(15, seed=3)
+    queries.append("kalimat asing tanpa fitur apapun")
+    n_tokens = len(by_corpus.token_vocabulary)
+    query_corpus = preprocessor.batch_preprocess_to_corpus(
+        queries, vocabulary=by_corpus.token_vocabulary, grow=False
+    )
+    assert len(by_corpus.token_vocabulary) == n_tokens
+    assert np.allclose(
+        by_corpus.transform_corpus(query_corpus).toarray(),
+        by_string.transform(preprocessor.batch_preprocess_to_text(queries)).toarray()
+    )
+
+    # Key n-gram fitur dihitung sekali per token_vocabulary (sudah oleh
+    # transform_corpus di atas), bukan per transform
+    computed = []
+    feature_keys = by_corpus._feature_keys
+    by_corpus._feature_keys = lambda vocabulary: computed.append(1) or feature_keys(vocabulary)
+    for query in queries[:3]:
+        single = preprocessor.batch_preprocess_to_corpus(
+            [query], vocabulary=by_corpus.token_vocabulary, grow=False
+        )
+        assert np.allclose(by_corpus.transform_corpus(single).toarray(),
+                           by_string.transform(preprocessor.batch_preprocess_to_text([query])).toarray())
+    assert len(computed) == 0
+
+    # Token baru (grow=True) mengubah basis key: cache dihitung ulang
+    grown = preprocessor.batch_preprocess_to_corpus(
+        queries, vocabulary=by_corpus.token_vocabulary, grow=True
+    )
+    assert len(by_corpus.token_vocabulary) > n_tokens
+    assert np.allclose(
+        by_corpus.transform_corpus(grown).toarray(),
+        by_string.transform(preprocessor.batch_preprocess_to_text(queries)).toarray()
+    )
+    assert len(computed) == 1
+
+
+def test_hashing_backend_online_idf():
+    """IDF online (partial_fit) sama dengan fit sekaligus; corpus == string"""
+    preprocessor = TextPreprocessor()
+    texts, _ = make_corpus(60)
+    preprocessed = preprocessor.batch_preprocess_to_text(texts)
+
+    full = HashingFeatureExtractor(n_features=2 ** 12)
+    expected = full.fit_transform(preprocessed)
+
+    online = HashingFeatureExtractor(n_features=2 ** 12)
+    online.partial_fit(preprocessed[:25])
+    online.partial_fit(iter(preprocessed[25:]), chunk_size=10)
+    assert online.n_documents == 60
+    assert np.allclose(online.transform(preprocessed).toarray(), expected.toarray())
+
+    corpus = preprocessor.batch_preprocess_to_corpus(preprocessed, preprocessed=True)
+    assert np.allclose(online.transform_corpus(corpus).toarray(), expected.toarray())
+
+
+def test_hashing_classifier_save_load():
+    """KNNClassifier dengan backend hashing bisa disimpan, di-load dan menjelaskan prediksi"""
+    texts, labels = make_corpus()
+    knn = KNNClassifier(k=3, feature_backend='hashing')
+    data = knn.prepare_data(texts, labels)
+    knn.train(data['X_train'], data['y_train'])
+
+    queries, _ = make_corpus(10, seed=2)
+    with tempfile.TemporaryDirectory() as tmp:
+        knn.save(tmp)
+        restored = KNNClassifier()
+        restored.load(tmp)
+
+    assert isinstance(restored.feature_extractor, HashingFeatureExtractor)
+    assert list(restored.predict(queries)) == list(knn.predict(queries))
+
+    important = restored.get_important_words(queries[0], top_n=5)
+    words = important['preprocessed_text'].split()
+    assert important['words']
+    assert all(term.split()[0] in words for term, _ in important['words'])
+
+
+def test_partial_fit_appends_and_rebuilds_on_drift():
+    """partial_fit menambah/mengganti baris; IDF baru hanya aktif jika drift > threshold"""
+    texts, labels = make_corpus(90)
+    ids = list(range(90))
+    knn = KNNClassifier(k=3)
+    data = knn.prepare_data(texts[:60], labels[:60], ids=ids[:60])
+    knn.train(data['X_train'], data['y_train'], counts=data['C_train'], ids=data['ids_train'])
+    n_train = knn.X_train.shape[0]
+    active_idf = knn.feature_extractor.idf_.copy()
+
+    # Drift kecil: IDF aktif tetap, baris baru di-weight dengan IDF yang sama
+    result = knn.partial_fit(texts[60:70], labels[60:70], ids=ids[60:70], drift_threshold=1.0)
+    assert not result['rebuilt'] and result['added'] == 10
+    assert np.allclose(knn.feature_extractor.idf_, active_idf)
+    assert knn.X_train.shape[0] == n_train + 10
+
+    # Koreksi label: baris dengan id yang sama diganti, bukan ditambah
+    relabeled = 'RPL' if labels[60] == 'TKJ' else 'TKJ'
+    result = knn.partial_fit([texts[60]], [relabeled], ids=[60], drift_threshold=1.0)
+    assert result['replaced'] == 1 and knn.X_train.shape[0] == n_train + 10
+    assert knn.y_train[list(knn.train_ids).index(60)] == relabeled
+
+    # Abstrak diedit (id dobel: versi terakhir dipakai): document frequency teks
+    # lama dikurangi dan teks baru ditambahkan
+    extractor = knn.feature_extractor
+    df, n_documents = extractor.document_frequency.copy(), extractor.n_documents
+    old_row = knn.train_counts[list(knn.train_ids).index(61)].toarray()[0] > 0
+    result = knn.partial_fit([texts[0], texts[1]], [labels[1], labels[1]], ids=[61, 61],
+                             drift_threshold=1.0)
+    assert (result['added'], result['replaced']) == (0, 1)
+    assert knn.X_train.shape[0] == n_train + 10 and list(knn.train_ids).count(61) == 1
+    row = list(knn.train_ids).index(61)
+    new_row = knn.train_counts[row].toarray()[0] > 0
+    assert np.array_equal(extractor.document_frequency, df - old_row + new_row)
+    assert extractor.n_documents == n_documents
+    assert np.allclose(knn.X_train[row].toarray(), knn.transform([texts[1]]).toarray())
+
+    # Drift melewati threshold: IDF baru aktif dan semua baris di-weight ulang
+    result = knn.partial_fit(texts[70:], labels[70:], ids=ids[70:], drift_threshold=0.0)
+    extractor = knn.feature_extractor
+    assert result['rebuilt']
+    assert extractor.n_documents == 90
+    assert np.allclose(extractor.idf_, extractor.compute_idf())
+    assert np.allclose(knn.X_train.toarray(),
+                       extractor.weight_counts(knn.train_counts).toarray())
+
+    # Data training ikut tersimpan sehingga partial_fit tetap bisa setelah load
+    with tempfile.TemporaryDirectory() as tmp:
+        knn.save(tmp)
+        restored = KNNClassifier()
+        restored.load(tmp)
+    assert restored.X_train.shape == knn.X_train.shape
+    assert restored.partial_fit(texts[:2], labels[:2])['added'] == 2
+
+
+def test_sparse_knn_index_matches_sklearn():
+    """Index sparse-dot harus identik dengan KNeighborsClassifier cosine/distance"""
+    import scipy.sparse as sp
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.preprocessing import normalize
+    from knn_index import SparseKNNIndex
+
+    rng = np.random.RandomState(0)
+    X = normalize(sp.random(300, 80, density=0.05, format='csr', random_state=rng))
+    y = rng.choice(['A', 'B', 'C'], size=300)
+    # Query berisi dokumen training (jarak 0) dan baris kosong
+    queries = sp.vstack([X[:20], normalize(sp.random(57, 80, density=0.05, random_state=rng)),
+                         sp.csr_matrix((1, 80))], format='csr')
+
+    expected = KNeighborsClassifier(n_neighbors=5, metric='cosine', weights='distance').fit(X, y)
+    index = SparseKNNIndex(n_neighbors=5, block_size=16).fit(X, y)
+
+    exp_dist, exp_ind = expected.kneighbors(queries)
+    dist, ind = index.kneighbors(queries)
+    assert np.array_equal(ind, exp_ind)
+    assert np.array_equal(dist, exp_dist)
+
+    predictions, probabilities = index.predict_with_proba(queries)
+    assert np.array_equal(predictions, expected.predict(queries))
+    assert np.array_equal(probabilities, expected.predict_proba(queries))
+
+    # Tanpa block_size: baris per blok dari anggaran elemen (di sini 3 query per blok)
+    budget_index = SparseKNNIndex(n_neighbors=5, block_elements=3 * 300).fit(X, y)
+    dist, ind = budget_index.kneighbors(queries)
+    assert np.array_equal(ind, exp_ind) and np.array_equal(dist, exp_dist)
+
+    # Jarak dikembalikan dalam dtype index
+    index32 = SparseKNNIndex(n_neighbors=5, dtype=np.float32).fit(X, y)
+    dist32, ind32 = index32.kneighbors(queries)
+    assert dist32.dtype == np.float32
+    assert np.allclose(dist32, exp_dist, atol=1e-5)
+
+    # Lewat KNNClassifier (termasuk setelah save/load)
+    texts, labels = make_corpus(80)
+    knn = KNNClassifier(k=5, preprocessor=TextPreprocessor())
+    data = knn.prepare_data(texts, labels)
+    knn.train(data['X_train'], data['y_train'])
+    # Classifier sklearn tidak di-fit di samping index (tidak ada salinan data kedua)
+    assert not hasattr(knn.classifier, '_fit_X')
+    reference = KNeighborsClassifier(n_neighbors=5, metric='cosine', weights='distance')
+    reference.fit(data['X_train'], data['y_train'])
+    assert np.array_equal(knn.predict_matrix(data['X_test'])[1],
+                          reference.predict_proba(data['X_test']))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mmap in (True, False):
+            knn.save(tmp, mmap=mmap)
+            restored = KNNClassifier(preprocessor=TextPreprocessor())
+            restored.load(tmp)
+            assert not hasattr(restored.classifier, '_fit_X')
+            assert np.array_equal(restored.predict(texts), reference.predict(knn.transform(texts)))
+
+
+def test_predict_with_details_single_pass():
+    """Label, confidence dan tetangga dari satu transform, sama dengan predict/predict_proba"""
+    texts, labels = make_corpus(60)
+    ids = list(range(100, 160))
+    knn = KNNClassifier(k=3, preprocessor=TextPreprocessor())
+    data = knn.prepare_data(texts, labels, ids=ids)
+    knn.train(data['X_train'], data['y_train'], ids=data['ids_train'])
+
+    queries = texts[:10]
+    expected_labels = knn.predict(queries)
+    expected_proba = knn.predict_proba(queries)
+
+    calls = []
+    transform = knn.transform
+    knn.transform = lambda *args, **kwargs: calls.append(args) or transform(*args, **kwargs)
+    details = knn.predict_with_details(queries)
+
+    assert len(calls) == 1
+    assert np.array_equal(details['labels'], expected_labels)
+    assert np.array_equal(details['probabilities'], expected_proba)
+    assert np.array_equal(details['confidence'], expected_proba.max(axis=1))
+    assert details['neighbor_ids'].shape == (10, 3)
+    assert set(details['neighbor_ids'].ravel()) <= set(data['ids_train'])
+
+    # Dokumen training: tetangga terdekatnya adalah dirinya sendiri
+    train_ids = list(data['ids_train'][:5])
+    train_texts = [texts[ids.index(i)] for i in train_ids]
+    nearest = knn.predict_with_details(train_texts)['neighbor_ids'][:, 0]
+    assert list(nearest) == train_ids
+    assert knn.predict_single(queries[0]) == (expected_labels[0], expected_proba[0].max())
+
+
+def test_lsh_index_recall_and_classifier_backend():
+    """Index LSH menemukan near-duplicate, fallback eksak, dan bisa dipakai KNNClassifier"""
+    import scipy.sparse as sp
+    from sklearn.preprocessing import normalize
+    from knn_index import RandomProjectionIndex, SparseKNNIndex, recall_at_k
+
+    rng = np.random.RandomState(0)
+    X = normalize(sp.random(2000, 300, density=0.05, format='csr', random_state=rng))
+    y = rng.choice(['RPL', 'TKJ'], size=2000)
+    # Query = dokumen training dengan sedikit noise
+    noise = sp.random(100, 300, density=0.005, format='csr', random_state=rng) * 0.1
+    queries = normalize(X[:100] + noise)
+
+    index = RandomProjectionIndex(n_neighbors=1, n_tables=8, n_bits=10).fit(X, y)
+    report = recall_at_k(index, queries)
+    assert report['recall'] >= 0.95
+    assert report['mean_candidates'] < 2000
+
+    # Bucket hampir selalu kosong: query jatuh ke pencarian eksak
+    sparse_index = RandomProjectionIndex(n_neighbors=5, n_tables=1, n_bits=63,
+                                         multi_probe=False).fit(X, y)
+    exact = SparseKNNIndex(n_neighbors=5).fit(X, y)
+    _, found = sparse_index.kneighbors(queries[:10])
+    _, expected = exact.kneighbors(queries[:10])
+    assert np.array_equal(found, expected)
+
+    texts, labels = make_corpus(80)
+    knn = KNNClassifier(k=3, preprocessor=TextPreprocessor(), index_backend='lsh',
+                        index_params={'n_tables': 8, 'n_bits': 6})
+    data = knn.prepare_data(texts, labels)
+    knn.train(data['X_train'], data['y_train'])
+    results = knn.evaluate(data['X_test'], data['y_test'])
+    assert 0.0 <= results['index_recall']['recall'] <= 1.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        knn.save(tmp)
+        restored = KNNClassifier(preprocessor=TextPreprocessor())
+        restored.load(tmp)
+        assert isinstance(restored.index, RandomProjectionIndex)
+        assert restored.index.n_bits == 6
+        assert np.array_equal(restored.predict(texts), knn.predict(texts))
+
+
+def test_find_optimal_k_single_query_matches_per_k_fit():
+    """Kurva k dari satu query k terbesar sama dengan fit KNN terpisah per k"""
+    import scipy.sparse as sp
+    from sklearn.metrics import accuracy_score, f1_score
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.preprocessing import normalize
+
+    rng = np.random.RandomState(1)
+    X = normalize(sp.random(400, 60, density=0.1, format='csr', random_state=rng))
+    y = np.where(X[:, :30].sum(axis=1).A1 > X[:, 30:].sum(axis=1).A1, 'RPL', 'TKJ')
+    X_train, y_train, X_test, y_test = X[:300], y[:300], X[300:], y[300:]
+
+    knn = KNNClassifier(k=5)
+    search = knn.find_optimal_k(X_train, y_train, X_test, y_test, k_range=range(1, 16))
+
+    for result in search['results']:
+        expected = KNeighborsClassifier(n_neighbors=result['k'], metric='cosine',
+                                        weights='distance').fit(X_train, y_train)
+        y_pred = expected.predict(X_test)
+        assert result['accuracy'] == accuracy_score(y_test, y_pred)
+        assert np.isclose(result['f1_macro'], f1_score(y_test, y_pred, average='macro'))
+    assert search['best_k'] in range(1, 16)
+
+    # Cross-validation: fold paralel, kurva dengan spread per k
+    cv_search = knn.find_optimal_k(X_train, y_train, k_range=range(1, 8), cv=4, n_jobs=2)
+    assert cv_search['n_splits'] == 4
+    assert [r['k'] for r in cv_search['results']] == list(range(1, 8))
+    assert all(0 <= r['f1_macro'] <= 1 and r['accuracy_std'] >= 0 for r in cv_search['results'])
+    # Fold di proses worker (loky) sama dengan fold serial
+    serial = knn.find_optimal_k(X_train, y_train, k_range=range(1, 8), cv=4, n_jobs=1)
+    assert serial['results'] == cv_search['results']
+
+    knn.set_k(cv_search['best_k'])
+    assert knn.index.n_neighbors == cv_search['best_k']
+    knn.train(X_train, y_train)
+    reference = KNeighborsClassifier(n_neighbors=cv_search['best_k'], metric='cosine',
+                                     weights='distance').fit(X_train, y_train)
+    predictions, probabilities = knn.predict_matrix(X_test)
+    assert np.array_equal(predictions, reference.predict(X_test))
+    assert np.allclose(probabilities, reference.predict_proba(X_test), atol=1e-5)
+
+
+def test_cross_validate_texts_preprocesses_once_and_refits_idf():
+    """CV: setiap teks di-preprocess sekali, IDF di-fit hanya dari fold training"""
+    from sklearn.model_selection import StratifiedKFold
+    from sklearn.neighbors import KNeighborsClassifier
+
+    texts, labels = make_corpus(60)
+    preprocessor = TextPreprocessor()
+    calls = []
+    iter_tokens = preprocessor.iter_tokens
+    preprocessor.iter_tokens = lambda text: calls.append(text) or iter_tokens(text)
+
+    knn = KNNClassifier(k=3, preprocessor=preprocessor)
+    results = knn.cross_validate_texts(texts, labels, cv=4, n_jobs=2)
+
+    assert len(calls) == len(texts)
+    assert results['n_splits'] == 4 and len(results['folds']) == 4
+    assert np.isclose(results['accuracy'], np.mean(results['cv_scores']))
+    assert set(results['f1_score']) == {'RPL', 'TKJ'}
+    assert results['std']['accuracy'] >= 0
+
+    # Fold pertama sama dengan fit TfidfVectorizer + KNN sklearn pada teks fold itu
+    preprocessed = [' '.join(iter_tokens(text)) for text in texts]
+    y = np.asarray(labels)
+    fit, held_out = next(StratifiedKFold(n_splits=4, shuffle=True, random_state=42)
+                         .split(np.zeros(len(y)), y))
+    extractor = FeatureExtractor()
+    X_fit = extractor.fit_transform([preprocessed[i] for i in fit])
+    X_eval = extractor.transform([preprocessed[i] for i in held_out])
+    y_pred = KNeighborsClassifier(n_neighbors=3, metric='cosine', weights='distance')\
+        .fit(X_fit, y[fit]).predict(X_eval)
+    assert results['folds'][0]['accuracy'] == np.mean(y_pred == y[held_out])
+    assert results['folds'][0]['n_features'] == len(extractor.feature_names)
+
+    # Corpus dari prepare_data bisa dipakai langsung tanpa preprocessing ulang
+    data = knn.prepare_data(texts, labels)
+    n_calls = len(calls)
+    again = knn.cross_validate_corpus(data['corpus'], data['labels'], cv=4)
+    assert len(calls) == n_calls
+    assert again['cv_scores'] == results['cv_scores']
+
+    # Fold dibangun di worker dari array ids/offsets, sama dengan TokenCorpus.subset
+    corpus = data['corpus']
+    ids = np.frombuffer(corpus.ids, dtype=np.uint32)
+    offsets = np.frombuffer(corpus.offsets, dtype=np.uint64)
+    subset = KNNClassifier._corpus_subset(ids, offsets, corpus.vocabulary, corpus.grow, held_out)
+    expected = corpus.subset(held_out)
+    assert (subset.ids, subset.offsets) == (expected.ids, expected.offsets)
+
+
+def test_important_words_stem_each_word_once():
+    """Setiap kata unik di-stem sekali; variasi sama dengan pencocokan lama"""
+    from benchmark import legacy_variations
+    from preprocessing import StemCache
+
+    class CountingCache(StemCache):
+        def stem(self, word, stemmer):
+            calls.append(word)
+            return super().stem(word, stemmer)
+
+    calls = []
+    texts, labels = make_corpus(60)
+    knn = KNNClassifier(k=3, preprocessor=TextPreprocessor(stem_cache=CountingCache()))
+    data = knn.prepare_data(texts, labels)
+    knn.train(data['X_train'], data['y_train'])
+
+    text = texts[0] + " Pengembangan sistem, DIKEMBANGKAN ulang: sistem-sistem jaringan."
+    important = knn.get_important_words(text, top_n=20)
+    expected = legacy_variations(text, important['words'], knn.preprocessor.stemmer)
+    assert [word['variations'] for word in important['original_words']] == expected
+    assert any(len(variations) > 1 for variations in expected)
+
+    calls.clear()
+    knn._stem_variations(text)
+    assert sorted(calls) == sorted(set(re.findall(r'\b\w+\b', text.lower())))
+
+    # Top feature sparse sama dengan urutan score dari vektor dense
+    vector = knn.feature_extractor.transform([important['preprocessed_text']])
+    dense = knn.feature_extractor.get_top_features(vector.toarray()[0], top_n=20)
+    assert important['words'] == dense
+    assert [score for _, score in dense] == sorted(vector.data, reverse=True)[:20]
+
+
+def test_mmap_model_format_shares_arrays_and_falls_back_to_joblib():
+    """Format memory-mapped: array read-only tanpa salinan, hasil sama dengan joblib"""
+    import os
+    from knn_index import RandomProjectionIndex
+    
+    texts, labels = make_corpus(80)
+    queries, _ = make_corpus(20, seed=3)
+    
+    for params in ({}, {'metric': 'euclidean'},
+                   {'index_backend': 'lsh', 'index_params': {'n_tables': 4, 'n_bits': 6}}):
+        knn = KNNClassifier(k=3, preprocessor=TextPreprocessor(), **params)
+        data = knn.prepare_data(texts, labels)
+        knn.train(data['X_train'], data['y_train'], counts=data['C_train'],
+                  ids=data['ids_train'])
+        expected = knn.predict_proba(queries)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            knn.save(tmp, mmap=False)
+            knn.save(tmp)
+            assert not os.path.exists(os.path.join(tmp, 'knn_classifier.joblib'))
+            
+            restored = KNNClassifier(preprocessor=TextPreprocessor())
+            restored.load(tmp)
+            assert np.array_equal(restored.predict_proba(queries), expected)
+            assert isinstance(restored.y_train, np.memmap)
+            # Array read-only hasil memory-map dipakai langsung, tanpa salinan
+            assert not restored.train_counts.data.flags.writeable
+            assert not restored.X_train.data.flags.writeable
+            if restored.index is not None:
+                assert restored.index._fit_X is restored.X_train
+            if isinstance(restored.index, RandomProjectionIndex):
+                assert isinstance(restored.index._order, np.memmap)
+                # Satu baris contiguous per tabel
+                assert restored.index._order.shape == (4, knn.X_train.shape[0])
+                assert restored.index._order.flags.c_contiguous
+            
+            # partial_fit tidak menulis ke array read-only
+            restored.partial_fit(queries[:4], ['RPL', 'TKJ', 'RPL', 'TKJ'])
+            assert restored.X_train.shape[0] == knn.X_train.shape[0] + 4
+            
+            # Format joblib tetap bisa di-load (kembali dari model memory-mapped)
+            knn_mmap = KNNClassifier(preprocessor=TextPreprocessor())
+            knn_mmap.load(tmp)
+            knn_mmap.save(tmp, mmap=False)
+            assert not os.path.exists(os.path.join(tmp, 'arrays'))
+            legacy = KNNClassifier(preprocessor=TextPreprocessor())
+            legacy.load(tmp)
+            assert np.allclose(legacy.predict_proba(queries), expected)
+
+
+def test_float32_dtype_end_to_end():
+    """dtype float32 dipakai dari feature extractor sampai index dan tetap tersimpan"""
+    texts, labels = make_corpus(80)
+    queries, _ = make_corpus(20, seed=3)
+    
+    for backend in ('tfidf', 'hashing'):
+        results = {}
+        for dtype in (np.float64, np.float32):
+            knn = KNNClassifier(k=3, preprocessor=TextPreprocessor(), feature_backend=backend,
+                                dtype=dtype)
+            data = knn.prepare_data(texts, labels)
+            knn.train(data['X_train'], data['y_train'], counts=data['C_train'])
+            assert data['X_train'].dtype == dtype and data['C_train'].dtype == dtype
+            assert knn.index._fit_X.dtype == dtype
+            assert knn.transform(queries).dtype == dtype
+            results[dtype] = knn.predict_proba(queries)
+            
+            for mmap in (True, False):
+                with tempfile.TemporaryDirectory() as tmp:
+                    knn.save(tmp, mmap=mmap)
+                    restored = KNNClassifier(preprocessor=TextPreprocessor())
+                    restored.load(tmp)
+                    assert restored.dtype == dtype
+                    assert restored.feature_extractor.dtype == dtype
+                    assert restored.index._fit_X.dtype == dtype
+                    assert np.array_equal(restored.predict_proba(queries), results[dtype])
+        
+        assert np.allclose(results[np.float32], results[np.float64], atol=1e-4)
+    
+    # String transform dan TokenCorpus tetap sama di float32
+    extractor = FeatureExtractor(dtype=np.float32)
+    preprocessor = TextPreprocessor()
+    preprocessed = preprocessor.batch_preprocess_to_text(texts)
+    X = extractor.fit_transform_corpus(preprocessor.batch_preprocess_to_corpus(texts))
+    assert X.dtype == np.float32
+    assert np.allclose(extractor.transform(preprocessed).toarray(), X.toarray(), atol=1e-6)
+
+
+def test_similarity_graph_matches_dense_top_k():
+    """Graph top-k per blok sama dengan top-k dari matrix similarity dense"""
+    import os
+    import scipy.sparse as sp
+    from sklearn.preprocessing import normalize
+    from feature_extraction import SimilarityCalculator
+    
+    X = normalize(sp.random(200, 60, density=0.3, format='csr', random_state=0))
+    X = sp.vstack([X, X[:3] * 2]).tocsr()  # 3 duplikat (beda skala)
+    
+    dense = SimilarityCalculator.cosine_similarity_matrix(X)
+    np.fill_diagonal(dense, -np.inf)
+    
+    graph = SimilarityCalculator.similarity_graph(X, k=4, block_size=17)
+    assert graph.shape == (203, 203) and graph.diagonal().sum() == 0
+    for i in range(X.shape[0]):
+        expected = np.sort(dense[i])[::-1][:4]
+        assert np.allclose(graph[i].data, expected[expected > 0])
+    
+    # Ditulis ke disk per blok lalu di-load dengan memory-map
+    with tempfile.TemporaryDirectory() as tmp:
+        streamed = SimilarityCalculator.similarity_graph(X, k=4, output_dir=tmp)
+        assert sorted(os.listdir(tmp)) == ['neighbors.npy', 'similarities.npy']
+        loaded = SimilarityCalculator.load_similarity_graph(tmp)
+        assert abs(loaded - streamed).max() == 0
+        assert np.allclose(loaded.toarray(), graph.toarray())
+    
+    duplicates = SimilarityCalculator.find_duplicates(graph, threshold=0.999)
+    assert sorted((i, j) for i, j, _ in duplicates) == [(0, 200), (1, 201), (2, 202)]
+    
+    edges = SimilarityCalculator.get_similarity_edges(X, k=2)
+    assert len(edges) == graph.shape[0] * 2
+    assert edges.iloc[0]['target'] == 'Doc_200'
+
+
+def test_partial_selection_top_k_matches_full_sort():
+    """Top fitur dan find_k_nearest (argpartition, batch) sama dengan sort penuh"""
+    import scipy.sparse as sp
+    from sklearn.metrics.pairwise import cosine_similarity
+    from feature_extraction import SimilarityCalculator
+    
+    texts, labels = make_corpus(60)
+    knn = KNNClassifier(k=3, preprocessor=TextPreprocessor())
+    data = knn.prepare_data(texts, labels)
+    extractor = knn.feature_extractor
+    
+    # Score seri dan baris kosong ikut diuji
+    dense = np.round(data['X_train'].toarray(), 1)
+    dense[5] = 0
+    X = sp.csr_matrix(dense)
+    batch = extractor.get_top_features_batch(X, top_n=7)
+    for row, top in zip(X.toarray(), batch):
+        order = np.lexsort((np.arange(len(row)), -row))[:7]
+        assert top == [(extractor.feature_names[i], row[i]) for i in order if row[i] > 0]
+        assert extractor.get_top_features(row, top_n=7) == top
+    assert batch[5] == []
+    
+    queries = data['X_test']
+    indices, similarities = SimilarityCalculator.find_k_nearest_batch(queries, X, k=4)
+    expected = cosine_similarity(queries, X)
+    assert indices.shape == (queries.shape[0], 4)
+    assert np.allclose(similarities, -np.sort(-expected, axis=1)[:, :4])
+    assert np.allclose(np.take_along_axis(expected, indices, axis=1), similarities)
+    single, _ = SimilarityCalculator.find_k_nearest(queries[0], X, k=4)
+    assert np.array_equal(single, indices[0])
+    
+    # Hashing: nama kolom per baris dari teks masing-masing
+    hashing = HashingFeatureExtractor(n_features=2 ** 12)
+    preprocessed = TextPreprocessor().batch_preprocess_to_text(texts[:5])
+    H = hashing.fit_transform(preprocessed)
+    batch = hashing.get_top_features_batch(H, top_n=5, texts=preprocessed)
+    for i, text in enumerate(preprocessed):
+        assert batch[i] == hashing.get_top_features(H[i], top_n=5, text=text)
+        assert all(not name.startswith('#') for name, _ in batch[i])
+
+
+def test_binary_vectorizer_format_matches_joblib():
+    """Format biner vectorizer: vocabulary/IDF memory-mapped, transform sama dengan joblib"""
+    import os
+    from feature_extraction import SortedVocabulary
+    
+    texts, labels = make_corpus(80)
+    queries, _ = make_corpus(20, seed=3)
+    preprocessor = TextPreprocessor()
+    preprocessed = preprocessor.batch_preprocess_to_text(queries)
+    
+    for dtype in (np.float64, np.float32):
+        extractor = FeatureExtractor(dtype=dtype)
+        extractor.fit_corpus(preprocessor.batch_preprocess_to_corpus(texts))
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            extractor.save_binary(os.path.join(tmp, 'binary'))
+            restored = FeatureExtractor()
+            restored.load_binary(os.path.join(tmp, 'binary'))
+            
+            assert restored.dtype == dtype
+            assert isinstance(restored.vectorizer.vocabulary_, SortedVocabulary)
+            assert isinstance(restored.idf_, np.memmap) and restored.idf_.dtype == dtype
+            assert dict(restored.vectorizer.vocabulary_) == extractor.vectorizer.vocabulary_
+            assert 'tidak ada di vocabulary' not in restored.vectorizer.vocabulary_
+            assert restored.get_feature_names() == extractor.get_feature_names()
+            
+            expected = extractor.transform(preprocessed)
+            assert np.allclose(restored.transform(preprocessed).toarray(), expected.toarray())
+            corpus = preprocessor.batch_preprocess_to_corpus(
+                queries, vocabulary=restored.token_vocabulary)
+            assert np.allclose(restored.transform_corpus(corpus).toarray(), expected.toarray())
+    
+    # KNNClassifier: format mmap memakai folder biner, joblib memakai file lama
+    knn = KNNClassifier(k=3, preprocessor=TextPreprocessor())
+    data = knn.prepare_data(texts, labels)
+    knn.train(data['X_train'], data['y_train'], counts=data['C_train'])
+    expected = knn.predict_proba(queries)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        knn.save(tmp, mmap=False)
+        knn.save(tmp)
+        assert os.path.isdir(os.path.join(tmp, 'tfidf_vectorizer'))
+        assert not os.path.exists(os.path.join(tmp, 'tfidf_vectorizer.joblib'))
+        
+        restored = KNNClassifier(preprocessor=TextPreprocessor())
+        restored.load(tmp)
+        assert isinstance(restored.feature_extractor.feature_names, np.memmap)
+        assert np.array_equal(restored.predict_proba(queries), expected)
+        assert restored.get_important_words(queries[0], top_n=5) == \
+            knn.get_important_words(queries[0], top_n=5)
+        
+        restored.save(tmp, mmap=False)
+        assert not os.path.exists(os.path.join(tmp, 'tfidf_vectorizer'))
+        legacy = KNNClassifier(preprocessor=TextPreprocessor())
+        legacy.load(tmp)
+        assert np.allclose(legacy.predict_proba(queries), expected)
+
+
+if __name__ == '__main__':
+    test_prepare_data_stream_matches_prepare_data()
+    test_predict_stream_matches_predict()
+    test_token_corpus_matches_string_vectorizer()
+    test_hashing_backend_online_idf()
+    test_hashing_classifier_save_load()
+    test_partial_fit_appends_and_rebuilds_on_drift()
+    test_sparse_knn_index_matches_sklearn()
+    test_predict_with_details_single_pass()
+    test_lsh_index_recall_and_classifier_backend()
+    test_find_optimal_k_single_query_matches_per_k_fit()
+    test_cross_validate_texts_preprocesses_once_and_refits_idf()
+    test_important_words_stem_each_word_once()
+    test_mmap_model_format_shares_arrays_and_falls_back_to_joblib()
+    test_float32_dtype_end_to_end()
+    test_similarity_graph_matches_dense_top_k()
+    test_partial_selection_top_k_matches_full_sort()
+    test_binary_vectorizer_format_matches_joblib()
+    print("✅ All classifier tests passed")
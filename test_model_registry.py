@@ -0,0 +1,120 @@
+"""
+Test untuk registry model ber-versi dan hot-swap (tanpa database)
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from classifier import KNNClassifier
+from model_registry import LEGACY_VERSION, ModelHandle, ModelRegistry
+from preprocessing import TextPreprocessor
+from test_classifier import make_corpus
+
+
+def train_knn(k: int = 3, seed: int = 0) -> KNNClassifier:
+    """KNNClassifier kecil yang sudah di-train"""
+    texts, labels = make_corpus(40, seed=seed)
+    knn = KNNClassifier(k=k, preprocessor=TextPreprocessor())
+    data = knn.prepare_data(texts, labels)
+    knn.train(data['X_train'], data['y_train'], counts=data['C_train'])
+    return knn
+
+
+def test_publish_is_atomic_and_prunes_old_versions():
+    """Versi baru ditulis terpisah; save yang gagal tidak mengubah versi aktif"""
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = ModelRegistry(tmp, keep=2)
+        assert registry.current_version() is None
+        
+        first = registry.publish(train_knn(k=3))
+        assert registry.current_version() == first
+        assert os.path.exists(os.path.join(registry.version_path(first), 'model_metadata.joblib'))
+        
+        # Crash di tengah save: file setengah tertulis hanya ada di direktori sementara
+        broken = train_knn(k=5)
+        save = broken.save
+        
+        def crash(directory):
+            save(directory)
+            raise IOError("disk penuh")
+        
+        broken.save = crash
+        try:
+            registry.publish(broken)
+            assert False, "publish harus meneruskan error save"
+        except IOError:
+            pass
+        assert registry.versions() == [first]
+        assert registry.current_version() == first
+        assert os.listdir(registry.versions_dir) == [first]
+        
+        # Hanya `keep` versi terbaru yang disimpan
+        second = registry.publish(train_knn(k=5))
+        third = registry.publish(train_knn(k=7))
+        assert registry.versions() == [second, third]
+        
+        restored = KNNClassifier(preprocessor=TextPreprocessor())
+        assert registry.load(restored) == third and restored.k == 7
+        
+        # Rollback ke versi sebelumnya, lalu ke versi tertentu
+        assert registry.rollback() == second
+        assert registry.current_version() == second
+        registry.rollback(third)
+        assert registry.current_version() == third
+
+
+def test_model_handle_hot_swaps_new_version():
+    """Proses serving mengikuti pointer CURRENT tanpa restart"""
+    queries, _ = make_corpus(10, seed=5)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        publisher = ModelRegistry(tmp)
+        first = publisher.publish(train_knn(k=3))
+        
+        handle = ModelHandle(ModelRegistry(tmp),
+                             lambda: KNNClassifier(preprocessor=TextPreprocessor()),
+                             check_interval=0.0)
+        serving = handle.get()
+        assert handle.version == first and serving.k == 3
+        
+        # Tanpa perubahan pointer model tidak di-load ulang
+        assert not handle.refresh()
+        assert handle.get() is serving
+        
+        # Versi baru dari "proses lain": di-load di background lalu ditukar
+        trained = train_knn(k=5, seed=1)
+        second = publisher.publish(trained)
+        assert handle.refresh(wait=True)
+        assert handle.version == second and handle.get().k == 5
+        assert np.array_equal(handle.get().predict(queries), trained.predict(queries))
+        
+        # Referensi lama tetap bisa dipakai request yang sedang berjalan
+        assert len(serving.predict(queries)) == len(queries)
+        
+        publisher.rollback()
+        handle.refresh(wait=True)
+        assert handle.version == first
+
+
+def test_legacy_model_directory_is_loaded():
+    """Model lama (langsung di root) tetap bisa di-load sebelum ada versi"""
+    with tempfile.TemporaryDirectory() as tmp:
+        train_knn(k=3).save(tmp)
+        registry = ModelRegistry(tmp)
+        assert registry.current_version() == LEGACY_VERSION
+        
+        restored = KNNClassifier(preprocessor=TextPreprocessor())
+        assert registry.load(restored) == LEGACY_VERSION and restored.is_trained
+        
+        version = registry.publish(train_knn(k=5))
+        assert registry.current_version() == version
+        assert registry.rollback(LEGACY_VERSION) == LEGACY_VERSION
+        assert registry.current_version() == LEGACY_VERSION
+
+
+if __name__ == '__main__':
+    test_publish_is_atomic_and_prunes_old_versions()
+    test_model_handle_hot_swaps_new_version()
+    test_legacy_model_directory_is_loaded()
+    print("✅ All model registry tests passed")
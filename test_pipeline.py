@@ -0,0 +1,199 @@
+"""
+Test untuk pipeline incremental (high-water mark per tahap)
+"""
+from flask import Flask
+
+from models import db, Abstract
+from pipeline import (
+    get_state, mark_processed, model_version, pending_query, process_new_abstracts,
+    run_auto_label_stage, run_predict_stages, run_train_stage
+)
+from preprocessing import TextPreprocessor
+from test_classifier import make_corpus
+
+
+def make_app():
+    """Flask app dengan database SQLite in-memory"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+
+def add_abstracts(texts, labels=None):
+    """Simpan abstrak (label opsional) ke database"""
+    labels = labels or [None] * len(texts)
+    for i, (text, label) in enumerate(zip(texts, labels)):
+        db.session.add(Abstract(title=f'Judul {i}', author='Penulis', year=2024,
+                                abstract_text=text, label=label))
+    db.session.commit()
+
+
+def test_only_new_and_edited_rows_are_processed():
+    """Run kedua hanya memproses baris baru dan baris yang diedit"""
+    from classifier import KNNClassifier
+
+    texts, labels = make_corpus(40)
+    knn = KNNClassifier(k=3, preprocessor=TextPreprocessor())
+    data = knn.prepare_data(texts, labels)
+    knn.train(data['X_train'], data['y_train'])
+
+    with make_app().app_context():
+        db.create_all()
+        add_abstracts(texts[:20], labels[:10] + [None] * 10)
+
+        first = process_new_abstracts(classifier=knn, chunk_size=7)
+        assert first['preprocess'] == 20
+        assert first['predict'] == 10
+        assert get_state('predict').version == knn.training_info['trained_at'].isoformat()
+
+        # Tanpa data baru tidak ada yang diproses (hasil pipeline tidak menaikkan updated_at)
+        second = process_new_abstracts(classifier=knn, chunk_size=7)
+        assert second['preprocess'] == 0
+        assert second['predict'] == 0
+
+        # Scraping baru + satu abstrak lama diedit
+        add_abstracts(texts[20:25])
+        edited = db.session.get(Abstract, 1)
+        edited.abstract_text = texts[30]
+        db.session.commit()
+
+        assert pending_query('preprocess').count() == 6
+        third = process_new_abstracts(classifier=knn, chunk_size=7)
+        assert third['preprocess'] == 6
+        assert third['predict'] == 5
+        assert edited.preprocessed_text == knn.preprocessor.preprocess_to_text(texts[30])
+        assert all(a.predicted_label for a in Abstract.query.filter(Abstract.label.is_(None)))
+
+        db.drop_all()
+
+
+def test_model_change_repredicts_old_rows():
+    """Setelah training ulang/rollback, abstrak lama tanpa label diprediksi ulang"""
+    from classifier import KNNClassifier
+
+    texts, labels = make_corpus(40)
+
+    def train(train_labels):
+        knn = KNNClassifier(k=3, preprocessor=TextPreprocessor())
+        data = knn.prepare_data(texts, train_labels)
+        knn.train(data['X_train'], data['y_train'])
+        return knn
+
+    first = train(labels)
+    # Label dibalik: model kedua memprediksi kebalikan model pertama
+    swapped = train(['TKJ' if label == 'RPL' else 'RPL' for label in labels])
+
+    with make_app().app_context():
+        db.create_all()
+        add_abstracts(texts[:12])
+
+        assert process_new_abstracts(classifier=first)['predict'] == 12
+        assert process_new_abstracts(classifier=first)['predict'] == 0
+        before = [a.predicted_label for a in Abstract.query.order_by(Abstract.id)]
+
+        # Model baru: baris di bawah high-water mark ikut diprediksi ulang
+        assert process_new_abstracts(classifier=swapped)['predict'] == 12
+        after = [a.predicted_label for a in Abstract.query.order_by(Abstract.id)]
+        assert after == list(swapped.predict(texts[:12]))
+        assert after != before
+        assert get_state('predict').version == swapped.training_info['trained_at'].isoformat()
+        assert process_new_abstracts(classifier=swapped)['predict'] == 0
+
+        # Rollback ke model lama juga memicu prediksi ulang
+        assert process_new_abstracts(classifier=first)['predict'] == 12
+        assert [a.predicted_label for a in Abstract.query.order_by(Abstract.id)] == before
+
+        db.drop_all()
+
+
+def test_auto_label_stage_is_incremental():
+    """Keyword auto-label hanya menyentuh abstrak yang baru masuk"""
+    texts, _ = make_corpus(12)
+
+    with make_app().app_context():
+        db.create_all()
+        add_abstracts(texts[:8])
+
+        assert sum(run_auto_label_stage().values()) == 8
+        assert sum(run_auto_label_stage().values()) == 0
+
+        add_abstracts(texts[8:])
+        assert sum(run_auto_label_stage().values()) == 4
+        assert get_state('auto_label').processed_count == 12
+
+        db.drop_all()
+
+
+def test_train_stage_adds_only_new_labels():
+    """Training incremental hanya menambahkan data berlabel sejak training terakhir"""
+    from classifier import KNNClassifier
+
+    texts, labels = make_corpus(50)
+
+    with make_app().app_context():
+        db.create_all()
+        add_abstracts(texts[:40], labels[:40])
+
+        rows = Abstract.query.order_by(Abstract.id).all()
+        knn = KNNClassifier(k=3, preprocessor=TextPreprocessor())
+        data = knn.prepare_data([a.abstract_text for a in rows], [a.label for a in rows],
+                                ids=[a.id for a in rows])
+        knn.train(data['X_train'], data['y_train'], counts=data['C_train'], ids=data['ids_train'])
+        mark_processed('train', Abstract.query.filter(Abstract.label.isnot(None)))
+
+        assert run_train_stage(knn)['added'] == 0
+
+        add_abstracts(texts[40:], labels[40:])
+        result = run_train_stage(knn)
+        assert result['added'] == 10
+        assert knn.X_train.shape[0] == data['X_train'].shape[0] + 10
+        assert run_train_stage(knn)['added'] == 0
+
+        db.drop_all()
+
+
+def test_incremental_update_repredicts_old_rows():
+    """Model hasil partial_fit (stage train) dianggap versi baru oleh stage predict"""
+    from classifier import KNNClassifier
+
+    texts, labels = make_corpus(60)
+
+    with make_app().app_context():
+        db.create_all()
+        add_abstracts(texts[:30], labels[:30])
+        add_abstracts(texts[48:])
+
+        labeled = Abstract.query.filter(Abstract.label.isnot(None)).order_by(Abstract.id).all()
+        knn = KNNClassifier(k=3, preprocessor=TextPreprocessor())
+        data = knn.prepare_data([a.abstract_text for a in labeled], [a.label for a in labeled],
+                                ids=[a.id for a in labeled])
+        knn.train(data['X_train'], data['y_train'], counts=data['C_train'], ids=data['ids_train'])
+        mark_processed('train', Abstract.query.filter(Abstract.label.isnot(None)))
+
+        assert process_new_abstracts(classifier=knn)['predict'] == 12
+        assert run_predict_stages(knn)['predict'] == 0
+        trained_version = model_version(knn)
+
+        add_abstracts(texts[30:48], labels[30:48])
+        assert run_train_stage(knn)['added'] == 18
+        assert model_version(knn) != trained_version
+        assert get_state('train').version == model_version(knn)
+
+        # Baris tanpa label di bawah high-water mark diprediksi ulang dengan model baru
+        assert run_predict_stages(knn)['predict'] == 12
+        unlabeled = Abstract.query.filter(Abstract.label.is_(None)).order_by(Abstract.id).all()
+        assert [a.predicted_label for a in unlabeled] == list(knn.predict(texts[48:]))
+        assert get_state('predict').version == model_version(knn)
+        assert run_predict_stages(knn)['predict'] == 0
+
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    test_only_new_and_edited_rows_are_processed()
+    test_model_change_repredicts_old_rows()
+    test_auto_label_stage_is_incremental()
+    test_train_stage_adds_only_new_labels()
+    test_incremental_update_repredicts_old_rows()
+    print("✅ All pipeline tests passed")
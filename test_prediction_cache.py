@@ -0,0 +1,99 @@
+"""
+Test untuk cache prediksi LRU + TTL per versi model (tanpa database)
+"""
+import tempfile
+
+from classifier import KNNClassifier
+from model_registry import ModelHandle, ModelRegistry
+from prediction_cache import PredictionCache
+from preprocessing import TextPreprocessor
+from test_classifier import make_corpus
+from test_model_registry import train_knn
+
+
+class FakeClock:
+    """Waktu yang dimajukan manual"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_size_and_ttl_eviction_with_metrics():
+    """Entri terlama dibuang saat penuh, entri kedaluwarsa dibuang saat dibaca"""
+    clock = FakeClock()
+    cache = PredictionCache(max_size=2, ttl=10.0, clock=clock)
+    
+    cache.set('abstrak satu', 'v1', ('RPL', 0.9))
+    cache.set('abstrak dua', 'v1', ('TKJ', 0.8))
+    # Whitespace/line break tidak mengubah key; hit menjadikan entri paling baru
+    assert cache.get('  abstrak\n satu ', 'v1') == ('RPL', 0.9)
+    cache.set('abstrak tiga', 'v1', ('RPL', 0.7))
+    assert cache.get('abstrak dua', 'v1') is None
+    assert cache.get('abstrak satu', 'v1') == ('RPL', 0.9)
+    
+    # Jenis hasil lain memakai key terpisah
+    assert cache.get('abstrak satu', 'v1', kind='important_words') is None
+    
+    clock.now = 10.5
+    assert cache.get('abstrak tiga', 'v1') is None
+    assert len(cache) == 1
+    
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (2, 3)
+    assert stats['hit_rate'] == 2 / 5
+    assert (stats['evictions'], stats['expirations']) == (1, 1)
+    
+    # max_size 0 = cache nonaktif, compute selalu dipanggil
+    disabled = PredictionCache(max_size=0)
+    calls = []
+    for _ in range(2):
+        disabled.get_or_compute('abstrak', 'v1', lambda: calls.append(1) or 'RPL')
+    assert len(calls) == 2 and len(disabled) == 0
+
+
+def test_new_model_version_invalidates_cache():
+    """Publish model baru (seperti /train) membuat prediksi lama tidak dipakai lagi"""
+    queries, _ = make_corpus(5, seed=7)
+    text = queries[0]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = ModelRegistry(tmp)
+        registry.publish(train_knn(k=3))
+        handle = ModelHandle(registry, lambda: KNNClassifier(preprocessor=TextPreprocessor()),
+                             check_interval=0.0, background=False)
+        cache = PredictionCache()
+        calls = []
+        
+        def classify():
+            version, classifier = handle.get_versioned()
+            
+            def predict():
+                calls.append(version)
+                return classifier.predict_single(text)
+            return cache.get_or_compute(text, version, predict)
+        
+        first = classify()
+        assert classify() == first
+        assert len(calls) == 1
+        
+        # Versi baru dari proses lain: entri versi lama dibuang begitu versi berubah
+        trained = train_knn(k=5, seed=1)
+        second = registry.publish(trained)
+        assert classify() == trained.predict_single(text)
+        assert calls[-1] == second and len(calls) == 2
+        assert len(cache) == 1
+        assert cache.stats()['invalidations'] == 1
+        
+        cache.invalidate()
+        assert len(cache) == 0
+        classify()
+        assert len(calls) == 3
+
+
+if __name__ == '__main__':
+    test_size_and_ttl_eviction_with_metrics()
+    test_new_model_version_invalidates_cache()
+    print("✅ All prediction cache tests passed")
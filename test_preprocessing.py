@@ -0,0 +1,156 @@
+"""
+Test untuk modul preprocessing (cache stemming, normalisasi, batch)
+"""
+import os
+import random
+import tempfile
+from types import SimpleNamespace
+
+from benchmark import legacy_clean_text
+from preprocessing import TextPreprocessor, StemCache, preprocess_hash
+
+
+SAMPLE_TEXT = (
+    "Penelitian ini bertujuan untuk mengembangkan sistem informasi akademik "
+    "berbasis web. Pengujian sistem dilakukan dengan metode black box testing."
+)
+
+
+def test_stem_cache_matches_stemmer():
+    """Hasil dengan cache harus sama dengan stemming langsung"""
+    preprocessor = TextPreprocessor(stem_cache=StemCache())
+    tokens = preprocessor.remove_stopwords(preprocessor.tokenize(SAMPLE_TEXT))
+
+    expected = [preprocessor.stemmer.stem(token) for token in tokens]
+
+    assert preprocessor.stem_tokens(tokens) == expected
+    # Panggilan kedua seluruhnya dilayani dari cache
+    assert preprocessor.stem_tokens(tokens) == expected
+
+    stats = preprocessor.stem_cache.stats()
+    print(f"Stem cache stats: {stats}")
+    assert stats['hits'] >= len(tokens)
+
+
+def test_stem_cache_bounded_and_persistent():
+    """Cache tidak melebihi max_size dan bisa disimpan/di-load"""
+    cache = StemCache(max_size=3)
+    for word in ['satu', 'dua', 'tiga', 'empat']:
+        cache.set(word, word)
+
+    assert len(cache) == 3
+    assert cache.get('satu') is None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stem_cache.joblib')
+        cache.save(path)
+
+        restored = StemCache()
+        assert restored.load(path)
+        assert restored.get('empat') == 'empat'
+        assert not StemCache().load(os.path.join(tmp, 'missing.joblib'))
+
+
+def test_clean_text_matches_legacy():
+    """clean_text baru harus identik dengan rangkaian re.sub lama"""
+    preprocessor = TextPreprocessor()
+
+    cases = [
+        "",
+        SAMPLE_TEXT,
+        "Lihat https://ejournal.unesa.ac.id/it-edu atau www.unesa.ac.id!",
+        "Hubungi admin@unesa.ac.id, x@http, a@httpx, a@b.http://c",
+        "Versi 2.0 (beta) -- 100% siap_pakai; naïve café İstanbul ²³ ٣",
+        "  spasi\t\nberlebih\x1c di\x00 sini  ",
+    ]
+
+    # Teks acak dari potongan yang rawan (URL, email, unicode, whitespace)
+    pieces = list("ahtpsw@.:/_-19 \n\t") + ['http', 'www', '@', 'é', 'İ', '²', '\u2003', 'Ω']
+    rng = random.Random(0)
+    cases += [
+        ''.join(rng.choice(pieces) for _ in range(rng.randint(1, 12)))
+        for _ in range(20000)
+    ]
+
+    for text in cases:
+        assert preprocessor.clean_text(text) == legacy_clean_text(text), repr(text)
+
+
+def test_parallel_batch_preserves_order():
+    """Batch paralel harus menghasilkan output dan urutan yang sama dengan serial"""
+    texts = [f"{SAMPLE_TEXT} dokumen nomor {i} jaringan" * (i % 3 + 1) for i in range(40)]
+
+    serial = TextPreprocessor(n_jobs=1).batch_preprocess_to_text(texts)
+    parallel = TextPreprocessor(n_jobs=2, chunk_size=4, min_parallel_batch=10)
+
+    assert parallel.batch_preprocess_to_text(texts) == serial
+    assert parallel.batch_preprocess(texts) == [text.split() for text in serial]
+
+
+def test_ensure_preprocessed_only_recomputes_stale():
+    """Hanya record baru atau yang teksnya berubah yang diproses ulang"""
+    preprocessor = TextPreprocessor()
+    fresh = SimpleNamespace(abstract_text=SAMPLE_TEXT, preprocessed_text='cached hasil',
+                            preprocess_hash=preprocess_hash(SAMPLE_TEXT))
+    new = SimpleNamespace(abstract_text=SAMPLE_TEXT, preprocessed_text=None,
+                          preprocess_hash=None)
+    edited = SimpleNamespace(abstract_text="Analisis jaringan komputer",
+                             preprocessed_text='teks lama',
+                             preprocess_hash=preprocess_hash("teks lama"))
+
+    texts = preprocessor.ensure_preprocessed([fresh, new, edited])
+
+    assert texts[0] == 'cached hasil'
+    assert texts[1] == preprocessor.preprocess_to_text(SAMPLE_TEXT)
+    assert texts[2] == preprocessor.preprocess_to_text("Analisis jaringan komputer")
+    assert edited.preprocess_hash == preprocess_hash("Analisis jaringan komputer")
+
+
+def test_token_table_matches_pipeline():
+    """Jalur tabel token harus menghasilkan token yang sama dengan pipeline biasa"""
+    texts = [SAMPLE_TEXT, "Abstrak: Analisis QoS jaringan yang ada di kampus, vol 2 no 3",
+             "Ini dan itu adalah hal yang tidak penting sama sekali"]
+    plain = TextPreprocessor()
+    table = TextPreprocessor(use_token_table=True, token_table_size=5)
+
+    assert isinstance(plain.stopwords, frozenset)
+    assert 'abstrak' in plain.stopwords
+
+    for text in texts:
+        assert table.preprocess(text) == plain.preprocess(text)
+        assert table.preprocess(text) == plain.preprocess(text)
+
+    # Tabel terbatas, token yang tidak muat tetap di-resolve dengan benar
+    assert len(table.token_table) == 5
+
+    prebuilt = TextPreprocessor(use_token_table=True)
+    prebuilt.build_token_table(plain.clean_text(SAMPLE_TEXT).split())
+    assert prebuilt.token_table['ini'] is None
+    assert prebuilt.preprocess(SAMPLE_TEXT) == plain.preprocess(SAMPLE_TEXT)
+
+
+def test_fused_preprocess_matches_four_pass_pipeline():
+    """Fast path satu loop identik dengan tokenize -> stopwords -> stem -> filter"""
+    from benchmark import load_corpus
+
+    preprocessor = TextPreprocessor()
+
+    for text in load_corpus(50) + ["", "a b c", SAMPLE_TEXT]:
+        tokens = preprocessor.stem_tokens(
+            preprocessor.remove_stopwords(preprocessor.tokenize(text))
+        )
+        expected = [token for token in tokens if token]
+
+        assert preprocessor.preprocess(text) == expected
+        assert preprocessor.preprocess_to_text(text) == ' '.join(expected)
+
+
+if __name__ == '__main__':
+    test_stem_cache_matches_stemmer()
+    test_stem_cache_bounded_and_persistent()
+    test_clean_text_matches_legacy()
+    test_parallel_batch_preserves_order()
+    test_ensure_preprocessed_only_recomputes_stale()
+    test_token_table_matches_pipeline()
+    test_fused_preprocess_matches_four_pass_pipeline()
+    print("✅ All preprocessing tests passed")
@@ -1,9 +1,9 @@
 """
 Script untuk training model KNN
 """
-from app import app
-from classifier import KNNClassifier
-from models import Abstract
+from app import app, db, create_classifier, init_stem_cache, model_registry, save_stem_cache
+from models import Abstract, keep_updated_at
+from pipeline import mark_processed, model_version
 import os
 
 def train_model():
@@ -12,6 +12,9 @@ def train_model():
         print("TRAINING MODEL KNN")
         print("=" * 70)
         
+        # Cache stemming dari run sebelumnya membuat preprocessing jauh lebih cepat
+        init_stem_cache()
+        
         # Ambil data berlabel
         labeled_data = Abstract.query.filter(Abstract.label.isnot(None)).all()
         
@@ -32,31 +35,41 @@ def train_model():
         print(f"   - TKJ: {tkj_count}")
         
         # Prepare data
-        texts = [d.abstract_text for d in labeled_data]
         labels = [d.label for d in labeled_data]
+        ids = [d.id for d in labeled_data]
         
         print(f"\n🔧 MEMULAI TRAINING...")
         print(f"   K Value: 5")
         print(f"   Test Size: 20%")
         
         # Initialize classifier
-        classifier = KNNClassifier(k=5)
+        classifier = create_classifier(k=5)
         
-        # Prepare data (preprocessing + split)
+        # Preprocessing (hanya data baru/berubah, sisanya dari database)
         print(f"\n   → Preprocessing texts...")
-        data = classifier.prepare_data(texts, labels, test_size=0.2, random_state=42)
+        texts = classifier.preprocessor.ensure_preprocessed(labeled_data)
+        keep_updated_at(labeled_data)
+        db.session.commit()
+        
+        # Prepare data (TF-IDF + split)
+        data = classifier.prepare_data(texts, labels, test_size=0.2, random_state=42,
+                                       preprocessed=True, ids=ids)
         
         # Train model
         print(f"   → Training KNN classifier...")
-        classifier.train(data['X_train'], data['y_train'])
+        classifier.train(data['X_train'], data['y_train'],
+                         counts=data['C_train'], ids=data['ids_train'])
         
         # Evaluate
         print(f"   → Evaluating model...")
         evaluation = classifier.evaluate(data['X_test'], data['y_test'])
         
-        # Save model
+        # Save model (versi baru, pointer CURRENT diganti secara atomik)
         print(f"   → Saving model...")
-        classifier.save('models')
+        version = model_registry.publish(classifier)
+        save_stem_cache()
+        mark_processed('train', Abstract.query.filter(Abstract.label.isnot(None)),
+                       model_version(classifier))
         
         result = {
             'success': True,
@@ -78,7 +91,8 @@ def train_model():
             print(f"   F1 Score : {result['metrics']['f1_score']:.2%}")
             
             print(f"\n💾 MODEL TERSIMPAN:")
-            print(f"   File: {os.path.abspath('knn_model.pkl')}")
+            print(f"   Versi: {version}")
+            print(f"   Folder: {os.path.abspath(model_registry.version_path(version))}")
             
             print(f"\n📊 CONFUSION MATRIX:")
             cm = result['metrics']['confusion_matrix']